@@ -0,0 +1,262 @@
+from datetime import timedelta
+from logging import getLogger
+from os.path import basename, exists, splitext
+from time import sleep
+from typing import Callable, Dict, List, Optional
+
+import dpath
+import requests
+from prosper_api.client import Client
+from prosper_shared.omni_config import (
+    Config,
+    FileConfigurationSource,
+    JsonConfigurationSource,
+    TomlConfigurationSource,
+    YamlConfigurationSource,
+    merge_config,
+)
+
+from prosper_bot.analytics import analyze
+from prosper_bot.bot.bot import (
+    ACCOUNTS_CONFIG,
+    API_RECORDING_CONFIG,
+    API_REPLAY_CONFIG,
+    METRICS_FILE_CONFIG,
+    POLL_SCHEDULER_CONFIG,
+    POLL_TIME,
+    Bot,
+)
+from prosper_bot.cli import APP_NAME, PROFILE_DIR_CONFIG, SINGLE_RUN_CONFIG
+from prosper_bot.client import PooledClient
+from prosper_bot.scheduler import CycleOutcome, PollScheduler, PollSchedulers
+
+__all__ = ["MultiAccountRunner", "load_account_config"]
+
+logger = getLogger(__file__)
+
+# Files and directories that would clash between accounts if they were shared
+PER_ACCOUNT_PATH_CONFIGS = [
+    "prosper-api.auth.token-cache",
+    "prosper-bot.analytics.note-store",
+    METRICS_FILE_CONFIG,
+    API_RECORDING_CONFIG,
+    API_REPLAY_CONFIG,
+    PROFILE_DIR_CONFIG,
+]
+
+# The top-level sections of the config, which an account's config file can override
+_CONFIG_SECTIONS = ["prosper-api", APP_NAME]
+_CONFIG_SOURCES: Dict[str, Callable[[str], FileConfigurationSource]] = {
+    ".json": JsonConfigurationSource,
+    ".toml": TomlConfigurationSource,
+    ".yml": YamlConfigurationSource,
+    ".yaml": YamlConfigurationSource,
+}
+# Least to most active, so the most active outcome of a round is the one that paces it
+_OUTCOME_ACTIVITY: List[CycleOutcome] = [
+    CycleOutcome.IDLE,
+    CycleOutcome.NO_LISTINGS,
+    CycleOutcome.INVESTED,
+]
+
+
+def load_account_config(config: Config, path: str, name: str) -> Config:
+    """Builds the config of an account from the shared config and the account's config file.
+
+    The account's config file only needs the settings that differ from the shared config, like the credentials. Files
+    and directories that can't be shared between accounts, like the token cache and note store, default to the shared
+    ones with the account name appended.
+
+    Args:
+        config (Config): The shared config.
+        path (str): The account's config file; JSON, TOML, or YAML.
+        name (str): The account name.
+
+    Returns:
+        Config: The account's config.
+
+    Raises:
+        FileNotFoundError: If the account's config file doesn't exist.
+        ValueError: If the account's config file isn't JSON, TOML, or YAML.
+    """
+    extension = splitext(path)[1].lower()
+    if extension not in _CONFIG_SOURCES:
+        raise ValueError(
+            f"Unsupported account config file {path}; expected one of {', '.join(_CONFIG_SOURCES)}"
+        )
+    if not exists(path):
+        raise FileNotFoundError(f"Account config file {path} not found")
+
+    shared_dict = {
+        section: config.get(section)
+        for section in _CONFIG_SECTIONS
+        if config.get(section) is not None
+    }
+    account_dict = merge_config([shared_dict, _CONFIG_SOURCES[extension](path).read()])
+    for key in PER_ACCOUNT_PATH_CONFIGS:
+        shared_path = config.get_as_str(key)
+        if shared_path and dpath.get(account_dict, key, ".", None) == shared_path:
+            root, extension = splitext(shared_path)
+            dpath.new(account_dict, key, f"{root}-{name}{extension}", ".")
+    return Config(account_dict)
+
+
+class _AccountScheduler(PollScheduler):
+    # Lets each account's bot feed the shared scheduler and report its outcome, while the runner decides the delay
+    def __init__(self, shared: PollScheduler):
+        self._shared = shared
+        self.outcome: Optional[CycleOutcome] = None
+        self.delay = POLL_TIME
+
+    def observe_listings(self, listings):
+        self._shared.observe_listings(listings)
+
+    def next_poll(self, outcome: CycleOutcome) -> timedelta:
+        self.outcome = outcome
+        return self.delay
+
+
+class MultiAccountRunner:
+    """Trades several Prosper accounts from a single process.
+
+    Each account has a bot of its own, with its own config, client, and cash, but the bots share one poll scheduler and
+    one HTTP connection pool. Every round runs a cycle for each account, one after the other, so all of them react to
+    a burst of listings within the same poll window; the scheduler then paces the next round based on the most active
+    account. The accounts take turns going first, so none of them always gets the first pick of the listings.
+    """
+
+    def __init__(
+        self,
+        scheduler: PollScheduler,
+        single_run: bool = False,
+        sleeper: Callable[[float], object] = sleep,
+    ):
+        """Creates a new runner without any accounts.
+
+        Args:
+            scheduler (PollScheduler): Paces the rounds.
+            single_run (bool): Whether to stop once every account has run out of cash to invest.
+            sleeper (Callable[[float], object]): Sleeps for the given number of seconds between rounds.
+        """
+        self.scheduler = scheduler
+        self.single_run = single_run
+        self.bots: Dict[str, Bot] = {}
+        self._sleeper = sleeper
+        self._schedulers: Dict[str, _AccountScheduler] = {}
+        self._rounds = 0
+
+    @classmethod
+    def from_config(
+        cls, config: Config, session: Optional[requests.Session] = None
+    ) -> "MultiAccountRunner":
+        """Creates a runner for the accounts in the config.
+
+        Args:
+            config (Config): The shared config, with the comma-separated account config files under `accounts`.
+            session (Optional[requests.Session]): The session to send every account's requests through. Omit to create
+                one.
+
+        Returns:
+            MultiAccountRunner: The runner.
+
+        Raises:
+            ValueError: If two account config files have the same name.
+        """
+        runner = cls(
+            PollSchedulers[
+                config.get_as_str(POLL_SCHEDULER_CONFIG, PollSchedulers.FIXED.name)
+            ].to_scheduler(POLL_TIME),
+            config.get_as_bool(SINGLE_RUN_CONFIG),
+        )
+        session = session if session is not None else requests.Session()
+        for path in config.get_as_str(ACCOUNTS_CONFIG, "").split(","):
+            path = path.strip()
+            if not path:
+                continue
+            name = splitext(basename(path))[0]
+            if name in runner.bots:
+                raise ValueError(f"More than one account config file is named {name}")
+            account_config = load_account_config(config, path, name)
+            # Replays don't need a connection
+            client = (
+                None
+                if account_config.get_as_str(API_REPLAY_CONFIG)
+                else PooledClient(account_config, session)
+            )
+            runner.add_account(name, account_config, client)
+        return runner
+
+    def add_account(
+        self, name: str, config: Config, client: Optional[Client] = None
+    ) -> Bot:
+        """Adds an account to trade.
+
+        Args:
+            name (str): The account name, for logging.
+            config (Config): The account's config.
+            client (Optional[Client]): The Prosper API client for the account. Omit to create one from the config.
+
+        Returns:
+            Bot: The account's bot.
+        """
+        scheduler = _AccountScheduler(self.scheduler)
+        self._schedulers[name] = scheduler
+        self.bots[name] = Bot(config, client, scheduler)
+        return self.bots[name]
+
+    def run(self):
+        """Main loop for all the accounts."""
+        delay = POLL_TIME
+        cash = {name: None for name in self.bots}
+
+        for name, bot in self.bots.items():
+            if bot.analytics:
+                logger.info(f"Analyzing account {name}...")
+                analyze(bot.client)
+
+        try:
+            while True:
+                try:
+                    delay = self._run_round(cash, delay)
+                except KeyboardInterrupt:
+                    logger.info("Interrupted...")
+                    break
+
+                if self.single_run and all(
+                    bot._is_done(cash[name]) for name, bot in self.bots.items()
+                ):
+                    break
+
+                self._sleeper(delay.total_seconds())
+        finally:
+            for name, bot in self.bots.items():
+                logger.info(f"Account {name}:")
+                bot._flush_profile()
+                bot.latency.report()
+
+    def _run_round(self, cash: dict, delay: timedelta) -> timedelta:
+        names = list(self.bots)
+        first = self._rounds % len(names) if names else 0
+        self._rounds += 1
+
+        outcome = None
+        for name in names[first:] + names[:first]:
+            logger.debug(f"Running cycle for account {name}")
+            scheduler = self._schedulers[name]
+            scheduler.outcome = None
+            cash[name], _ = self.bots[name]._run_cycle(cash[name], delay)
+            if scheduler.outcome is not None and (
+                outcome is None
+                or _OUTCOME_ACTIVITY.index(scheduler.outcome)
+                > _OUTCOME_ACTIVITY.index(outcome)
+            ):
+                outcome = scheduler.outcome
+
+        if outcome is None:
+            # Every cycle failed; try again after the same delay
+            return delay
+
+        delay = self.scheduler.next_poll(outcome)
+        for scheduler in self._schedulers.values():
+            scheduler.delay = delay
+        return delay
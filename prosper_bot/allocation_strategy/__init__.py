@@ -1,36 +1,103 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 from decimal import Decimal
 from enum import Enum
+from heapq import heapify, heappop, heappush
+from itertools import islice
 from logging import getLogger
-from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Union
+from threading import Lock
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from prosper_api.client import Client
-from prosper_api.models import Listing, SearchListingsRequest
+from prosper_api.models import Account, Listing, SearchListingsRequest
+from prosper_api.models.enums import ProsperRating
 
+from prosper_bot.listing_index import SeenListingIndex
 from prosper_bot.util import round_down_to_nearest_cent
 
-_search_params = {
-    "limit": 10,
-    "biddable": True,
-    "invested": False,
-    "sort_by": "lender_yield",
-    "sort_dir": "desc",
-}
+if TYPE_CHECKING:
+    # Scoring needs numpy, which is only loaded once a scorer is used
+    from prosper_bot.scoring import ListingScorer
+
+
+class SearchParams(NamedTuple):
+    """The parameters of the listing searches a strategy makes.
+
+    Immutable, so strategies running at the same time, in different threads or for different accounts, each search
+    with their own. Use `_replace` to derive a variant. Constraints on the listings, like the ratings, terms, lender
+    yield, and amount remaining, are sent with the search, so listings that don't match are never transferred; only what
+    the API can't express needs a strategy's `local_filter`.
+    """
+
+    limit: int = 10
+    biddable: bool = True
+    invested: bool = False
+    sort_by: str = "lender_yield"
+    sort_dir: str = "desc"
+    prosper_rating: Optional[Tuple[str, ...]] = None
+    listing_term: Optional[Tuple[int, ...]] = None
+    lender_yield_min: Optional[Decimal] = None
+    lender_yield_max: Optional[Decimal] = None
+    amount_remaining_min: Optional[Decimal] = None
+    amount_remaining_max: Optional[Decimal] = None
+
+    def allows_rating(self, rating: str) -> bool:
+        """Gets whether the searches can return listings with a rating.
+
+        Args:
+            rating (str): The prosper rating, by name.
+
+        Returns:
+            bool: Whether the rating is allowed.
+        """
+        return self.prosper_rating is None or rating in self.prosper_rating
 
+    def to_request(self, **overrides) -> SearchListingsRequest:
+        """Builds the search request for these parameters.
 
-def set_search_param(key, value):
-    _search_params[key] = value
+        Args:
+            **overrides: Search parameters that take precedence over these, like the prosper rating of a single search.
+
+        Returns:
+            SearchListingsRequest: The search request; parameters that are `None` are left out.
+        """
+        params = {k: v for k, v in self._asdict().items() if v is not None}
+        if self.prosper_rating is not None:
+            params["prosper_rating"] = [ProsperRating[r] for r in self.prosper_rating]
+        if self.listing_term is not None:
+            params["listing_term"] = list(self.listing_term)
+        return SearchListingsRequest(**{**params, **overrides})
 
 
-def _build_search_request() -> SearchListingsRequest:
-    return SearchListingsRequest(**_search_params)
+DEFAULT_SEARCH_PARAMS = SearchParams()
+DEFAULT_MAX_CONCURRENT_SEARCHES = 3
 
 
 __all__ = [
+    "AllocationState",
     "AllocationStrategy",
     "AllocationStrategies",
     "FixedTargetAllocationStrategy",
     "HighestMatchingRateAllocationStrategy",
+    "DEFAULT_MAX_CONCURRENT_SEARCHES",
+    "DEFAULT_SEARCH_PARAMS",
+    "SearchParams",
+    "plan_allocation",
 ]
 
 logger = getLogger(__file__)
@@ -41,6 +108,12 @@ class AllocationStrategy(Iterable[Listing]):
 
     Specifically, it defines a sequence of prosper API calls to get listings and an optional sort method used to
     reorder them before emission. Use the timeout parameter to force a maximum time to wait for matching listings.
+    Searches can be fanned out over a thread pool and prefetched in the background while the current results are
+    consumed; either way, the results are still emitted in the order of the search requests. Call `close()` (or drop
+    the iterator) to cancel any searches still in flight. Given a `SeenListingIndex` shared across polls, listings the
+    bot already bid on are skipped and only new or changed listings are logged. Unchanged listings are still filtered
+    and sorted with the rest of their page, since their order depends on the whole page. Given a `ListingScorer`, each
+    page is ranked with a single vectorized pass over its columns instead.
     """
 
     def __init__(
@@ -49,6 +122,11 @@ class AllocationStrategy(Iterable[Listing]):
         search_request_iterator: Iterator[SearchListingsRequest],
         local_sort: Optional[Callable[[Listing], bool]] = None,
         timeout_seconds: float = -1.0,
+        max_concurrent_searches: int = 1,
+        prefetch_depth: int = 0,
+        seen_listings: Optional[SeenListingIndex] = None,
+        scorer: Optional["ListingScorer"] = None,
+        local_filter: Optional[Callable[[Listing], bool]] = None,
     ):
         """Gets an instance of AllocationStrategy.
 
@@ -60,6 +138,16 @@ class AllocationStrategy(Iterable[Listing]):
                 before returning.
             timeout_seconds (float): The max real time in seconds to try to get a listing before giving up. `-1`
                 (default) indicates no timeout is required.
+            max_concurrent_searches (int): How many search requests to run concurrently each time the buffer runs
+                dry. `1` (default) runs them one at a time, only as needed.
+            prefetch_depth (int): How many upcoming search requests to keep in flight in the background while the
+                current results are consumed. `0` (default) disables prefetching.
+            seen_listings (Optional[SeenListingIndex]): The listings seen in previous polls. Omit to treat every
+                listing as new.
+            scorer (Optional[ListingScorer]): Ranks each page of results in one vectorized pass, best first, and drops
+                the listings it doesn't score; `local_sort` only breaks ties. Suited to large pages.
+            local_filter (Optional[Callable[[Listing], bool]]): Drops the returned listings it rejects. Only for what
+                the search requests can't express, since the listings are transferred either way.
         """
         self._client = client
         self._api_param_iterator = search_request_iterator
@@ -72,6 +160,21 @@ class AllocationStrategy(Iterable[Listing]):
         # We hold on to this to help with debugging. It's not used after generation.
         self._search_request: Optional[SearchListingsRequest] = None
         self._buffer: Optional[Iterable[Listing]] = None
+        self._max_concurrent_searches = max(max_concurrent_searches, 1)
+        self._prefetch_depth = max(prefetch_depth, 0)
+        self._seen_listings = seen_listings
+        self._scorer = scorer
+        self._local_filter = local_filter
+        self._pending_searches: Deque[
+            Future[Tuple[SearchListingsRequest, List[Listing]]]
+        ] = deque()
+        self._executor = (
+            ThreadPoolExecutor(
+                max(self._max_concurrent_searches, self._prefetch_depth + 1)
+            )
+            if self._max_concurrent_searches > 1 or self._prefetch_depth > 0
+            else None
+        )
 
     def __next__(self) -> Listing:
         """Gets the next listing from the buffer or fetches a new one if needed and available.
@@ -98,22 +201,95 @@ class AllocationStrategy(Iterable[Listing]):
         """Implements the iterable interface."""
         return self
 
+    def __del__(self):
+        """Cancels outstanding searches when the iterator is dropped."""
+        self.close()
+
+    def close(self):
+        """Cancels any searches still in flight and releases the worker threads."""
+        for pending_search in getattr(self, "_pending_searches", ()):
+            pending_search.cancel()
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     def _refresh_buffer(self):
-        self._search_request = self._api_param_iterator.__next__()
-        if self._local_sort is not None:
-            result = sorted(
-                self._client.search_listings(self._search_request).result,
-                key=self._local_sort,
+        if not self._pending_searches:
+            self._submit_searches(self._max_concurrent_searches)
+        if not self._pending_searches:
+            # That means we're actually done
+            self.close()
+            raise StopIteration()
+
+        # Pending searches are queued in request order, regardless of which one finishes first
+        pending_search = self._pending_searches.popleft()
+        self._submit_searches(self._prefetch_depth - len(self._pending_searches))
+        try:
+            self._search_request, result = pending_search.result(
+                timeout=self._time_remaining()
             )
-        else:
-            result = self._client.search_listings(self._search_request).result
+        except FuturesTimeoutError:
+            self.close()
+            raise StopIteration("Timed out while searching listings")
 
         return iter(result)
 
+    def _submit_searches(self, count: int):
+        for search_request in islice(self._api_param_iterator, max(count, 0)):
+            if self._executor is None:
+                pending_search = Future()
+                pending_search.set_result(self._search(search_request))
+            else:
+                pending_search = self._executor.submit(self._search, search_request)
+            self._pending_searches.append(pending_search)
+
+    def _search(
+        self, search_request: SearchListingsRequest
+    ) -> Tuple[SearchListingsRequest, List[Listing]]:
+        result = self._client.search_listings(search_request).result
+        if self._local_filter is not None:
+            result = [listing for listing in result if self._local_filter(listing)]
+        if self._seen_listings is not None:
+            result = self._diff_against_seen_listings(result)
+        if self._local_sort is not None:
+            result = sorted(result, key=self._local_sort)
+        if self._scorer is not None:
+            # Scoring pulls in NumPy, so it's only imported when a scorer is configured
+            from prosper_bot.scoring import rank  # fmt: skip
+
+            result = rank(result, self._scorer)
+
+        return search_request, result
+
+    def _diff_against_seen_listings(self, listings: List[Listing]) -> List[Listing]:
+        candidates = []
+        changed_count = 0
+        for listing in listings:
+            if self._seen_listings.is_invested(listing.listing_number):
+                continue
+            if self._seen_listings.observe(listing):
+                changed_count += 1
+                logger.debug(
+                    f"New listing {listing.listing_number} ({listing.prosper_rating}) at {listing.lender_yield * 100:5.2f}% for {listing.listing_term} months"
+                )
+            candidates.append(listing)
+
+        logger.debug(
+            f"{changed_count} of {len(listings)} listings are new or changed since the last poll"
+        )
+        return candidates
+
     def _check_timeout(self):
         if self._end_time is not None and datetime.now() > self._end_time:
+            self.close()
             raise StopIteration("Timed out while searching listings")
 
+    def _time_remaining(self) -> Optional[float]:
+        if self._end_time is None:
+            return None
+        return max((self._end_time - datetime.now()).total_seconds(), 0.0)
+
 
 _AGGRESSIVE_TARGETS = {
     "HR": Decimal("0.02"),
@@ -136,90 +312,349 @@ _CONSERVATIVE_TARGETS = {
 }
 
 
+def plan_allocation(
+    values: Dict[str, Union[float, Decimal]],
+    targets: Dict[str, Decimal],
+    total_value: Union[float, Decimal],
+    bid_amounts: List[Decimal],
+    candidates: Dict[str, List[Listing]],
+) -> List[Tuple[Listing, Decimal]]:
+    """Plans a batch of bids that leaves the ratings as close as possible to their target allocations.
+
+    The error minimized is the sum, over the ratings, of the squared difference between the target and the share of the
+    total value after the bids. It's separable by rating and convex in how much each rating gets, so a bid reduces it
+    the most by going to the rating with the largest remaining shortfall, and a rating's shortfall only shrinks as it
+    gets bids. Taking the rating with the largest shortfall for each bid in turn is therefore optimal when the bids are
+    the same size; when the first bid is larger, as `Bot` makes it, it's placed first. It takes O(n log r) time for n
+    bids over r ratings, regardless of how many candidates there are.
+
+    Args:
+        values (Dict[str, Union[float, Decimal]]): The current value of each rating, including pending bids.
+        targets (Dict[str, Decimal]): The target fraction of the total value for each rating.
+        total_value (Union[float, Decimal]): The total account value, including cash.
+        bid_amounts (List[Decimal]): The amounts to bid, in the order to place them.
+        candidates (Dict[str, List[Listing]]): The listings to choose from for each rating, best first.
+
+    Returns:
+        List[Tuple[Listing, Decimal]]: The listings to bid on and the amounts, in the order of `bid_amounts`. There are
+            fewer bids than amounts if there aren't enough candidates.
+    """
+    total_value = float(total_value)
+    # Max-heap of the ratings with candidates left, by shortfall; the target order breaks ties
+    heap = [
+        (
+            float(values.get(rating, 0)) / total_value - float(target),
+            i,
+            rating,
+        )
+        for i, (rating, target) in enumerate(targets.items())
+        if candidates.get(rating)
+    ]
+    heapify(heap)
+    taken = {rating: 0 for rating in targets}
+
+    bids = []
+    for amount in bid_amounts:
+        if not heap:
+            break
+        negative_shortfall, i, rating = heappop(heap)
+        bids.append((candidates[rating][taken[rating]], amount))
+        taken[rating] += 1
+        if taken[rating] < len(candidates[rating]):
+            heappush(
+                heap, (negative_shortfall + float(amount) / total_value, i, rating)
+            )
+
+    return bids
+
+
 class _BucketDatum(NamedTuple):
     value: Union[float, Decimal]
     pct_of_total: Union[float, Decimal]
     error_pct: Union[float, Decimal]
 
 
+class AllocationState:
+    """The value of an account by rating, carried over between cycles and updated locally as orders are placed.
+
+    Syncing with an account snapshot only rebuilds the state from it when the account changed in a way the orders
+    applied since the last sync don't explain: the account digest changed without any orders, or the cash isn't what
+    the orders left. Otherwise the snapshot is only checked, so the cycles after the bot's own orders don't redo the
+    allocation. All methods are thread-safe.
+    """
+
+    def __init__(self):
+        """Creates a new state, which is rebuilt from the first account it's synced with."""
+        self._lock = Lock()
+        self._values: Dict[str, Decimal] = {}
+        self._cash = Decimal(0)
+        self._pending_deposit = Decimal(0)
+        self._pending_investments = Decimal(0)
+        self._total_value = Decimal(0)
+        self._digest: Optional[str] = None
+        self._synced = False
+        self._ordered_since_sync = False
+        self.reconciliations = 0
+
+    def sync(self, account: Account) -> bool:
+        """Brings the state up to date with an account snapshot.
+
+        Args:
+            account (Account): The latest account snapshot.
+
+        Returns:
+            bool: Whether the state had to be rebuilt from the account.
+        """
+        digest = getattr(account, "prosper_account_digest", None)
+        with self._lock:
+            if (
+                self._synced
+                and account.available_cash_balance == self._cash
+                and (self._ordered_since_sync or digest == self._digest)
+            ):
+                self._digest = digest
+                self._ordered_since_sync = False
+                return False
+
+            invested_notes = account.invested_notes.model_dump()
+            pending_bids = account.pending_bids.model_dump()
+            # This assumes the ratings will never change
+            self._values = {
+                rating: invested_notes[rating] + pending_bids[rating]
+                for rating in invested_notes.keys()
+            }
+            self._cash = account.available_cash_balance
+            self._pending_deposit = account.pending_deposit
+            self._pending_investments = account.pending_investments_primary_market
+            self._total_value = account.total_account_value
+            self._digest = digest
+            self._synced = True
+            self._ordered_since_sync = False
+            self.reconciliations += 1
+            return True
+
+    def apply_order(self, bids: Iterable[Tuple[Listing, Decimal]]):
+        """Moves the amounts of placed bids from the cash to the ratings of the listings.
+
+        Args:
+            bids (Iterable[Tuple[Listing, Decimal]]): The listings bid on and the amounts.
+        """
+        with self._lock:
+            for listing, amount in bids:
+                rating = listing.prosper_rating.name
+                self._values[rating] = self._values.get(rating, 0) + amount
+                self._cash -= amount
+                self._pending_investments += amount
+            self._ordered_since_sync = True
+
+    @property
+    def values(self) -> Dict[str, Decimal]:
+        """The value of each rating, including pending bids."""
+        with self._lock:
+            return dict(self._values)
+
+    @property
+    def total_value(self) -> Decimal:
+        """The total account value, including cash."""
+        return self._total_value
+
+    def log(self, targets: Dict[str, Decimal], level: int = logging.INFO):
+        """Logs the value of each rating, its share of the total, and how far it is from the target.
+
+        Args:
+            targets (Dict[str, Decimal]): The target allocations by prosper rating.
+            level (int): The level to log at.
+        """
+        if not logger.isEnabledFor(level):
+            return
+
+        with self._lock:
+            total_value = self._total_value
+            buckets = {
+                rating: _BucketDatum(
+                    value,
+                    value / total_value,
+                    targets.get(rating, 0) - value / total_value,
+                )
+                for rating, value in self._values.items()
+            }
+            buckets["Cash"] = _BucketDatum(
+                round_down_to_nearest_cent(self._cash), self._cash / total_value, 0.0
+            )
+            buckets["Pending deposit"] = _BucketDatum(
+                self._pending_deposit, self._pending_deposit / total_value, 0.0
+            )
+            buckets["Total value"] = _BucketDatum(total_value, 1, 0.0)
+            pending_investments = self._pending_investments
+
+        logger.log(level, f"\tPending investments = ${pending_investments:9.2f}")
+        for key, bucket in buckets.items():
+            logger.log(
+                level,
+                f"\t{key:19} = ${bucket.value:9.2f} ({bucket.pct_of_total * 100:6.2f}%) error: {bucket.error_pct * 100:6.3f}%",
+            )
+
+
 class FixedTargetAllocationStrategy(AllocationStrategy):
-    """Defines an investment strategy where funds are allocated to different prosper ratings at a fixed rate."""
+    """Defines an investment strategy where funds are allocated to different prosper ratings at a fixed rate.
+
+    Listings are emitted from the rating furthest below its target first. Given the amounts of a batch of bids, it
+    instead searches every rating and emits the listings of the batch planned by `plan_allocation`, which spreads the
+    bids over the ratings as their errors change. Given an `AllocationState` shared across cycles, the allocation is
+    only rebuilt from the account, and logged, when the account changed other than by the bot's own orders.
+    """
 
     def __init__(
         self,
         client: Client,
         targets: Dict[str, Decimal],
+        account: Optional[Account] = None,
+        max_concurrent_searches: Optional[int] = None,
+        prefetch_depth: int = 0,
+        seen_listings: Optional[SeenListingIndex] = None,
+        bid_amounts: Optional[List[Decimal]] = None,
+        allocation_state: Optional[AllocationState] = None,
+        search_params: SearchParams = DEFAULT_SEARCH_PARAMS,
+        scorer: Optional["ListingScorer"] = None,
+        local_filter: Optional[Callable[[Listing], bool]] = None,
     ):
         """Instantiates a FixedTargetAllocationStrategy.
 
         Args:
             client (Client): The prosper API client.
             targets (Dict[str, Decimal]): The target allocations by prosper rating.
+            account (Optional[Account]): The account snapshot to allocate against. Omit to fetch it from the client.
+            max_concurrent_searches (Optional[int]): How many of the per-rating searches to run at once. Omit to run a
+                few at a time. A single bid still stops at the first rating with listings, cancelling the rest.
+            prefetch_depth (int): How many of the upcoming per-rating searches to keep in flight in the background.
+            seen_listings (Optional[SeenListingIndex]): The listings seen in previous polls.
+            bid_amounts (Optional[List[Decimal]]): The amounts of the bids the listings are for. Omit, or pass a single
+                amount, to emit listings from the rating furthest below its target first.
+            allocation_state (Optional[AllocationState]): The allocation carried over from previous cycles, which is
+                synced with the account. Omit to build the allocation from the account.
+            search_params (SearchParams): The parameters of the per-rating searches.
+            scorer (Optional[ListingScorer]): Ranks the listings of each rating. Omit to keep the search order.
+            local_filter (Optional[Callable[[Listing], bool]]): Drops the listings it rejects, for the constraints the
+                search params can't express.
         """
-        buckets = {}
-        account = client.get_account_info()
-        invested_notes = account.invested_notes.model_dump()
-        pending_bids = account.pending_bids.model_dump()
-        total_account_value = account.total_account_value
-        for rating in invested_notes.keys():
-            # This assumes the ratings will never change
-            value = invested_notes[rating] + pending_bids[rating]
-            pct_of_total = value / total_account_value
-            buckets[rating] = _BucketDatum(
-                value=value,
-                pct_of_total=pct_of_total,
-                error_pct=(targets[rating] if rating in targets else 0) - pct_of_total,
-            )
-
-        buckets["Cash"] = _BucketDatum(
-            round_down_to_nearest_cent(account.available_cash_balance),
-            account.available_cash_balance / total_account_value,
-            0.0,
-        )
-        buckets["Pending deposit"] = _BucketDatum(
-            account.pending_deposit,
-            account.pending_deposit / total_account_value,
-            0.0,
-        )
-        buckets["Total value"] = _BucketDatum(
-            total_account_value, total_account_value / total_account_value, 0.0
-        )
-
-        logger.info(
-            f"\tPending investments = ${account.pending_investments_primary_market:9.2f}"
-        )
-        for key, bucket in buckets.items():
-            logger.info(
-                f"\t{key:19} = ${bucket.value:9.2f} ({bucket.pct_of_total * 100:6.2f}%) error: {bucket.error_pct * 100:6.3f}%"
-            )
-
+        if account is None:
+            account = client.get_account_info()
+        if allocation_state is None:
+            allocation_state = AllocationState()
+        rebuilt = allocation_state.sync(account)
+        allocation_state.log(targets, logging.INFO if rebuilt else logging.DEBUG)
+
+        values = allocation_state.values
+        total_account_value = allocation_state.total_value
         grade_buckets_sorted_by_error_pct = sorted(
-            (i for i in buckets.items() if i[0] in targets.keys()),
-            key=lambda v: v[1].error_pct,
+            (
+                (rating, targets[rating] - values.get(rating, 0) / total_account_value)
+                for rating in targets.keys()
+                # The ratings the search params exclude aren't worth a search
+                if rating in values and search_params.allows_rating(rating)
+            ),
+            key=lambda v: v[1],
             reverse=True,
         )
 
         self._search_requests = [
-            SearchListingsRequest(
-                **{**_search_params, "prosper_rating": [b[0]]},
-            )
+            search_params.to_request(prosper_rating=[b[0]])
             for b in grade_buckets_sorted_by_error_pct
         ]
+        # A single bid goes to the rating furthest below its target either way, without waiting for every search
+        self._bid_amounts = (
+            bid_amounts if bid_amounts is not None and len(bid_amounts) > 1 else None
+        )
+        self._targets = targets
+        self._values = values
+        self._total_value = total_account_value
+        self._plan: Optional[Iterator[Listing]] = None
+
+        super().__init__(
+            client,
+            iter(self._search_requests),
+            max_concurrent_searches=(
+                DEFAULT_MAX_CONCURRENT_SEARCHES
+                if max_concurrent_searches is None
+                else max_concurrent_searches
+            ),
+            prefetch_depth=prefetch_depth,
+            seen_listings=seen_listings,
+            scorer=scorer,
+            local_filter=local_filter,
+        )
 
-        super().__init__(client, iter(self._search_requests))
+    def __next__(self) -> Listing:
+        """Gets the next listing, or the next one in the planned batch of bids if given the bid amounts."""
+        if self._bid_amounts is None:
+            return super().__next__()
+
+        if self._plan is None:
+            self._plan = iter(self._plan_bids())
+        return next(self._plan)
+
+    def _plan_bids(self) -> List[Listing]:
+        candidates: Dict[str, List[Listing]] = {}
+        while True:
+            try:
+                listing = super().__next__()
+            except StopIteration:
+                break
+            candidates.setdefault(listing.prosper_rating.name, []).append(listing)
+
+        bids = plan_allocation(
+            self._values,
+            self._targets,
+            self._total_value,
+            self._bid_amounts,
+            candidates,
+        )
+        for listing, amount in bids:
+            logger.debug(
+                f"Planned ${amount:5.2f} bid on {listing.listing_number} ({listing.prosper_rating.name})"
+            )
+        return [listing for listing, _ in bids]
 
 
 class HighestMatchingRateAllocationStrategy(AllocationStrategy):
     """Allocation strategy that greedily takes the listing with the highest lender yield."""
 
-    def __init__(self, client: Client):
+    def __init__(
+        self,
+        client: Client,
+        account: Optional[Account] = None,
+        seen_listings: Optional[SeenListingIndex] = None,
+        max_concurrent_searches: Optional[int] = None,
+        prefetch_depth: int = 0,
+        bid_amounts: Optional[List[Decimal]] = None,
+        allocation_state: Optional[AllocationState] = None,
+        search_params: SearchParams = DEFAULT_SEARCH_PARAMS,
+        scorer: Optional["ListingScorer"] = None,
+        local_filter: Optional[Callable[[Listing], bool]] = None,
+    ):
         """Creates a new allocation strategy.
 
         Args:
             client (Client): Prosper client
+            account (Optional[Account]): Unused; this strategy doesn't depend on the state of the account.
+            seen_listings (Optional[SeenListingIndex]): The listings seen in previous polls.
+            max_concurrent_searches (Optional[int]): Unused; this strategy only makes a single search.
+            prefetch_depth (int): Unused; this strategy only makes a single search.
+            bid_amounts (Optional[List[Decimal]]): Unused; the highest rates come first whatever the bids.
+            allocation_state (Optional[AllocationState]): Unused; this strategy doesn't depend on the allocation.
+            search_params (SearchParams): The parameters of the search.
+            scorer (Optional[ListingScorer]): Ranks the listings instead of the lender yield.
+            local_filter (Optional[Callable[[Listing], bool]]): Drops the listings it rejects, for the constraints the
+                search params can't express.
         """
-        self._search_requests = [_build_search_request()]
-        super().__init__(client, iter(self._search_requests))
+        self._search_requests = [search_params.to_request()]
+        super().__init__(
+            client,
+            iter(self._search_requests),
+            seen_listings=seen_listings,
+            scorer=scorer,
+            local_filter=local_filter,
+        )
 
 
 class AllocationStrategies(Enum):
@@ -239,11 +674,38 @@ class AllocationStrategies(Enum):
         """Return the name of the enum to make it more palatable in the CLI help."""
         return self.name
 
-    def to_strategy(self, client: Client) -> AllocationStrategy:
+    def to_strategy(
+        self,
+        client: Client,
+        account: Optional[Account] = None,
+        seen_listings: Optional[SeenListingIndex] = None,
+        max_concurrent_searches: Optional[int] = None,
+        prefetch_depth: int = 0,
+        bid_amounts: Optional[List[Decimal]] = None,
+        allocation_state: Optional[AllocationState] = None,
+        search_params: SearchParams = DEFAULT_SEARCH_PARAMS,
+        scorer: Optional["ListingScorer"] = None,
+        local_filter: Optional[Callable[[Listing], bool]] = None,
+    ) -> AllocationStrategy:
         """Converts the enum into a strategy, given a client and an account.
 
         Args:
             client (Client): Prosper client
+            account (Optional[Account]): The account snapshot for the current cycle. Omit to have the strategy fetch it
+                if it needs it.
+            seen_listings (Optional[SeenListingIndex]): The listings seen in previous polls, shared across strategies.
+            max_concurrent_searches (Optional[int]): How many searches the strategy can run at once. Omit to use the
+                strategy's default; `1` searches inline, without starting any threads.
+            prefetch_depth (int): How many upcoming searches to keep in flight while the current results are consumed.
+                `0` (default) disables prefetching.
+            bid_amounts (Optional[List[Decimal]]): The amounts of the bids the listings are for, so strategies can plan
+                the whole batch. Omit to take listings one at a time.
+            allocation_state (Optional[AllocationState]): The allocation carried over from previous cycles, updated with
+                the bot's own orders. Omit to build the allocation from the account.
+            search_params (SearchParams): The parameters of the strategy's searches.
+            scorer (Optional[ListingScorer]): Ranks each page of search results. Omit to keep the search order.
+            local_filter (Optional[Callable[[Listing], bool]]): Drops the listings it rejects, for the constraints the
+                search params can't express.
 
         Returns:
             AllocationStrategy: Allocation strategy matching the inputs.
@@ -251,4 +713,16 @@ class AllocationStrategies(Enum):
         cls = self.value[0]
         args = self.value[1:]
 
-        return cls(client, *args)
+        return cls(
+            client,
+            *args,
+            account=account,
+            seen_listings=seen_listings,
+            max_concurrent_searches=max_concurrent_searches,
+            prefetch_depth=prefetch_depth,
+            bid_amounts=bid_amounts,
+            allocation_state=allocation_state,
+            search_params=search_params,
+            scorer=scorer,
+            local_filter=local_filter,
+        )
@@ -0,0 +1,218 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from prosper_api.models import Note
+from prosper_api.models.enums import LoanStatus
+from pyxirr import xirr
+
+logger = logging.getLogger(__file__)
+
+_CHUNK_SIZE = 1000
+
+
+class _NoteColumns(NamedTuple):
+    """The fields of the notes that analytics use, as one array per field."""
+
+    origination_date: np.ndarray
+    note_ownership_amount: np.ndarray
+    principal_balance: np.ndarray
+    principal_paid: np.ndarray
+    interest_paid: np.ndarray
+    debt_sale_proceeds_received: np.ndarray
+    late_fees_paid: np.ndarray
+    note_status: np.ndarray
+    prosper_rating: np.ndarray
+
+    @classmethod
+    def from_notes(cls, notes: List[Note]) -> "_NoteColumns":
+        rows = [
+            (
+                n.origination_date,
+                n.note_ownership_amount,
+                n.principal_balance_pro_rata_share,
+                n.principal_paid_pro_rata_share,
+                n.interest_paid_pro_rata_share,
+                n.debt_sale_proceeds_received_pro_rata_share,
+                n.late_fees_paid_pro_rata_share,
+                n.note_status.value,
+                n.prosper_rating,
+            )
+            for n in notes
+        ]
+        columns = list(zip(*rows)) if rows else [()] * len(cls._fields)
+        return cls(
+            np.array(columns[0], dtype="datetime64[D]"),
+            *(np.array(c, dtype=np.float64) for c in columns[1:7]),
+            np.array(columns[7], dtype=np.int8),
+            np.array(columns[8], dtype=str),
+        )
+
+    def received(self) -> np.ndarray:
+        """Gets what has been paid back on each note."""
+        return (
+            self.principal_paid
+            + self.interest_paid
+            + self.debt_sale_proceeds_received
+            + self.late_fees_paid
+        )
+
+    def principal_balance_when(self, statuses: List[LoanStatus]) -> np.ndarray:
+        """Gets the principal balance of each note with one of the given statuses, and 0 for the rest."""
+        return np.where(
+            np.isin(self.note_status, [s.value for s in statuses]),
+            self.principal_balance,
+            0.0,
+        )
+
+
+class _Cashflows:
+    """Running cashflows for an IRR: the amount invested on each origination date and what it's worth now."""
+
+    __slots__ = ("invested_by_date", "final_value")
+
+    def __init__(self):
+        self.invested_by_date: Dict[np.datetime64, float] = defaultdict(float)
+        self.final_value = 0.0
+
+    def add(self, dates: np.ndarray, invested: np.ndarray, final_value: float):
+        """Folds in a group of notes.
+
+        Args:
+            dates (np.ndarray): The origination date of each note.
+            invested (np.ndarray): The ownership amount of each note.
+            final_value (float): What the notes are worth now.
+        """
+        unique_dates, date_codes = np.unique(dates, return_inverse=True)
+        for unique_date, amount in zip(
+            unique_dates,
+            np.bincount(date_codes, weights=invested, minlength=len(unique_dates)),
+        ):
+            self.invested_by_date[unique_date] += amount
+        self.final_value += final_value
+
+    def to_xirr_inputs(self, today: np.datetime64) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the dates and cashflows to pass to `xirr`, with the final value as of today."""
+        dates = sorted(self.invested_by_date)
+        return (
+            np.array([*dates, today], dtype="datetime64[D]"),
+            np.array([*(-self.invested_by_date[d] for d in dates), self.final_value]),
+        )
+
+
+class _NoteAggregates:
+    """Running totals over the notes, which grow with the number of distinct origination dates instead of notes."""
+
+    def __init__(self, start_date: str):
+        self._start_date = np.datetime64(start_date, "D")
+        self.note_count = 0
+        self.recent_note_count = 0
+        self.overall = _Cashflows()
+        self.by_rating: Dict[str, _Cashflows] = {}
+        self.oldest_active: Optional[np.datetime64] = None
+        self.newest_active: Optional[np.datetime64] = None
+
+    def fold(self, notes: _NoteColumns):
+        """Folds a chunk of notes into the totals.
+
+        Args:
+            notes (_NoteColumns): The chunk of notes.
+        """
+        received = notes.received()
+        recent = notes.origination_date > self._start_date
+        self.note_count += len(notes.origination_date)
+        self.recent_note_count += int(np.count_nonzero(recent))
+
+        self.overall.add(
+            notes.origination_date[recent],
+            notes.note_ownership_amount[recent],
+            float(
+                np.sum(
+                    notes.principal_balance_when(
+                        [
+                            LoanStatus.CURRENT,
+                            LoanStatus.FINAL_PAYMENT_IN_PROGRESS,
+                            LoanStatus.ORIGINATION_DELAYED,
+                        ]
+                    )[recent]
+                    + received[recent]
+                )
+            ),
+        )
+
+        rating_values = (
+            notes.principal_balance_when(
+                [
+                    LoanStatus.CURRENT,
+                    LoanStatus.FINAL_PAYMENT_IN_PROGRESS,
+                    LoanStatus.CHARGED_OFF,
+                ]
+            )
+            + received
+        )
+        ratings, first_indexes, rating_codes = np.unique(
+            notes.prosper_rating, return_index=True, return_inverse=True
+        )
+        # Keep the ratings in the order they first appear
+        for i in np.argsort(first_indexes):
+            in_rating = rating_codes == i
+            self.by_rating.setdefault(str(ratings[i]), _Cashflows()).add(
+                notes.origination_date[in_rating],
+                notes.note_ownership_amount[in_rating],
+                float(np.sum(rating_values[in_rating])),
+            )
+
+        active_dates = notes.origination_date[
+            notes.note_status == LoanStatus.CURRENT.value
+        ]
+        if len(active_dates):
+            oldest_active, newest_active = active_dates.min(), active_dates.max()
+            if self.oldest_active is None or oldest_active < self.oldest_active:
+                self.oldest_active = oldest_active
+            if self.newest_active is None or newest_active > self.newest_active:
+                self.newest_active = newest_active
+
+
+def _chunked(iterable: Iterable[Note], size: int) -> Iterator[List[Note]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def analyze_notes(notes: Iterable[Note], start_date: str):
+    """Logs the overall and per-rating IRRs of the given notes, and the range of active note dates.
+
+    Args:
+        notes (Iterable[Note]): The notes to analyze; they are consumed in chunks, so they can be streamed.
+        start_date (str): Only notes originated after this date count towards the overall IRR.
+    """
+    # Stream the notes through in chunks, so memory doesn't grow with the size of the account
+    aggregates = _NoteAggregates(start_date)
+    for chunk in _chunked(notes, _CHUNK_SIZE):
+        aggregates.fold(_NoteColumns.from_notes(chunk))
+    today = np.datetime64(date.today(), "D")
+
+    logger.debug(f"Total notes: {aggregates.note_count}")
+    print(f"Total recent notes: {aggregates.recent_note_count}")
+
+    all_dates, all_cashflows = aggregates.overall.to_xirr_inputs(today)
+    logger.debug(json.dumps(np.datetime_as_string(all_dates).tolist(), indent=2))
+    logger.debug(json.dumps([str(c) for c in all_cashflows], indent=2))
+    overall_irr = xirr(all_dates, all_cashflows)
+
+    logger.info(f"Overall IRR: {overall_irr:.2%}")
+
+    # IRR by rating
+    for rating, cashflows in aggregates.by_rating.items():
+        irr = xirr(*cashflows.to_xirr_inputs(today))
+        logger.info(f"IRR for {rating}: {irr:.2%}")
+
+    # Oldest active note origination date
+    logger.info(f"Oldest active note date: {aggregates.oldest_active}")
+
+    # Newst active note origination date
+    logger.info(f"Newest active note date: {aggregates.newest_active}")
@@ -0,0 +1,540 @@
+import argparse
+import heapq
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+from time import perf_counter
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from prosper_api.models import (
+    Account,
+    AmountsByRating,
+    Listing,
+    SearchListingsRequest,
+    SearchListingsResponse,
+)
+from prosper_api.models.enums import SortOrder
+
+from prosper_bot.allocation_strategy import AllocationStrategies
+from prosper_bot.bot.bot import MIN_ALLOWED_BID, Bot
+from prosper_bot.simulator import ManualClock, SimulatedClient
+from prosper_bot.util import bucketize, print_histogram
+
+__all__ = [
+    "BacktestResult",
+    "Backtester",
+    "ListingSnapshot",
+    "Purchase",
+    "load_snapshots",
+    "main",
+    "save_snapshots",
+    "simulate_snapshots",
+]
+
+logger = logging.getLogger(__file__)
+
+DEFAULT_CASH = Decimal("1000.00")
+DEFAULT_CYCLES = 1000
+DEFAULT_SEED = 20240101
+_RATINGS = list(AmountsByRating.model_fields)
+# Simulated snapshots start here, so generated runs are reproducible
+_START_TIME = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+# These fields choose and page through the results rather than filter them
+_PAGING_FIELDS = {"sort_by", "sort_dir", "offset", "limit", "prosper_rating"}
+# Filters that apply even when they aren't set on the request
+_DEFAULT_FILTER_FIELDS = {
+    field
+    for field, info in SearchListingsRequest.model_fields.items()
+    if info.default is not None and field not in _PAGING_FIELDS
+}
+
+
+class ListingSnapshot(NamedTuple):
+    """The listings a search would have returned at a point in time."""
+
+    timestamp: datetime
+    listings: List[Listing]
+
+
+class Purchase(NamedTuple):
+    """A bid the strategy would have placed."""
+
+    timestamp: datetime
+    listing_number: int
+    prosper_rating: str
+    lender_yield: Decimal
+    amount: Decimal
+
+
+class BacktestResult:
+    """What a strategy would have bought over the snapshots."""
+
+    def __init__(
+        self,
+        strategy: AllocationStrategies,
+        cycles: int,
+        purchases: List[Purchase],
+        cash: Decimal,
+        invested: Dict[str, Decimal],
+        elapsed_seconds: float,
+    ):
+        """Captures the outcome of a backtest.
+
+        Args:
+            strategy (AllocationStrategies): The strategy that was replayed.
+            cycles (int): How many snapshots were replayed.
+            purchases (List[Purchase]): The bids the strategy would have placed, in order.
+            cash (Decimal): The cash left at the end.
+            invested (Dict[str, Decimal]): The amount invested in each rating at the end, including what was invested
+                before the backtest started.
+            elapsed_seconds (float): How long the backtest took.
+        """
+        self.strategy = strategy
+        self.cycles = cycles
+        self.purchases = purchases
+        self.cash = cash
+        self.invested = invested
+        self.elapsed_seconds = elapsed_seconds
+
+    @property
+    def cycles_per_second(self) -> float:
+        """How many cycles were replayed per second."""
+        return self.cycles / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def rating_mix(self) -> Dict[str, Decimal]:
+        """The amount the backtest bought of each rating, in rating order."""
+        amounts = bucketize(
+            self.purchases, lambda p: p.prosper_rating, lambda p: p.amount
+        )
+        return {rating: amounts[rating] for rating in _RATINGS if rating in amounts}
+
+    def report(
+        self,
+        printer: Callable[[str], object] = print,
+        show_purchases: bool = True,
+    ):
+        """Prints the purchases and the resulting rating mix.
+
+        Args:
+            printer (Callable[[str], object]): The method to use to print. Defaults to `print`.
+            show_purchases (bool): Whether to list every purchase.
+        """
+        total = sum(p.amount for p in self.purchases)
+        printer(
+            f"## {self.strategy.name}: {len(self.purchases)} purchases totaling ${total:.2f} over {self.cycles} cycles ({self.cycles_per_second:,.0f} cycles/s); ${self.cash:.2f} cash left"
+        )
+        if show_purchases:
+            for p in self.purchases:
+                printer(
+                    f"{p.timestamp.isoformat()} {p.listing_number} {p.prosper_rating:>2} {p.lender_yield * 100:5.2f}% ${p.amount:.2f}"
+                )
+        if self.purchases:
+            print_histogram(
+                f"{self.strategy.name} rating mix of purchases",
+                self.rating_mix,
+                printer=printer,
+            )
+        invested = {r: v for r, v in self.invested.items() if v}
+        if invested:
+            print_histogram(
+                f"{self.strategy.name} rating mix of the account",
+                invested,
+                printer=printer,
+            )
+
+
+class _ListingFeed:
+    # Serves searches from the current snapshot in memory, keeping the listings of each rating sorted for each order
+    # the strategies ask for, so a search only looks at as many listings as it returns
+
+    def __init__(self, invested: Set[int]):
+        self._invested = invested
+        self._by_rating: Dict[str, List[Listing]] = {}
+        self._sorted: Dict[Tuple[str, str, bool], List[Listing]] = {}
+
+    def load(self, by_rating: Dict[str, List[Listing]]):
+        self._by_rating = by_rating
+        self._sorted = {}
+
+    def search_listings(self, request: SearchListingsRequest) -> SearchListingsResponse:
+        sort_by = request.sort_by.value
+        descending = request.sort_dir == SortOrder.DESCENDING
+        candidates = [
+            self._sorted_listings(rating.name, sort_by, descending)
+            for rating in request.prosper_rating
+        ]
+        if len(candidates) == 1:
+            merged: Iterable[Listing] = candidates[0]
+        else:
+            merged = heapq.merge(
+                *candidates,
+                key=lambda listing: _sort_key(getattr(listing, sort_by)),
+                reverse=descending,
+            )
+
+        offset = request.offset or 0
+        limit = request.limit or 25
+        result = list(
+            islice(filter(self._matcher(request), merged), offset, offset + limit)
+        )
+        # Validating the listings again would cost more than the rest of the cycle, and the total isn't needed
+        return SearchListingsResponse.model_construct(
+            result=result, result_count=len(result), total_count=None
+        )
+
+    def _sorted_listings(
+        self, rating: str, sort_by: str, descending: bool
+    ) -> List[Listing]:
+        key = (rating, sort_by, descending)
+        listings = self._sorted.get(key)
+        if listings is None:
+            listings = self._sorted[key] = sorted(
+                self._by_rating.get(rating, ()),
+                key=lambda listing: _sort_key(getattr(listing, sort_by)),
+                reverse=descending,
+            )
+        return listings
+
+    def _matcher(self, request: SearchListingsRequest) -> Callable[[Listing], bool]:
+        checks: List[Callable[[Listing], bool]] = []
+        # Only looking at the fields that were set is much quicker than going through all of them
+        for field in (
+            request.model_fields_set - _PAGING_FIELDS
+        ) | _DEFAULT_FILTER_FIELDS:
+            value = getattr(request, field)
+            if value is None:
+                continue
+            if field == "invested":
+                checks.append(
+                    lambda listing, v=value: (listing.listing_number in self._invested)
+                    == v
+                )
+            elif field.endswith("_min"):
+                checks.append(
+                    lambda listing, f=field[:-4], v=value: (
+                        getattr(listing, f) is not None and getattr(listing, f) >= v
+                    )
+                )
+            elif field.endswith("_max"):
+                checks.append(
+                    lambda listing, f=field[:-4], v=value: (
+                        getattr(listing, f) is not None and getattr(listing, f) <= v
+                    )
+                )
+            elif isinstance(value, list):
+                checks.append(
+                    lambda listing, f=field, v=set(value): getattr(listing, f) in v
+                )
+            else:
+                checks.append(
+                    lambda listing, f=field, v=value: getattr(listing, f) == v
+                )
+
+        return lambda listing: all(check(listing) for check in checks)
+
+
+def _sort_key(value):
+    return getattr(value, "value", value)
+
+
+class Backtester:
+    """Replays listing snapshots through the allocation strategies, with a simulated account, to see what they'd buy.
+
+    Each snapshot is one cycle. Before each cycle, the deposit is added to the simulated cash; then the strategy picks
+    listings from the snapshot the way the bot would, with the bid amounts the bot would use, and every bid that fits
+    the listing's remaining amount is bought. Bought listings are left out of the later snapshots' searches, and the
+    account buckets the fixed-target strategies allocate against are updated immediately. Notes aren't repaid, and
+    listings aren't funded any further by other lenders between the snapshots.
+    """
+
+    def __init__(
+        self,
+        snapshots: Sequence[ListingSnapshot],
+        cash: Decimal = DEFAULT_CASH,
+        deposit_per_cycle: Decimal = Decimal(0),
+        min_bid: Decimal = MIN_ALLOWED_BID,
+        max_orders_per_cycle: int = 1,
+        invested: Optional[Dict[str, Decimal]] = None,
+    ):
+        """Creates a new backtester.
+
+        Args:
+            snapshots (Sequence[ListingSnapshot]): The listings available in each cycle, in chronological order.
+            cash (Decimal): The cash available at the start.
+            deposit_per_cycle (Decimal): Cash added before each cycle.
+            min_bid (Decimal): The smallest bid to place.
+            max_orders_per_cycle (int): The most bids to place per cycle.
+            invested (Optional[Dict[str, Decimal]]): The amount already invested in each rating at the start. Omit to
+                start with an empty account.
+        """
+        self._snapshots = snapshots
+        self._cash = cash
+        self._deposit_per_cycle = deposit_per_cycle
+        self._min_bid = min_bid
+        self._max_orders_per_cycle = max(max_orders_per_cycle, 1)
+        self._invested = {r: Decimal(0) for r in _RATINGS}
+        self._invested.update(invested or {})
+        self._snapshots_by_rating: Optional[List[Dict[str, List[Listing]]]] = None
+
+    def run(self, strategy: AllocationStrategies) -> BacktestResult:
+        """Replays the snapshots through a strategy.
+
+        Args:
+            strategy (AllocationStrategies): The strategy to replay.
+
+        Returns:
+            BacktestResult: What the strategy would have bought.
+        """
+        cash = self._cash
+        invested = dict(self._invested)
+        invested_listings: Set[int] = set()
+        feed = _ListingFeed(invested_listings)
+        purchases = []
+
+        start = perf_counter()
+        for snapshot, by_rating in zip(self._snapshots, self._index_snapshots()):
+            cash += self._deposit_per_cycle
+            total_account_value = cash + sum(invested.values())
+            bid_amounts = Bot.get_bid_amounts(
+                cash,
+                self._min_bid,
+                total_account_value,
+                None,
+                self._max_orders_per_cycle,
+            )
+            if not bid_amounts:
+                continue
+
+            feed.load(by_rating)
+            allocation_strategy = strategy.to_strategy(
+                feed,
+                _account(cash, invested, total_account_value),
+                max_concurrent_searches=1,
+                bid_amounts=bid_amounts,
+            )
+            for listing, amount in zip(
+                Bot.take_listings(allocation_strategy, len(bid_amounts)),
+                bid_amounts,
+            ):
+                if amount > listing.amount_remaining:
+                    continue
+                rating = listing.prosper_rating.name
+                cash -= amount
+                invested[rating] += amount
+                invested_listings.add(listing.listing_number)
+                purchases.append(
+                    Purchase(
+                        snapshot.timestamp,
+                        listing.listing_number,
+                        rating,
+                        listing.lender_yield,
+                        amount,
+                    )
+                )
+
+        return BacktestResult(
+            strategy,
+            len(self._snapshots),
+            purchases,
+            cash,
+            invested,
+            perf_counter() - start,
+        )
+
+    def _index_snapshots(self) -> List[Dict[str, List[Listing]]]:
+        # Grouping the listings by rating once lets every strategy's searches skip the other ratings
+        if self._snapshots_by_rating is None:
+            self._snapshots_by_rating = []
+            for snapshot in self._snapshots:
+                by_rating: Dict[str, List[Listing]] = {}
+                for listing in snapshot.listings:
+                    by_rating.setdefault(listing.prosper_rating.name, []).append(
+                        listing
+                    )
+                self._snapshots_by_rating.append(by_rating)
+        return self._snapshots_by_rating
+
+
+def _account(
+    cash: Decimal, invested: Dict[str, Decimal], total_account_value: Decimal
+) -> Account:
+    # Only the fields the strategies read are filled in; building the model without validation keeps cycles cheap
+    empty = AmountsByRating.model_construct(**{r: Decimal(0) for r in _RATINGS})
+    return Account.model_construct(
+        available_cash_balance=cash,
+        total_account_value=total_account_value,
+        pending_deposit=Decimal(0),
+        pending_investments_primary_market=Decimal(0),
+        invested_notes=AmountsByRating.model_construct(**invested),
+        pending_bids=empty,
+    )
+
+
+def load_snapshots(path: str) -> List[ListingSnapshot]:
+    """Reads listing snapshots from a file with a JSON object per line.
+
+    Args:
+        path (str): The file to read; each line holds a `timestamp` in ISO format and the `listings` as returned by the
+            API.
+
+    Returns:
+        List[ListingSnapshot]: The snapshots, in the order they were written.
+    """
+    with open(path) as snapshots_file:
+        return [
+            ListingSnapshot(
+                datetime.fromisoformat(record["timestamp"]),
+                [Listing.model_validate(listing) for listing in record["listings"]],
+            )
+            for record in map(json.loads, snapshots_file)
+        ]
+
+
+def save_snapshots(snapshots: Iterable[ListingSnapshot], path: str):
+    """Writes listing snapshots to a file with a JSON object per line, as read by `load_snapshots`.
+
+    Args:
+        snapshots (Iterable[ListingSnapshot]): The snapshots to write.
+        path (str): Where to write them.
+    """
+    with open(path, "w") as snapshots_file:
+        for snapshot in snapshots:
+            snapshots_file.write(
+                json.dumps(
+                    {
+                        "timestamp": snapshot.timestamp.isoformat(),
+                        "listings": [
+                            listing.model_dump(mode="json")
+                            for listing in snapshot.listings
+                        ],
+                    }
+                )
+                + "\n"
+            )
+
+
+def simulate_snapshots(
+    cycles: int = DEFAULT_CYCLES,
+    seed: int = DEFAULT_SEED,
+    interval: timedelta = timedelta(minutes=1),
+    listings_per_minute: float = 1.0,
+    initial_listings: int = 20,
+) -> Iterator[ListingSnapshot]:
+    """Generates listing snapshots from the simulator, for when there's no history to replay.
+
+    Args:
+        cycles (int): How many snapshots to generate.
+        seed (int): Seeds the simulated listings.
+        interval (timedelta): The time between snapshots.
+        listings_per_minute (float): How often new listings arrive.
+        initial_listings (int): How many listings there are at the start.
+
+    Yields:
+        ListingSnapshot: The biddable listings at each interval.
+    """
+    clock = ManualClock(_START_TIME)
+    client = SimulatedClient(
+        listings_per_minute=listings_per_minute,
+        initial_listings=initial_listings,
+        seed=seed,
+        clock=clock,
+    )
+    for _ in range(cycles):
+        clock.now += interval
+        listings = []
+        while True:
+            page = client.search_listings(
+                SearchListingsRequest(offset=len(listings), limit=500)
+            ).result
+            listings += page
+            if len(page) < 500:
+                break
+        yield ListingSnapshot(clock.now, listings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry-point for the backtest script.
+
+    Args:
+        argv (Optional[List[str]]): The command line arguments. Omit to use `sys.argv`.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay listing snapshots through the allocation strategies to see what they would have bought."
+    )
+    parser.add_argument(
+        "--snapshots",
+        help="Replay the snapshots in this file, with a JSON object per line. Omit to simulate them.",
+    )
+    parser.add_argument(
+        "--save-snapshots", help="Store the replayed snapshots in this file."
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=DEFAULT_CYCLES,
+        help="How many snapshots to simulate.",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        choices=[s.name for s in AllocationStrategies],
+        help="The strategies to replay; can be repeated. Omit to replay all of them.",
+    )
+    parser.add_argument("--cash", type=Decimal, default=DEFAULT_CASH)
+    parser.add_argument("--deposit-per-cycle", type=Decimal, default=Decimal(0))
+    parser.add_argument("--min-bid", type=Decimal, default=MIN_ALLOWED_BID)
+    parser.add_argument("--max-orders-per-cycle", type=int, default=1)
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Only print the rating mix, not every purchase.",
+    )
+    args = parser.parse_args(argv)
+
+    snapshots = (
+        load_snapshots(args.snapshots)
+        if args.snapshots
+        else list(simulate_snapshots(args.cycles, args.seed))
+    )
+    if args.save_snapshots:
+        save_snapshots(snapshots, args.save_snapshots)
+
+    backtester = Backtester(
+        snapshots,
+        cash=args.cash,
+        deposit_per_cycle=args.deposit_per_cycle,
+        min_bid=args.min_bid,
+        max_orders_per_cycle=args.max_orders_per_cycle,
+    )
+    # The strategies log the account buckets every cycle, which would swamp the report and slow the replay down
+    logging.disable(logging.INFO)
+    try:
+        results = [
+            backtester.run(AllocationStrategies[name])
+            for name in args.strategy or [s.name for s in AllocationStrategies]
+        ]
+    finally:
+        logging.disable(logging.NOTSET)
+
+    for result in results:
+        result.report(show_purchases=not args.summary_only)
+
+    return 0
@@ -0,0 +1,395 @@
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from time import perf_counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from prosper_api.client import Client
+from prosper_api.models import SearchListingsRequest, SearchListingsResponse
+from prosper_shared.omni_config import Config
+
+from prosper_bot.allocation_strategy import (
+    AllocationStrategies,
+    AllocationStrategy,
+    FixedTargetAllocationStrategy,
+    plan_allocation,
+)
+from prosper_bot.analytics.irr import analyze_notes
+from prosper_bot.bot.bot import Bot
+from prosper_bot.listing_index import SeenListingIndex
+from prosper_bot.note_store import NoteStore
+from prosper_bot.scoring import field
+from prosper_bot.simulator import ManualClock, SimulatedClient
+
+__all__ = [
+    "Metric",
+    "compare",
+    "load_baseline",
+    "main",
+    "run_benchmarks",
+    "save_baseline",
+]
+
+logger = logging.getLogger(__file__)
+
+DEFAULT_SEED = 20240101
+DEFAULT_CYCLES = 100
+DEFAULT_LISTINGS = 5000
+DEFAULT_NOTES = 10000
+DEFAULT_TOLERANCE = 0.2
+# Repeatable measurements take the best of a few runs, which filters out most of the noise from the rest of the machine
+REPEATS = 3
+
+# The fixed targets the strategy benchmarks allocate against
+_TARGETS = AllocationStrategies.AGGRESSIVE.value[1]
+# Where the simulator's clock starts for every benchmark
+_START_TIME = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class Metric(NamedTuple):
+    """A single benchmark measurement."""
+
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+class _ReplayedSearches:
+    # Serves search results fetched up front, so only the strategy is timed and not the simulator
+
+    def __init__(self, client: Client, requests: List[SearchListingsRequest]):
+        self._responses = {
+            request.offset: client.search_listings(request) for request in requests
+        }
+
+    def search_listings(self, request: SearchListingsRequest) -> SearchListingsResponse:
+        return self._responses[request.offset]
+
+
+def bench_cycle(cycles: int = DEFAULT_CYCLES, seed: int = DEFAULT_SEED) -> List[Metric]:
+    """Times `Bot._do_run` against the simulator, with enough cash deposited before each cycle to invest.
+
+    Args:
+        cycles (int): How many cycles to run.
+        seed (int): Seeds the simulated listings.
+
+    Returns:
+        List[Metric]: The per-cycle latency and API calls.
+    """
+    clock = ManualClock(_START_TIME)
+    client = SimulatedClient(
+        cash=Decimal(0), listings_per_minute=5.0, seed=seed, clock=clock
+    )
+    bot = Bot(
+        Config(
+            {
+                "prosper-bot": {
+                    "cli": {"single-run": True},
+                    "bot": {"strategy": "AGGRESSIVE", "max-orders-per-cycle": 5},
+                }
+            }
+        ),
+        client,
+    )
+    latencies = []
+    for _ in range(cycles):
+        clock.now += timedelta(minutes=1)
+        client.deposit(Decimal("125.00"))
+        start = perf_counter()
+        bot._do_run(None)
+        latencies.append(perf_counter() - start)
+
+    return [
+        Metric("cycle.latency.median", statistics.median(latencies) * 1000, "ms"),
+        Metric("cycle.latency.max", max(latencies) * 1000, "ms"),
+        Metric(
+            "cycle.api_calls", sum(client.stats.requests.values()) / cycles, "calls"
+        ),
+        Metric("cycle.fill_rate", client.stats.fill_rate, "", higher_is_better=True),
+    ]
+
+
+def bench_strategy(
+    listing_count: int = DEFAULT_LISTINGS, seed: int = DEFAULT_SEED
+) -> List[Metric]:
+    """Times building a `FixedTargetAllocationStrategy` and iterating an `AllocationStrategy` over many listings.
+
+    Args:
+        listing_count (int): How many listings the simulator holds.
+        seed (int): Seeds the simulated listings.
+
+    Returns:
+        List[Metric]: The construction time, the listings evaluated per second, and the time to plan a batch of bids.
+    """
+    client = SimulatedClient(
+        initial_listings=listing_count,
+        listings_per_minute=0,
+        funding_time=timedelta(days=30),
+        seed=seed,
+        clock=ManualClock(_START_TIME),
+    )
+    account = client.get_account_info()
+
+    iterations = 100
+    start = perf_counter()
+    for _ in range(iterations):
+        FixedTargetAllocationStrategy(client, _TARGETS, account).close()
+    construction_time = (perf_counter() - start) / iterations
+
+    page_size = 500
+    requests = [
+        SearchListingsRequest(offset=offset, limit=page_size)
+        for offset in range(0, listing_count, page_size)
+    ]
+    searches = _ReplayedSearches(client, requests)
+    iteration_times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        evaluated = sum(
+            1
+            for _ in AllocationStrategy(
+                searches,
+                iter(requests),
+                local_sort=lambda listing: -listing.lender_yield,
+                seen_listings=SeenListingIndex(),
+            )
+        )
+        iteration_times.append(perf_counter() - start)
+
+    # The same pages, ranked in one vectorized pass each instead of a sort key per listing
+    scorer = field("lender_yield")
+    scored_times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        scored = sum(
+            1
+            for _ in AllocationStrategy(
+                searches,
+                iter(requests),
+                seen_listings=SeenListingIndex(),
+                scorer=scorer,
+            )
+        )
+        scored_times.append(perf_counter() - start)
+
+    candidates = {}
+    for listing in client.search_listings(
+        SearchListingsRequest(limit=listing_count)
+    ).result:
+        candidates.setdefault(listing.prosper_rating.name, []).append(listing)
+    values = {
+        rating: value
+        for rating, value in account.invested_notes.model_dump().items()
+        if rating in _TARGETS
+    }
+    bid_amounts = [Decimal("25.00")] * 100
+    plan_times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        plan_allocation(
+            values,
+            _TARGETS,
+            account.total_account_value,
+            bid_amounts,
+            candidates,
+        )
+        plan_times.append(perf_counter() - start)
+
+    return [
+        Metric("strategy.construction", construction_time * 1000, "ms"),
+        Metric(
+            "strategy.listings_per_second",
+            evaluated / min(iteration_times),
+            "listings/s",
+            higher_is_better=True,
+        ),
+        Metric(
+            "strategy.scored_listings_per_second",
+            scored / min(scored_times),
+            "listings/s",
+            higher_is_better=True,
+        ),
+        Metric("strategy.plan", min(plan_times) * 1000, "ms"),
+    ]
+
+
+def bench_analytics(
+    note_count: int = DEFAULT_NOTES, seed: int = DEFAULT_SEED
+) -> List[Metric]:
+    """Times syncing the notes into the note store and analyzing them, and measures the peak memory of the analysis.
+
+    Args:
+        note_count (int): How many notes the account holds.
+        seed (int): Seeds the simulated notes.
+
+    Returns:
+        List[Metric]: The sync and analysis wall times and the analysis memory high-water mark.
+    """
+    client = SimulatedClient(initial_listings=0, note_count=note_count, seed=seed)
+    start_date = date(2006, 1, 5).isoformat()
+    with NoteStore(":memory:") as note_store:
+        start = perf_counter()
+        note_store.sync(client)
+        sync_time = perf_counter() - start
+
+        analyze_times = []
+        for _ in range(REPEATS):
+            start = perf_counter()
+            analyze_notes(note_store.iter_notes(), start_date)
+            analyze_times.append(perf_counter() - start)
+
+        # Tracing slows everything down, so the memory is measured on a separate run
+        tracemalloc.start()
+        try:
+            analyze_notes(note_store.iter_notes(), start_date)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return [
+        Metric("analytics.sync", sync_time * 1000, "ms"),
+        Metric("analytics.analyze", min(analyze_times) * 1000, "ms"),
+        Metric("analytics.peak_memory", peak_memory / 2**20, "MiB"),
+    ]
+
+
+def run_benchmarks(
+    cycles: int = DEFAULT_CYCLES,
+    listing_count: int = DEFAULT_LISTINGS,
+    note_count: int = DEFAULT_NOTES,
+    seed: int = DEFAULT_SEED,
+) -> List[Metric]:
+    """Runs every benchmark on reproducible simulated datasets.
+
+    Args:
+        cycles (int): How many bot cycles to run.
+        listing_count (int): How many listings the strategy benchmark iterates over.
+        note_count (int): How many notes the analytics benchmark analyzes.
+        seed (int): Seeds the simulated datasets.
+
+    Returns:
+        List[Metric]: All the measurements.
+    """
+    # The bot and analytics log every purchase and result, which would swamp the report and skew the timings
+    logging.disable(logging.INFO)
+    try:
+        return (
+            bench_cycle(cycles, seed)
+            + bench_strategy(listing_count, seed)
+            + bench_analytics(note_count, seed)
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def save_baseline(metrics: Iterable[Metric], path: str):
+    """Stores the measurements to compare future runs against.
+
+    Args:
+        metrics (Iterable[Metric]): The measurements.
+        path (str): Where to write the baseline.
+    """
+    with open(path, "w") as baseline_file:
+        json.dump({m.name: m._asdict() for m in metrics}, baseline_file, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Metric]:
+    """Reads stored measurements.
+
+    Args:
+        path (str): Where the baseline was written.
+
+    Returns:
+        Dict[str, Metric]: The measurements by name.
+    """
+    with open(path) as baseline_file:
+        return {name: Metric(**m) for name, m in json.load(baseline_file).items()}
+
+
+def compare(
+    metrics: Iterable[Metric],
+    baseline: Dict[str, Metric],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """Finds the measurements that got worse than the baseline by more than the tolerance.
+
+    Args:
+        metrics (Iterable[Metric]): The new measurements.
+        baseline (Dict[str, Metric]): The measurements to compare against, by name. Measurements missing from the
+            baseline are skipped.
+        tolerance (float): How much worse a measurement can get, as a fraction of the baseline.
+
+    Returns:
+        List[str]: A description of each regression.
+    """
+    regressions = []
+    for metric in metrics:
+        expected = baseline.get(metric.name)
+        if expected is None or not expected.value:
+            continue
+        change = (metric.value - expected.value) / abs(expected.value)
+        if metric.higher_is_better:
+            change = -change
+        if change > tolerance:
+            regressions.append(
+                f"{metric.name}: {metric.value:.2f}{metric.unit} vs. {expected.value:.2f}{metric.unit} ({change:+.0%} worse)"
+            )
+
+    return regressions
+
+
+def _format(metrics: Iterable[Metric], baseline: Dict[str, Metric]) -> str:
+    lines = []
+    for metric in metrics:
+        line = f"{metric.name:32} {metric.value:12.2f} {metric.unit}"
+        if metric.name in baseline:
+            line += f" (baseline {baseline[metric.name].value:.2f})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry-point for the benchmark script.
+
+    Args:
+        argv (Optional[List[str]]): The command line arguments. Omit to use `sys.argv`.
+
+    Returns:
+        int: The exit code; `1` if any measurement regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the bot cycle, allocation strategies, and analytics against simulated data."
+    )
+    parser.add_argument("--cycles", type=int, default=DEFAULT_CYCLES)
+    parser.add_argument("--listings", type=int, default=DEFAULT_LISTINGS)
+    parser.add_argument("--notes", type=int, default=DEFAULT_NOTES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--baseline", help="Compare against the baseline at this path.")
+    parser.add_argument(
+        "--save-baseline", help="Store the results as a baseline at this path."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="How much worse than the baseline a measurement can get, as a fraction.",
+    )
+    args = parser.parse_args(argv)
+
+    metrics = run_benchmarks(args.cycles, args.listings, args.notes, args.seed)
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    print(_format(metrics, baseline))
+    if args.save_baseline:
+        save_baseline(metrics, args.save_baseline)
+
+    regressions = compare(metrics, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
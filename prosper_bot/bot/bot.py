@@ -1,23 +1,43 @@
+import asyncio
 import logging
+from contextlib import closing, nullcontext
 from datetime import timedelta
 from decimal import Decimal
 from time import sleep
-from typing import Union
+from typing import Iterator, List, Optional, Set, Tuple, Union
 
 import humanize
 import simplejson as json
 from prosper_api.client import Client
+from prosper_api.models import Account, Listing, Order
+from prosper_api.models.enums import BidResult
 from prosper_shared.omni_config import ConfigKey, config_schema
 from schema import Optional as SchemaOptional
 
-from prosper_bot.allocation_strategy import AllocationStrategies, set_search_param
+from prosper_bot.allocation_strategy import (
+    DEFAULT_MAX_CONCURRENT_SEARCHES,
+    DEFAULT_SEARCH_PARAMS,
+    AllocationState,
+    AllocationStrategies,
+    SearchParams,
+)
 from prosper_bot.analytics import analyze
 from prosper_bot.cli import (
     DRY_RUN_CONFIG,
+    PROFILE_CONFIG,
+    PROFILE_CYCLES_CONFIG,
+    PROFILE_DIR_CONFIG,
     SINGLE_RUN_CONFIG,
     VERBOSE_CONFIG,
     build_config,
 )
+from prosper_bot.client import BotClient
+from prosper_bot.latency import ListingLatencyTracker
+from prosper_bot.listing_index import SeenListingIndex
+from prosper_bot.metrics import MetricsExporters, MetricsRecorder
+from prosper_bot.profiler import CycleProfiler
+from prosper_bot.recording import RecordingClient, ReplayClient
+from prosper_bot.scheduler import CycleOutcome, PollScheduler, PollSchedulers
 from prosper_bot.util import round_down_to_nearest_cent
 
 logger = logging.getLogger(__file__)
@@ -30,9 +50,27 @@ MIN_BID_CONFIG = "prosper-bot.bot.min_bid"
 TARGET_LOAN_COUNT_CONFIG = "prosper-bot.bot.target-loan-count"
 STRATEGY_CONFIG = "prosper-bot.bot.strategy"
 SEARCH_FOR_ALMOST_FUNDED_CONFIG = "prosper-bot.bot.search-for-almost-funded"
+ASYNC_CONFIG = "prosper-bot.bot.async"
+MAX_ORDERS_PER_CYCLE_CONFIG = "prosper-bot.bot.max-orders-per-cycle"
+SEARCH_LIMIT_CONFIG = "prosper-bot.bot.search-limit"
+CONCURRENT_SEARCHES_CONFIG = "prosper-bot.bot.concurrent-searches"
+PREFETCH_DEPTH_CONFIG = "prosper-bot.bot.prefetch-depth"
+POLL_SCHEDULER_CONFIG = "prosper-bot.bot.poll-scheduler"
+METRICS_FILE_CONFIG = "prosper-bot.bot.metrics-file"
+METRICS_FORMAT_CONFIG = "prosper-bot.bot.metrics-format"
+API_RECORDING_CONFIG = "prosper-bot.bot.api-recording"
+API_REPLAY_CONFIG = "prosper-bot.bot.api-replay"
+ACCOUNTS_CONFIG = "prosper-bot.bot.accounts"
 
 POLL_TIME = timedelta(minutes=1)
 MIN_ALLOWED_BID = Decimal("25.00")
+MAX_SEARCH_LIMIT = 500
+_PLACED_BID_RESULTS = {
+    None,
+    BidResult.NONE,
+    BidResult.BID_SUCCEEDED,
+    BidResult.PARTIAL_BID_SUCCEEDED,
+}
 
 
 @config_schema
@@ -70,6 +108,79 @@ def _schema():
                         default=False,
                     )
                 ): bool,
+                SchemaOptional(
+                    ConfigKey(
+                        "async",
+                        "Use the asyncio engine, which overlaps the account and listing API calls within each cycle.",
+                        default=False,
+                    )
+                ): bool,
+                SchemaOptional(
+                    ConfigKey(
+                        "max-orders-per-cycle",
+                        "Maximum number of listings to bid on per cycle; available cash is split into min-bid sized bids that are submitted as a single order.",
+                        default=1,
+                    )
+                ): int,
+                SchemaOptional(
+                    ConfigKey(
+                        "search-limit",
+                        "Number of listings to fetch per search request, from 1 to 500; larger pages give the strategy more candidates per request.",
+                        default=DEFAULT_SEARCH_PARAMS.limit,
+                    )
+                ): int,
+                SchemaOptional(
+                    ConfigKey(
+                        "concurrent-searches",
+                        "How many of a strategy's searches to run at once; a single bid still stops at the first search with listings.",
+                        default=DEFAULT_MAX_CONCURRENT_SEARCHES,
+                    )
+                ): int,
+                SchemaOptional(
+                    ConfigKey(
+                        "prefetch-depth",
+                        "How many of a strategy's upcoming searches to run in the background while the current results are considered; 0 disables prefetching.",
+                        default=0,
+                    )
+                ): int,
+                SchemaOptional(
+                    ConfigKey(
+                        "poll-scheduler",
+                        f"How to pace polling; one of {', '.join(s.name for s in PollSchedulers)}. FIXED polls once a minute; ADAPTIVE learns when listings are released, polls aggressively around those times, and backs off otherwise.",
+                        default=PollSchedulers.FIXED.name,
+                    )
+                ): str,
+                SchemaOptional(
+                    ConfigKey(
+                        "metrics-file",
+                        "Write timings of each phase of the bot cycle, and API call and error counts, to this file after every cycle.",
+                    )
+                ): str,
+                SchemaOptional(
+                    ConfigKey(
+                        "metrics-format",
+                        f"The format of the metrics file; one of {', '.join(e.name for e in MetricsExporters)}. PROMETHEUS replaces the file with the latest rolling percentiles and totals, for the node exporter's textfile collector; JSON_LINES appends the timings of each cycle.",
+                        default=MetricsExporters.PROMETHEUS.name,
+                    )
+                ): str,
+                SchemaOptional(
+                    ConfigKey(
+                        "api-recording",
+                        "Append every Prosper API request and response to this file, for replaying with api-replay.",
+                    )
+                ): str,
+                SchemaOptional(
+                    ConfigKey(
+                        "api-replay",
+                        "Serve the Prosper API responses from a file written by api-recording instead of calling Prosper.",
+                    )
+                ): str,
+                SchemaOptional(
+                    ConfigKey(
+                        "accounts",
+                        "Trade several accounts from a single process. A comma-separated list of config files, one per account, holding the settings that differ from this config, like the credentials; the file names are the account names. The async engine isn't used with multiple accounts.",
+                    )
+                ): str,
             }
         }
     }
@@ -80,8 +191,19 @@ class Bot:
 
     strategy: AllocationStrategies
 
-    def __init__(self, config=None):
-        """Initializes the bot with the given argument values."""
+    def __init__(
+        self,
+        config=None,
+        client: Optional[Client] = None,
+        scheduler: Optional[PollScheduler] = None,
+    ):
+        """Initializes the bot with the given argument values.
+
+        Args:
+            config (Optional[Config]): The bot config. Omit to build it from the command line and config files.
+            client (Optional[Client]): The Prosper API client to trade with. Omit to create one from the config.
+            scheduler (Optional[PollScheduler]): Paces the polling. Omit to create the one in the config.
+        """
         if config is None:
             config = build_config()
         self.config = config
@@ -90,12 +212,76 @@ class Bot:
             logger.setLevel(logging.DEBUG)
         self.single_run = self.config.get_as_bool(SINGLE_RUN_CONFIG)
 
-        self.client = Client(config=self.config)
+        metrics_file = self.config.get_as_str(METRICS_FILE_CONFIG)
+        self.metrics = MetricsRecorder(
+            MetricsExporters[
+                self.config.get_as_str(
+                    METRICS_FORMAT_CONFIG, MetricsExporters.PROMETHEUS.name
+                )
+            ].to_exporter(metrics_file)
+            if metrics_file
+            else None
+        )
+        self.profiler = (
+            CycleProfiler(
+                self.config.get_as_str(PROFILE_DIR_CONFIG, "profiles"),
+                int(self.config.get(PROFILE_CYCLES_CONFIG) or 10),
+            )
+            if self.config.get_as_bool(PROFILE_CONFIG)
+            else None
+        )
+        if client is None:
+            replay_file = self.config.get_as_str(API_REPLAY_CONFIG)
+            client = (
+                ReplayClient(replay_file, self.config)
+                if replay_file
+                else Client(config=self.config)
+            )
+        recording_file = self.config.get_as_str(API_RECORDING_CONFIG)
+        if recording_file:
+            client = RecordingClient(client, recording_file)
+        self.client = BotClient(client, metrics=self.metrics)
         self.dry_run = self.config.get_as_bool(DRY_RUN_CONFIG)
         self.min_bid = self.config.get_as_decimal(MIN_BID_CONFIG, Decimal(25.00))
         self.target_loan_count = self.config.get(TARGET_LOAN_COUNT_CONFIG)
         self.strategy = self.config.get_as_enum(STRATEGY_CONFIG, AllocationStrategies)
         self.analytics = self.config.get_as_bool("prosper-bot.bot.analytics")
+        self.max_orders_per_cycle = max(
+            int(self.config.get(MAX_ORDERS_PER_CYCLE_CONFIG) or 1), 1
+        )
+        self.max_concurrent_searches = max(
+            int(
+                self.config.get(CONCURRENT_SEARCHES_CONFIG)
+                or DEFAULT_MAX_CONCURRENT_SEARCHES
+            ),
+            1,
+        )
+        self.prefetch_depth = max(int(self.config.get(PREFETCH_DEPTH_CONFIG) or 0), 0)
+        self.scheduler = (
+            scheduler
+            if scheduler is not None
+            else PollSchedulers[
+                self.config.get_as_str(POLL_SCHEDULER_CONFIG, PollSchedulers.FIXED.name)
+            ].to_scheduler(POLL_TIME)
+        )
+        self.client.add_search_listener(self.scheduler.observe_listings)
+        self.latency = ListingLatencyTracker(self.metrics)
+        self.client.add_search_listener(self.latency.observe_listings)
+        self.seen_listings = SeenListingIndex()
+        self.allocation_state = AllocationState()
+        # Prosper rejects pages larger than the max
+        self.search_params = DEFAULT_SEARCH_PARAMS._replace(
+            limit=min(
+                max(
+                    int(
+                        self.config.get(SEARCH_LIMIT_CONFIG)
+                        or DEFAULT_SEARCH_PARAMS.limit
+                    ),
+                    1,
+                ),
+                MAX_SEARCH_LIMIT,
+            )
+        )
 
     def run(self):
         """Main loop for the trading bot."""
@@ -105,22 +291,44 @@ class Bot:
         if self.analytics:
             analyze(self.client)
 
-        while True:
-            try:
-                cash, sleep_time_delta = self._do_run(cash)
-            except KeyboardInterrupt:
-                logger.info("Interrupted...")
-                break
-            except Exception as e:
-                logger.warning(
-                    f"Caught exception running bot loop: {e}. Continuing after {humanize.naturaldelta(sleep_time_delta)}..."
-                )
-                logger.debug("", exc_info=e)
+        try:
+            while True:
+                try:
+                    cash, sleep_time_delta = self._run_cycle(cash, sleep_time_delta)
+                except KeyboardInterrupt:
+                    logger.info("Interrupted...")
+                    break
+
+                if self._is_done(cash):
+                    break
+
+                sleep(sleep_time_delta.total_seconds())
+        finally:
+            self._flush_profile()
+            self.latency.report()
+
+    def _run_cycle(self, cash, sleep_time_delta: timedelta):
+        # Errors are logged rather than raised so the loop keeps going; the cash and poll time carry over
+        try:
+            with self._profile_cycle(), self.metrics.cycle():
+                return self._do_run(cash)
+        except Exception as e:
+            logger.warning(
+                f"Caught exception running bot loop: {e}. Continuing after {humanize.naturaldelta(sleep_time_delta)}..."
+            )
+            logger.debug("", exc_info=e)
+            return cash, sleep_time_delta
 
-            if (not cash or Decimal(cash) < self.min_bid) and self.single_run:
-                break
+    def _is_done(self, cash) -> bool:
+        return (not cash or Decimal(cash) < self.min_bid) and self.single_run
+
+    def _profile_cycle(self):
+        return self.profiler.cycle() if self.profiler else nullcontext()
 
-            sleep(sleep_time_delta.total_seconds())
+    def _flush_profile(self):
+        # Write the profile of the cycles since the last one, so a short run or an interrupted one still leaves a profile
+        if self.profiler:
+            self.profiler.flush()
 
     def _do_run(self, previous_cash):
         account = self.client.get_account_info()
@@ -129,50 +337,144 @@ class Bot:
         cash = account.available_cash_balance
 
         if previous_cash == cash:
-            return cash, POLL_TIME
+            return cash, self.scheduler.next_poll(CycleOutcome.IDLE)
+
+        invest_amounts, search_params = self._get_invest_amounts(account)
+
+        with self.metrics.span("strategy"):
+            allocation_strategy = self.strategy.to_strategy(
+                self.client,
+                account,
+                self.seen_listings,
+                max_concurrent_searches=self.max_concurrent_searches,
+                prefetch_depth=self.prefetch_depth,
+                bid_amounts=invest_amounts or None,
+                allocation_state=self.allocation_state,
+                search_params=search_params,
+            )
+        # Closing the strategy stops the searches it has in flight rather than leaving them to the garbage collector
+        with closing(allocation_strategy):
+            if invest_amounts or self.dry_run:
+                with self.metrics.span("listings"):
+                    listings = self.take_listings(
+                        allocation_strategy, len(invest_amounts) or 1
+                    )
+                if not listings:
+                    logger.debug("No matching listings found.")
+                    return cash, self.scheduler.next_poll(CycleOutcome.NO_LISTINGS)
+
+                self.metrics.record_since_cycle_start("decision")
+                self._place_orders(list(zip(listings, invest_amounts or [0])))
+
+                sleep_time_delta = self.scheduler.next_poll(CycleOutcome.INVESTED)
+            else:
+                sleep_time_delta = self._idle_poll_time()
+
+        return cash, sleep_time_delta
 
-        invest_amount = self._get_bid_amount(
-            cash, self.min_bid, account.total_account_value, self.target_loan_count
+    def _get_invest_amounts(
+        self, account: Account
+    ) -> Tuple[List[Decimal], SearchParams]:
+        # Returns the amounts to bid and the search params for this cycle, which only look for almost-funded listings
+        # when that's what makes a bid possible
+        cash = account.available_cash_balance
+        invest_amounts = self.get_bid_amounts(
+            cash,
+            self.min_bid,
+            account.total_account_value,
+            self.target_loan_count,
+            self.max_orders_per_cycle,
         )
         search_for_almost_funded = self.config.get_as_bool(
             SEARCH_FOR_ALMOST_FUNDED_CONFIG
         )
-        if not invest_amount and search_for_almost_funded:
-            set_search_param("amount_remaining_max", cash)
-            invest_amount = cash
+        if not invest_amounts and search_for_almost_funded:
+            return [cash], self.search_params._replace(amount_remaining_max=cash)
+
+        return invest_amounts, self.search_params
 
-        allocation_strategy = self.strategy.to_strategy(self.client)
-        if invest_amount or self.dry_run:
+    @staticmethod
+    def take_listings(
+        allocation_strategy: Iterator[Listing], count: int
+    ) -> List[Listing]:
+        """Takes up to the given number of listings from an allocation strategy.
+
+        Args:
+            allocation_strategy (Iterator[Listing]): The strategy to draw listings from.
+            count (int): The most listings to take.
+
+        Returns:
+            List[Listing]: The listings, fewer than `count` if the strategy runs out.
+        """
+        listings = []
+        for _ in range(count):
             try:
-                listing = next(allocation_strategy)
+                listings.append(next(allocation_strategy))
             except StopIteration:
-                logger.debug("No matching listings found.")
-                return cash, POLL_TIME
+                break
+        return listings
 
-            lender_yield = listing.lender_yield
-            listing_number = listing.listing_number
+    def _place_orders(self, bids: List[Tuple[Listing, Decimal]]):
+        with self.metrics.span("orders"):
+            self._do_place_orders(bids)
 
-            if self.dry_run:
+    def _do_place_orders(self, bids: List[Tuple[Listing, Decimal]]):
+        if self.dry_run:
+            for listing, invest_amount in bids:
                 logger.info(
-                    f"DRYRUN: Would have purchased ${invest_amount:5.2f} of listing {listing_number} ({listing.prosper_rating}) at {lender_yield * 100:5.2f}% for {listing.listing_term} months"
+                    f"DRYRUN: Would have purchased ${invest_amount:5.2f} of listing {listing.listing_number} ({listing.prosper_rating}) at {listing.lender_yield * 100:5.2f}% for {listing.listing_term} months"
                 )
+            return
+
+        ordered_at = self.latency.now()
+        order_result = None
+        try:
+            if len(bids) == 1:
+                order_result = self.client.order(bids[0][0].listing_number, bids[0][1])
             else:
-                order_result = self.client.order(listing_number, invest_amount)
-                logging.info(
-                    f"Purchased ${invest_amount:5.2f} of {listing_number} ({listing.prosper_rating}) at {lender_yield * 100:5.2f}% for {listing.listing_term} months"
+                order_result = self.client.order_batch(
+                    [(listing.listing_number, amount) for listing, amount in bids]
                 )
-                logging.debug(json.dumps(order_result, indent=2, default=str))
+        finally:
+            self.latency.record_order(
+                [listing.listing_number for listing, _ in bids],
+                ordered_at,
+                order_result,
+            )
 
-            # Set the sleep time here in case of no matching listings being found (highly unlikely).
-            sleep_time_delta = timedelta(seconds=5)
-        else:
-            sleep_time_delta = POLL_TIME
-            if not self.single_run:
-                logger.info(
-                    f"Starting polling once {humanize.naturaldelta(POLL_TIME)}..."
-                )
+        placed_bids = self._placed_bids(bids, order_result)
+        self.allocation_state.apply_order(placed_bids)
+        for listing, invest_amount in placed_bids:
+            self.seen_listings.mark_invested(listing.listing_number)
+            logging.info(
+                f"Purchased ${invest_amount:5.2f} of {listing.listing_number} ({listing.prosper_rating}) at {listing.lender_yield * 100:5.2f}% for {listing.listing_term} months"
+            )
+        logging.debug(json.dumps(order_result, indent=2, default=str))
 
-        return cash, sleep_time_delta
+    @staticmethod
+    def _placed_bids(
+        bids: List[Tuple[Listing, Decimal]], order_result: Order
+    ) -> List[Tuple[Listing, Decimal]]:
+        # Bids Prosper hasn't processed yet count as placed; failed ones leave their listings open for later cycles
+        results = {bid.listing_id: bid for bid in order_result.bid_requests}
+        placed_bids = []
+        for listing, invest_amount in bids:
+            bid = results.get(listing.listing_number)
+            if bid is None or bid.bid_result not in _PLACED_BID_RESULTS:
+                logger.warning(
+                    f"Bid on {listing.listing_number} failed: {bid.bid_result.name if bid else 'missing from the order'}"
+                )
+                continue
+            placed_bids.append((listing, invest_amount))
+        return placed_bids
+
+    def _idle_poll_time(self) -> timedelta:
+        sleep_time_delta = self.scheduler.next_poll(CycleOutcome.IDLE)
+        if not self.single_run:
+            logger.info(
+                f"Starting polling once {humanize.naturaldelta(sleep_time_delta)}..."
+            )
+        return sleep_time_delta
 
     @staticmethod
     def _get_bid_amount(
@@ -181,11 +483,7 @@ class Bot:
         total_account_value,
         target_loan_count: Union[int, None],
     ):
-        if target_loan_count is not None:
-            min_bid = max(
-                round_down_to_nearest_cent(total_account_value / target_loan_count),
-                MIN_ALLOWED_BID,
-            )
+        min_bid = Bot._get_min_bid(min_bid, total_account_value, target_loan_count)
 
         logger.debug(f"Using ${min_bid} for min bid size")
 
@@ -193,11 +491,276 @@ class Bot:
             return 0
         return round_down_to_nearest_cent(min_bid + cash % min_bid)
 
+    @staticmethod
+    def get_bid_amounts(
+        cash: Decimal,
+        min_bid: Decimal,
+        total_account_value,
+        target_loan_count: Union[int, None],
+        max_orders: int,
+    ) -> List[Decimal]:
+        """Splits the available cash into the bids to place in one cycle.
+
+        Args:
+            cash (Decimal): The cash available to invest.
+            min_bid (Decimal): The smallest bid to place.
+            total_account_value: The value of the whole account, which sizes the bids when targeting a loan count.
+            target_loan_count (Union[int, None]): How many loans the account should be spread across, if any.
+            max_orders (int): The most bids to place.
+
+        Returns:
+            List[Decimal]: The bid amounts, or an empty list if there isn't enough cash to bid.
+        """
+        first_bid = Bot._get_bid_amount(
+            cash, min_bid, total_account_value, target_loan_count
+        )
+        if not first_bid:
+            return []
+
+        # The first bid absorbs the remainder, so what's left is a whole number of min bids
+        min_bid = Bot._get_min_bid(min_bid, total_account_value, target_loan_count)
+        remaining_bids = min(int((cash - first_bid) // min_bid), max_orders - 1)
+        return [first_bid] + [round_down_to_nearest_cent(min_bid)] * remaining_bids
+
+    @staticmethod
+    def _get_min_bid(
+        min_bid: Decimal,
+        total_account_value,
+        target_loan_count: Union[int, None],
+    ) -> Decimal:
+        if target_loan_count is not None:
+            return max(
+                round_down_to_nearest_cent(total_account_value / target_loan_count),
+                MIN_ALLOWED_BID,
+            )
+        return min_bid
+
+
+class AsyncBot(Bot):
+    """Prosper trading bot that runs each cycle on an asyncio event loop.
+
+    The blocking client calls are dispatched to worker threads so the account fetch overlaps the listing search, and
+    orders are placed in the background while the loop moves on to the next cycle. In-flight orders are always
+    settled before the next account snapshot is taken, so the bot never bids the same cash twice. Likewise, a
+    speculative search is always finished before the cycle ends or another search starts, even when its listings go
+    unused.
+    """
+
+    def __init__(
+        self,
+        config=None,
+        client: Optional[Client] = None,
+        scheduler: Optional[PollScheduler] = None,
+    ):
+        """Initializes the bot with the given argument values.
+
+        Args:
+            config (Optional[Config]): The bot config. Omit to build it from the command line and config files.
+            client (Optional[Client]): The Prosper API client to trade with. Omit to create one from the config.
+            scheduler (Optional[PollScheduler]): Paces the polling. Omit to create the one in the config.
+        """
+        super().__init__(config, client, scheduler)
+        self._pending_orders: Set[asyncio.Task] = set()
+        # Speculatively search for listings alongside the account fetch only while there is cash to deploy; this
+        # avoids wasting search calls while idle-polling.
+        self._speculate = True
+        # The bids planned by the last cycle, which the speculative search plans for since the account isn't known yet;
+        # until a cycle plans a batch, it takes listings one at a time
+        self._planned_amounts: Optional[List[Decimal]] = None
+
+    def run(self):
+        """Main loop for the trading bot."""
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        """Main loop for the trading bot, as a coroutine."""
+        sleep_time_delta = POLL_TIME
+        cash = None
+
+        if self.analytics:
+            await asyncio.to_thread(analyze, self.client)
+
+        try:
+            while True:
+                try:
+                    with self._profile_cycle(), self.metrics.cycle():
+                        cash, sleep_time_delta = await self._do_run_async(cash)
+                except KeyboardInterrupt:
+                    logger.info("Interrupted...")
+                    break
+                except Exception as e:
+                    logger.warning(
+                        f"Caught exception running bot loop: {e}. Continuing after {humanize.naturaldelta(sleep_time_delta)}..."
+                    )
+                    logger.debug("", exc_info=e)
+
+                if self._is_done(cash):
+                    break
+
+                await asyncio.sleep(sleep_time_delta.total_seconds())
+        finally:
+            self._flush_profile()
+
+        await self._settle_orders()
+        self.latency.report()
+
+    async def _do_run_async(self, previous_cash):
+        await self._settle_orders()
+
+        account_task = asyncio.create_task(
+            asyncio.to_thread(self.client.get_account_info)
+        )
+        planned_amounts = self._planned_amounts
+        listings_task = (
+            asyncio.create_task(
+                asyncio.to_thread(
+                    self._next_listings,
+                    (
+                        len(planned_amounts)
+                        if planned_amounts
+                        else self.max_orders_per_cycle
+                    ),
+                    None,
+                    planned_amounts,
+                )
+            )
+            if self._speculate
+            else None
+        )
+
+        try:
+            return await self._run_with_speculation(
+                previous_cash, account_task, listings_task, planned_amounts
+            )
+        finally:
+            # Worker threads can't be cancelled, so a speculative search that's still running is waited for before
+            # anything else updates the seen listings and the allocation it shares
+            await self._discard(listings_task)
+
+    async def _run_with_speculation(
+        self,
+        previous_cash,
+        account_task: asyncio.Task,
+        listings_task: Optional[asyncio.Task],
+        planned_amounts: Optional[List[Decimal]],
+    ):
+        account = await account_task
+        logger.debug(json.dumps(account, indent=2, default=str))
+
+        cash = account.available_cash_balance
+
+        if previous_cash == cash:
+            self._speculate = False
+            return cash, self.scheduler.next_poll(CycleOutcome.IDLE)
+
+        invest_amounts, search_params = self._get_invest_amounts(account)
+        self._speculate = bool(invest_amounts) or self.dry_run
+        if not self._speculate:
+            return cash, self._idle_poll_time()
+
+        invest_amounts = invest_amounts or [0]
+        self._planned_amounts = invest_amounts
+        if (
+            listings_task is None
+            or search_params != self.search_params
+            or not self._plans_match(planned_amounts, invest_amounts)
+        ):
+            # The speculative search didn't happen, or used other search params or bids
+            await self._discard(listings_task)
+            listings = await asyncio.to_thread(
+                self._next_listings,
+                len(invest_amounts),
+                account,
+                invest_amounts,
+                search_params,
+            )
+        else:
+            listings = await listings_task
+
+        if not listings:
+            logger.debug("No matching listings found.")
+            return cash, self.scheduler.next_poll(CycleOutcome.NO_LISTINGS)
+
+        self.metrics.record_since_cycle_start("decision")
+        order_task = asyncio.create_task(
+            self._place_orders_async(list(zip(listings, invest_amounts)))
+        )
+        self._pending_orders.add(order_task)
+        order_task.add_done_callback(self._pending_orders.discard)
+
+        return cash, self.scheduler.next_poll(CycleOutcome.INVESTED)
+
+    @staticmethod
+    def _plans_match(
+        planned_amounts: Optional[List[Decimal]], invest_amounts: List[Decimal]
+    ) -> bool:
+        # Strategies only plan batches, so a single bid can use any speculative search that didn't plan one
+        if len(invest_amounts) == 1:
+            return planned_amounts is None or len(planned_amounts) == 1
+        return planned_amounts == invest_amounts
+
+    @staticmethod
+    async def _discard(task: Optional[asyncio.Task]):
+        # Waits for the task and drops its result; a failure only matters when the result is used
+        if task is not None:
+            try:
+                await task
+            except Exception as e:
+                logger.debug("Discarded speculative search failed", exc_info=e)
+
+    def _next_listings(
+        self,
+        count: int,
+        account: Optional[Account] = None,
+        bid_amounts: Optional[List[Decimal]] = None,
+        search_params: Optional[SearchParams] = None,
+    ) -> List[Listing]:
+        # Without an account, the strategy shares the account fetch that's in flight on the client; without the bid
+        # amounts, it can't plan the batch
+        with self.metrics.span("strategy"):
+            allocation_strategy = self.strategy.to_strategy(
+                self.client,
+                account,
+                self.seen_listings,
+                max_concurrent_searches=self.max_concurrent_searches,
+                prefetch_depth=self.prefetch_depth,
+                bid_amounts=bid_amounts,
+                allocation_state=self.allocation_state,
+                search_params=(
+                    self.search_params if search_params is None else search_params
+                ),
+            )
+        with self.metrics.span("listings"), closing(allocation_strategy):
+            return self.take_listings(allocation_strategy, count)
+
+    async def _place_orders_async(self, bids: List[Tuple[Listing, Decimal]]):
+        try:
+            await asyncio.to_thread(self._place_orders, bids)
+        except Exception as e:
+            listing_numbers = ", ".join(
+                str(listing.listing_number) for listing, _ in bids
+            )
+            logger.warning(f"Failed to place order for {listing_numbers}: {e}")
+            logger.debug("", exc_info=e)
+
+    async def _settle_orders(self):
+        if self._pending_orders:
+            await asyncio.gather(*self._pending_orders)
+
 
 def runner():
     """Entry-point for Python script."""
-    Bot().run()
+    config = build_config()
+    if config.get_as_str(ACCOUNTS_CONFIG):
+        # The accounts runner builds on the bot, so it can only be imported once this module has loaded
+        from prosper_bot.accounts import MultiAccountRunner  # fmt: skip
+
+        MultiAccountRunner.from_config(config).run()
+        return
+
+    bot_class = AsyncBot if config.get_as_bool(ASYNC_CONFIG) else Bot
+    bot_class(config).run()
 
 
 if __name__ == "__main__":
-    Bot().run()
+    runner()
@@ -3,6 +3,9 @@ from prosper_shared.omni_config import Config, ConfigKey, input_schema
 DRY_RUN_CONFIG = "prosper-bot.cli.dry-run"
 VERBOSE_CONFIG = "prosper-bot.cli.verbose"
 SINGLE_RUN_CONFIG = "prosper-bot.cli.single-run"
+PROFILE_CONFIG = "prosper-bot.cli.profile"
+PROFILE_DIR_CONFIG = "prosper-bot.cli.profile-dir"
+PROFILE_CYCLES_CONFIG = "prosper-bot.cli.profile-cycles"
 APP_NAME = "prosper-bot"
 
 
@@ -24,6 +27,21 @@ def _schema():
                     "Runs the loop only once, or until cash is exhausted",
                     default=False,
                 ): bool,
+                ConfigKey(
+                    "profile",
+                    "Profile the loop with cProfile, writing a profile and a summary of the functions with the highest cumulative time to profile-dir every profile-cycles cycles.",
+                    default=False,
+                ): bool,
+                ConfigKey(
+                    "profile-dir",
+                    "Where to write the profiles.",
+                    default="profiles",
+                ): str,
+                ConfigKey(
+                    "profile-cycles",
+                    "How many cycles each profile covers.",
+                    default=10,
+                ): int,
             }
         }
     }
@@ -0,0 +1,305 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from logging import getLogger
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+from prosper_api import client as prosper_api_client
+from prosper_api.auth_token_manager import AuthTokenManager
+from prosper_api.client import Client
+from prosper_api.models import (
+    Account,
+    Listing,
+    ListNotesRequest,
+    ListNotesResponse,
+    Note,
+    Order,
+    SearchListingsRequest,
+    SearchListingsResponse,
+)
+from prosper_shared.omni_config import Config
+
+from prosper_bot.metrics import MetricsRecorder
+
+__all__ = ["BotClient", "PooledClient", "iter_note_pages", "iter_notes"]
+
+logger = getLogger(__file__)
+
+DEFAULT_ACCOUNT_TTL = timedelta(seconds=5)
+DEFAULT_NOTES_PAGE_SIZE = 100
+DEFAULT_MAX_CONCURRENT_NOTE_REQUESTS = 4
+
+
+def _post_order(client: Client, bid_requests: List[Dict[str, Any]]) -> str:
+    # The only use of the Prosper API client's internals: `Client.order` takes a single listing, so batches are posted
+    # to the orders API with the client's own request method, which keeps its auth, logging, and rate limits
+    return client._do_post(client._ORDERS_API_URL, {"bid_requests": bid_requests})
+
+
+class BotClient:
+    """Wraps the Prosper API client with the behavior shared by the bot, its strategies, and analytics.
+
+    The account info is cached for a short time so every caller within a cycle works off of the same snapshot instead
+    of fetching it again. Concurrent callers wait on the same in-flight fetch, and placing an order invalidates the
+    cached snapshot. The account, search, and order calls are counted and timed. Everything else is passed through to
+    the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        account_ttl: timedelta = DEFAULT_ACCOUNT_TTL,
+        metrics: Optional[MetricsRecorder] = None,
+    ):
+        """Creates a new bot client.
+
+        Args:
+            client (Client): The Prosper API client to wrap.
+            account_ttl (timedelta): How long a fetched account snapshot can be reused.
+            metrics (Optional[MetricsRecorder]): Records the API calls. Omit to record them on a recorder of its own.
+        """
+        self._client = client
+        self._account_ttl = account_ttl
+        self.metrics = metrics if metrics is not None else MetricsRecorder()
+        self._account: Optional[Account] = None
+        self._account_expiry: Optional[datetime] = None
+        self._account_lock = Lock()
+        self._search_listeners: List[Callable[[List[Listing]], None]] = []
+
+    def get_account_info(self) -> Account:
+        """Gets the account snapshot, fetching it if the cached one is missing or expired.
+
+        Returns:
+            Account: The current information about the account.
+        """
+        with self._account_lock:
+            if self._account is None or datetime.now() >= self._account_expiry:
+                with self.metrics.api_call("get_account_info"):
+                    self._account = self._client.get_account_info()
+                self._account_expiry = datetime.now() + self._account_ttl
+            else:
+                logger.debug("Using cached account info")
+            return self._account
+
+    def add_search_listener(self, listener: Callable[[List[Listing]], None]):
+        """Registers a callback that receives the listings returned by every search.
+
+        Args:
+            listener (Callable[[List[Listing]], None]): Called with the listings of each search response. It may be
+                called from worker threads; failures are logged and otherwise ignored.
+        """
+        self._search_listeners.append(listener)
+
+    def search_listings(self, request: SearchListingsRequest) -> SearchListingsResponse:
+        """Search listings and notify the search listeners of the results.
+
+        Args:
+            request (SearchListingsRequest): The search request.
+
+        Returns:
+            SearchListingsResponse: The listings matching the request.
+        """
+        with self.metrics.api_call("search_listings"):
+            response = self._client.search_listings(request)
+        for listener in self._search_listeners:
+            try:
+                listener(response.result)
+            except Exception as e:
+                logger.warning(f"Search listener {listener} failed: {e}")
+
+        return response
+
+    def invalidate_account_info(self):
+        """Drops the cached account snapshot so the next call fetches a fresh one."""
+        with self._account_lock:
+            self._account = None
+
+    def order(self, listing_id: int, amount: Union[float, Decimal]) -> Order:
+        """Execute an order for a given listing and amount.
+
+        Args:
+            listing_id (int): Identifies the listing to make an order against.
+            amount (Union[float, Decimal]): The amount to bid for the order.
+
+        Returns:
+            Order: The in-progress order.
+        """
+        try:
+            with self.metrics.api_call("order"):
+                return self._client.order(listing_id, amount)
+        finally:
+            self.invalidate_account_info()
+
+    def order_batch(self, bids: List[Tuple[int, Union[float, Decimal]]]) -> Order:
+        """Execute a single order bidding on several listings.
+
+        `Client.order` only takes a single listing, but the orders API accepts any number of bids per request.
+
+        Args:
+            bids (List[Tuple[int, Union[float, Decimal]]]): The listing ids and the amounts to bid on each.
+
+        Returns:
+            Order: The in-progress order.
+        """
+        try:
+            with self.metrics.api_call("order"):
+                resp = _post_order(
+                    self._client,
+                    [
+                        {"listing_id": listing_id, "bid_amount": amount}
+                        for listing_id, amount in bids
+                    ],
+                )
+            return Order.model_validate_json(resp)
+        finally:
+            self.invalidate_account_info()
+
+    def __getattr__(self, name):
+        """Passes everything else through to the wrapped client."""
+        return getattr(self._client, name)
+
+
+# The Prosper API client sends every request through `requests.request`, which opens a new connection each time. Pooled
+# clients route that one call through their session, so the rest of the request path, and its rate limits, stay the
+# client's own.
+_SESSION: ContextVar[Optional[requests.Session]] = ContextVar("_SESSION", default=None)
+
+
+class _SessionRouter:
+    """Stands in for the `requests` module in the Prosper API client, sending requests through the current session."""
+
+    def request(self, *args, **kwargs) -> requests.Response:
+        """Sends a request through the session of the pooled client making it, or on its own otherwise."""
+        session = _SESSION.get()
+        return (session if session is not None else requests).request(*args, **kwargs)
+
+    def __getattr__(self, name):
+        """Passes everything else through to the `requests` module."""
+        return getattr(requests, name)
+
+
+class PooledClient(Client):
+    """Prosper API client that sends its requests through a `requests.Session`.
+
+    The session keeps connections to Prosper alive between requests, instead of opening a new one for every call, and
+    can be shared by the clients of several accounts so they all draw on the same connection pool.
+    """
+
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        session: Optional[requests.Session] = None,
+        auth_token_manager: Optional[AuthTokenManager] = None,
+    ):
+        """Creates a new pooled client.
+
+        Args:
+            config (Optional[Config]): The config to use.
+            session (Optional[requests.Session]): The session to send requests through. Omit to use one of its own.
+            auth_token_manager (Optional[AuthTokenManager]): A pre-configured auth token manager. Omit to use the
+                default one.
+        """
+        super().__init__(config, auth_token_manager)
+        self._session = session if session is not None else requests.Session()
+        if not isinstance(prosper_api_client.requests, _SessionRouter):
+            prosper_api_client.requests = _SessionRouter()
+
+    def _do_request(self, *args, **kwargs) -> str:
+        token = _SESSION.set(self._session)
+        try:
+            return super()._do_request(*args, **kwargs)
+        finally:
+            _SESSION.reset(token)
+
+
+def iter_note_pages(
+    client: Client,
+    request: Optional[ListNotesRequest] = None,
+    max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_NOTE_REQUESTS,
+) -> Iterator[List[Note]]:
+    """Pages through the notes in the account, fetching upcoming pages concurrently.
+
+    The first page is fetched on its own to learn the total number of notes. After that, up to
+    `max_concurrent_requests` pages are in flight at once, and the pages are yielded in order. Pages still in flight
+    when the caller stops iterating are cancelled, so stopping early wastes at most `max_concurrent_requests - 1`
+    requests.
+
+    Args:
+        client (Client): The Prosper API client.
+        request (Optional[ListNotesRequest]): The sort order, first offset, and page size. Omit to list all the notes,
+            100 at a time.
+        max_concurrent_requests (int): How many pages to fetch at once. Values below 1 fetch one page at a time.
+
+    Yields:
+        List[Note]: Each page of notes.
+    """
+    max_concurrent_requests = max(max_concurrent_requests, 1)
+    if request is None:
+        request = ListNotesRequest()
+    request = request.model_copy(
+        update={
+            "offset": request.offset or 0,
+            "limit": request.limit or DEFAULT_NOTES_PAGE_SIZE,
+        }
+    )
+
+    first_page = client.list_notes(request)
+    yield first_page.result
+    if len(first_page.result) < request.limit:
+        return
+
+    offsets = iter(
+        range(
+            request.offset + request.limit,
+            request.offset + first_page.total_count,
+            request.limit,
+        )
+    )
+    with ThreadPoolExecutor(max_concurrent_requests) as executor:
+        pending_pages: Deque[Future[ListNotesResponse]] = deque()
+
+        def submit_pages(count: int):
+            for offset in islice(offsets, count):
+                pending_pages.append(
+                    executor.submit(
+                        client.list_notes,
+                        request.model_copy(update={"offset": offset}),
+                    )
+                )
+
+        submit_pages(max_concurrent_requests)
+        try:
+            while pending_pages:
+                page = pending_pages.popleft().result().result
+                yield page
+                if len(page) < request.limit:
+                    return
+                submit_pages(1)
+        finally:
+            for pending_page in pending_pages:
+                pending_page.cancel()
+
+
+def iter_notes(
+    client: Client,
+    request: Optional[ListNotesRequest] = None,
+    max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_NOTE_REQUESTS,
+) -> Iterator[Note]:
+    """Iterates over the notes in the account, fetching upcoming pages concurrently.
+
+    Args:
+        client (Client): The Prosper API client.
+        request (Optional[ListNotesRequest]): The sort order, first offset, and page size. Omit to list all the notes,
+            100 at a time.
+        max_concurrent_requests (int): How many pages to fetch at once.
+
+    Yields:
+        Note: Each note, in the requested order.
+    """
+    for page in iter_note_pages(client, request, max_concurrent_requests):
+        yield from page
@@ -0,0 +1,243 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from threading import Lock
+from typing import Callable, Deque, Iterable, List, NamedTuple, Optional, Tuple
+
+from prosper_api.models import Listing, Order
+from prosper_api.models.enums import BidResult
+
+from prosper_bot.metrics import MetricsRecorder
+from prosper_bot.scheduler import LISTING_START_DATE_FORMAT
+from prosper_bot.util import bucketize, print_histogram
+
+__all__ = ["ListingLatencyTracker", "OrderSample"]
+
+logger = getLogger(__file__)
+
+DEFAULT_MAX_LISTINGS = 10000
+DEFAULT_WINDOW = 1000
+# Bid results that mean the listing was funded by other lenders before the bid landed
+FUNDED_RESULTS = {
+    BidResult.LISTING_NOT_BIDDABLE.name,
+    BidResult.AMOUNT_BID_TOO_HIGH.name,
+}
+PENDING_RESULT = "PENDING"
+ERROR_RESULT = "ERROR"
+
+_LATENCY_BUCKETS: List[Tuple[timedelta, str]] = [
+    (timedelta(seconds=1), "< 1s"),
+    (timedelta(seconds=5), "< 5s"),
+    (timedelta(seconds=15), "< 15s"),
+    (timedelta(seconds=30), "< 30s"),
+    (timedelta(minutes=1), "< 1m"),
+    (timedelta(minutes=5), "< 5m"),
+    (timedelta(minutes=15), "< 15m"),
+    (timedelta(hours=1), "< 1h"),
+]
+_OVERFLOW_LABEL = ">= 1h"
+_UNKNOWN_LABEL = "unknown"
+
+
+class OrderSample(NamedTuple):
+    """The timing and outcome of a bid on a listing.
+
+    Attributes:
+        listing_number (int): The listing bid on.
+        discovery_delay (Optional[timedelta]): How long after the listing started that a search first returned it, if
+            known.
+        order_latency (Optional[timedelta]): How long after a search first returned the listing that the bot ordered
+            it, if known.
+        result (str): The name of the `BidResult`, `PENDING` if Prosper hasn't processed the bid yet, or `ERROR` if
+            placing the order failed.
+    """
+
+    listing_number: int
+    discovery_delay: Optional[timedelta]
+    order_latency: Optional[timedelta]
+    result: str
+
+
+class _Sighting(NamedTuple):
+    first_seen: datetime
+    discovery_delay: Optional[timedelta]
+
+
+class ListingLatencyTracker:
+    """Tracks how long it takes to order listings, and how often they're already funded by the time the bid lands.
+
+    The first time each listing is returned by a search is remembered, so every bid can be timed from the listing
+    starting to the bot first seeing it, which is bound by how often it polls, and from first seeing it to ordering it,
+    which is bound by the strategy and the order path. The most recent samples are kept for the report, and each
+    latency is also recorded on the metrics recorder, if there is one. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[MetricsRecorder] = None,
+        max_listings: int = DEFAULT_MAX_LISTINGS,
+        window: int = DEFAULT_WINDOW,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        """Creates a new tracker.
+
+        Args:
+            metrics (Optional[MetricsRecorder]): Records the discovery delays and order latencies as spans. Omit to only
+                keep them for the report.
+            max_listings (int): The maximum number of listing sightings to remember; the oldest are forgotten first.
+            window (int): How many of the most recent orders to keep for the report.
+            clock (Callable[[], datetime]): Gets the current, timezone-aware time.
+        """
+        self._metrics = metrics
+        self._max_listings = max_listings
+        self._clock = clock
+        self._lock = Lock()
+        self._sightings: OrderedDict[int, _Sighting] = OrderedDict()
+        self._samples: Deque[OrderSample] = deque(maxlen=window)
+
+    def now(self) -> datetime:
+        """Gets the current time, to pass to `record_order` when placing an order."""
+        return self._clock()
+
+    def observe_listings(self, listings: Iterable[Listing]):
+        """Records the first sighting of each listing returned by a search.
+
+        Args:
+            listings (Iterable[Listing]): The listings returned by a search.
+        """
+        now = self._clock()
+        with self._lock:
+            for listing in listings:
+                if listing.listing_number in self._sightings:
+                    continue
+                self._sightings[listing.listing_number] = _Sighting(
+                    now, self._discovery_delay(listing, now)
+                )
+                if len(self._sightings) > self._max_listings:
+                    self._sightings.popitem(last=False)
+
+    def record_order(
+        self, listing_numbers: List[int], ordered_at: datetime, order: Optional[Order]
+    ) -> List[OrderSample]:
+        """Records the latency and outcome of the bids in an order.
+
+        Args:
+            listing_numbers (List[int]): The listings bid on.
+            ordered_at (datetime): When the order was placed.
+            order (Optional[Order]): The order returned by Prosper, or `None` if placing it failed.
+
+        Returns:
+            List[OrderSample]: The samples recorded for the bids.
+        """
+        results = {}
+        if order is not None:
+            for bid in order.bid_requests:
+                results[bid.listing_id] = (
+                    bid.bid_result.name
+                    if bid.bid_result not in (None, BidResult.NONE)
+                    else PENDING_RESULT
+                )
+
+        samples = []
+        with self._lock:
+            for listing_number in listing_numbers:
+                sighting = self._sightings.get(listing_number)
+                sample = OrderSample(
+                    listing_number,
+                    sighting.discovery_delay if sighting else None,
+                    ordered_at - sighting.first_seen if sighting else None,
+                    (
+                        results.get(listing_number, PENDING_RESULT)
+                        if order is not None
+                        else ERROR_RESULT
+                    ),
+                )
+                self._samples.append(sample)
+                samples.append(sample)
+
+        if self._metrics is not None:
+            for sample in samples:
+                if sample.discovery_delay is not None:
+                    self._metrics.record(
+                        "listing.discovery_delay",
+                        sample.discovery_delay.total_seconds(),
+                    )
+                if sample.order_latency is not None:
+                    self._metrics.record(
+                        "listing.order_latency", sample.order_latency.total_seconds()
+                    )
+
+        return samples
+
+    @property
+    def samples(self) -> List[OrderSample]:
+        """The most recent order samples, oldest first."""
+        with self._lock:
+            return list(self._samples)
+
+    @property
+    def funded_rate(self) -> float:
+        """The fraction of the recent bids that landed on listings already funded by other lenders."""
+        samples = self.samples
+        if not samples:
+            return 0.0
+        return sum(1 for s in samples if s.result in FUNDED_RESULTS) / len(samples)
+
+    def report(self, printer: Callable[[str], object] = logger.info):
+        """Prints the distributions of the discovery delays, order latencies, and bid outcomes of the recent orders.
+
+        Args:
+            printer (Callable[[str], object]): The method to use to print. Defaults to `logger.info`.
+        """
+        samples = self.samples
+        if not samples:
+            printer("No orders placed yet; nothing to report.")
+            return
+
+        print_histogram(
+            "Listing start to first sighting (polling)",
+            _latency_histogram(s.discovery_delay for s in samples),
+            printer=printer,
+        )
+        print_histogram(
+            "First sighting to order (strategy and ordering)",
+            _latency_histogram(s.order_latency for s in samples),
+            printer=printer,
+        )
+        print_histogram(
+            "Bid outcomes", bucketize(s.result for s in samples), printer=printer
+        )
+        printer(
+            f"{self.funded_rate:.1%} of {len(samples)} bids landed on listings that were already funded"
+        )
+
+    @staticmethod
+    def _discovery_delay(listing: Listing, now: datetime) -> Optional[timedelta]:
+        try:
+            start_date = datetime.strptime(
+                listing.listing_start_date, LISTING_START_DATE_FORMAT
+            )
+        except ValueError:
+            return None
+        return now - start_date
+
+
+def _latency_histogram(latencies: Iterable[Optional[timedelta]]):
+    # Buckets by index so they sort by latency, then swaps in the labels
+    histogram = bucketize(latencies, _latency_bucket)
+    return {_bucket_label(bucket): count for bucket, count in histogram.items()}
+
+
+def _latency_bucket(latency: Optional[timedelta]) -> int:
+    if latency is None:
+        return len(_LATENCY_BUCKETS) + 1
+    for i, (upper_bound, _) in enumerate(_LATENCY_BUCKETS):
+        if latency < upper_bound:
+            return i
+    return len(_LATENCY_BUCKETS)
+
+
+def _bucket_label(bucket: int) -> str:
+    if bucket < len(_LATENCY_BUCKETS):
+        return _LATENCY_BUCKETS[bucket][1]
+    return _OVERFLOW_LABEL if bucket == len(_LATENCY_BUCKETS) else _UNKNOWN_LABEL
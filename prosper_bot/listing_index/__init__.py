@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from logging import getLogger
+from threading import Lock
+from typing import Callable, Hashable, NamedTuple, Optional
+
+from prosper_api.models import Listing
+
+__all__ = ["SeenListingIndex"]
+
+logger = getLogger(__file__)
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL = timedelta(hours=6)
+
+
+class _Entry(NamedTuple):
+    fingerprint: Hashable
+    expiry: datetime
+
+
+class SeenListingIndex:
+    """Remembers the listings returned by previous searches, so repeated polls can tell what changed.
+
+    Entries are keyed by `listing_number` and evicted when they are least recently seen and the index is full, or
+    when they haven't been seen for `ttl`. A listing is considered changed when any of the fields that move while it is
+    listed (funding, status, yield, or its last update date) differs from the last time it was seen. Listings the bot
+    has bid on are remembered separately, so they are skipped until the search results catch up with the bid. All
+    methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: timedelta = DEFAULT_TTL,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        """Creates a new, empty index.
+
+        Args:
+            max_size (int): The maximum number of listings to remember.
+            ttl (timedelta): How long to remember a listing after it was last seen or bid on.
+            clock (Callable[[], datetime]): Gets the current time.
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._invested: OrderedDict[int, datetime] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Gets the number of listings remembered."""
+        return len(self._entries)
+
+    def observe(self, listing: Listing) -> bool:
+        """Records a listing returned by a search.
+
+        Args:
+            listing (Listing): The listing to record.
+
+        Returns:
+            bool: Whether the listing is new or changed since it was last seen.
+        """
+        fingerprint = self._fingerprint(listing)
+        with self._lock:
+            now = self._clock()
+            entry = self._get(listing.listing_number, now)
+            changed = entry is None or entry.fingerprint != fingerprint
+            self._entries[listing.listing_number] = _Entry(
+                fingerprint=fingerprint, expiry=now + self._ttl
+            )
+            self._entries.move_to_end(listing.listing_number)
+            self._evict(self._entries, now)
+
+        return changed
+
+    def mark_invested(self, listing_number: int):
+        """Records that the bot bid on a listing.
+
+        Args:
+            listing_number (int): The listing bid on.
+        """
+        with self._lock:
+            now = self._clock()
+            self._invested[listing_number] = now + self._ttl
+            self._invested.move_to_end(listing_number)
+            self._evict(self._invested, now)
+
+    def is_invested(self, listing_number: int) -> bool:
+        """Gets whether the bot has bid on a listing.
+
+        Args:
+            listing_number (int): The listing to check.
+
+        Returns:
+            bool: Whether the bot bid on the listing within the TTL.
+        """
+        with self._lock:
+            expiry = self._invested.get(listing_number)
+            if expiry is not None and expiry <= self._clock():
+                del self._invested[listing_number]
+                expiry = None
+        return expiry is not None
+
+    def _get(self, listing_number: int, now: datetime) -> Optional[_Entry]:
+        entry = self._entries.get(listing_number)
+        if entry is None:
+            return None
+        if entry.expiry <= now:
+            del self._entries[listing_number]
+            return None
+        return entry
+
+    def _evict(self, entries: OrderedDict, now: datetime):
+        while len(entries) > self._max_size:
+            entries.popitem(last=False)
+        # The entries that expire soonest are first, so stop at the first one that hasn't expired
+        while entries:
+            listing_number, value = next(iter(entries.items()))
+            expiry = value.expiry if isinstance(value, _Entry) else value
+            if expiry > now:
+                break
+            del entries[listing_number]
+
+    @staticmethod
+    def _fingerprint(listing: Listing) -> Hashable:
+        return (
+            listing.last_updated_date,
+            listing.listing_status,
+            listing.amount_funded,
+            listing.amount_remaining,
+            listing.lender_yield,
+            listing.invested,
+        )
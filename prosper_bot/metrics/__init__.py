@@ -0,0 +1,350 @@
+import json
+import os
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import Enum
+from logging import getLogger
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+__all__ = [
+    "CycleMetrics",
+    "JsonLinesExporter",
+    "MetricsExporters",
+    "MetricsRecorder",
+    "PrometheusExporter",
+]
+
+logger = getLogger(__file__)
+
+DEFAULT_WINDOW = 100
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class CycleMetrics:
+    """The metrics of a finished cycle, along with the recorder holding the rolling metrics."""
+
+    __slots__ = ("timestamp", "spans", "api_calls", "api_errors", "error", "recorder")
+
+    def __init__(
+        self,
+        timestamp: datetime,
+        spans: Dict[str, float],
+        api_calls: Counter,
+        api_errors: Counter,
+        error: bool,
+        recorder: "MetricsRecorder",
+    ):
+        """Captures the metrics of a cycle.
+
+        Args:
+            timestamp (datetime): When the cycle ended.
+            spans (Dict[str, float]): The total time spent in each span during the cycle.
+            api_calls (Counter): The API calls made during the cycle, by name.
+            api_errors (Counter): The API calls that failed during the cycle, by name.
+            error (bool): Whether the cycle failed.
+            recorder (MetricsRecorder): The recorder, for the rolling and cumulative metrics.
+        """
+        self.timestamp = timestamp
+        self.spans = spans
+        self.api_calls = api_calls
+        self.api_errors = api_errors
+        self.error = error
+        self.recorder = recorder
+
+
+class MetricsRecorder:
+    """Records how long each phase of the bot cycle takes, and how many API calls it makes and how many fail.
+
+    Spans are timed by name, both for the current cycle and over a rolling window of the most recent cycles, from which
+    percentiles are computed. It's safe to record from several threads at once. At the end of every cycle, the
+    metrics are handed to the exporter, if there is one.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[Callable[[CycleMetrics], None]] = None,
+        window: int = DEFAULT_WINDOW,
+    ):
+        """Creates a new metrics recorder.
+
+        Args:
+            exporter (Optional[Callable[[CycleMetrics], None]]): Called with the metrics at the end of every cycle. Omit
+                to only keep them in memory.
+            window (int): How many of the most recent samples of each span to compute percentiles over.
+        """
+        self._exporter = exporter
+        self._window = window
+        self._lock = Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self.span_totals: Counter = Counter()
+        self.span_counts: Counter = Counter()
+        self.api_calls: Counter = Counter()
+        self.api_errors: Counter = Counter()
+        self.cycles = 0
+        self.cycle_errors = 0
+        self._cycle_start: Optional[float] = None
+        self._cycle_spans: Dict[str, float] = {}
+        self._cycle_api_calls: Counter = Counter()
+        self._cycle_api_errors: Counter = Counter()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times the enclosed block.
+
+        Args:
+            name (str): The name of the phase being timed.
+
+        Yields:
+            None: Nothing; the block is timed when it exits, whether or not it raises.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """Records a sample for a span.
+
+        Args:
+            name (str): The name of the phase.
+            seconds (float): How long it took.
+        """
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(seconds)
+            self.span_totals[name] += seconds
+            self.span_counts[name] += 1
+            self._cycle_spans[name] = self._cycle_spans.get(name, 0.0) + seconds
+
+    def record_since_cycle_start(self, name: str):
+        """Records the time since the current cycle started as a span; does nothing outside a cycle.
+
+        Args:
+            name (str): The name of the span.
+        """
+        cycle_start = self._cycle_start
+        if cycle_start is not None:
+            self.record(name, perf_counter() - cycle_start)
+
+    @contextmanager
+    def api_call(self, name: str) -> Iterator[None]:
+        """Counts and times an API call, and counts it as an error if it raises.
+
+        Args:
+            name (str): The name of the API call.
+
+        Yields:
+            None: Nothing; the call is recorded when the block exits.
+        """
+        with self._lock:
+            self.api_calls[name] += 1
+            self._cycle_api_calls[name] += 1
+        try:
+            with self.span(f"api.{name}"):
+                yield
+        except Exception:
+            with self._lock:
+                self.api_errors[name] += 1
+                self._cycle_api_errors[name] += 1
+            raise
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Times a bot cycle, and exports the metrics when it's done.
+
+        Yields:
+            None: Nothing; the cycle is recorded when the block exits, and counted as failed if it raises.
+        """
+        with self._lock:
+            self._cycle_start = perf_counter()
+            self._cycle_spans = {}
+            self._cycle_api_calls = Counter()
+            self._cycle_api_errors = Counter()
+        error = False
+        try:
+            with self.span("cycle"):
+                yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._end_cycle(error)
+
+    def percentiles(self, name: str) -> Dict[float, float]:
+        """Computes the percentiles of the recent samples of a span.
+
+        Args:
+            name (str): The name of the span.
+
+        Returns:
+            Dict[float, float]: The sample at each of the `QUANTILES`, by quantile; empty if there are no samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {}
+        return {
+            q: samples[min(int(q * len(samples)), len(samples) - 1)] for q in QUANTILES
+        }
+
+    @property
+    def span_names(self) -> List[str]:
+        """The names of all the spans recorded so far."""
+        with self._lock:
+            return sorted(self._samples)
+
+    def _end_cycle(self, error: bool):
+        with self._lock:
+            self.cycles += 1
+            if error:
+                self.cycle_errors += 1
+            self._cycle_start = None
+            snapshot = CycleMetrics(
+                datetime.now(timezone.utc),
+                self._cycle_spans,
+                self._cycle_api_calls,
+                self._cycle_api_errors,
+                error,
+                self,
+            )
+
+        logger.debug(
+            "Cycle timings: "
+            + ", ".join(
+                f"{name}={seconds * 1000:.1f}ms"
+                for name, seconds in sorted(snapshot.spans.items())
+            )
+        )
+        if self._exporter is not None:
+            try:
+                self._exporter(snapshot)
+            except OSError as e:
+                logger.warning(f"Failed to export metrics: {e}")
+
+
+class PrometheusExporter:
+    """Writes the metrics in the Prometheus text format, for the node exporter's textfile collector.
+
+    The file is replaced on every export, so it always holds the latest values.
+    """
+
+    def __init__(self, path: str):
+        """Creates a new exporter.
+
+        Args:
+            path (str): Where to write the metrics; the node exporter only collects files ending in `.prom`.
+        """
+        self._path = path
+
+    def __call__(self, snapshot: CycleMetrics):
+        """Writes the metrics.
+
+        Args:
+            snapshot (CycleMetrics): The metrics at the end of the cycle.
+        """
+        recorder = snapshot.recorder
+        lines = [
+            "# HELP prosper_bot_span_seconds Time spent in each phase of the bot cycle, over the most recent cycles.",
+            "# TYPE prosper_bot_span_seconds summary",
+        ]
+        for name in recorder.span_names:
+            for q, value in recorder.percentiles(name).items():
+                lines.append(
+                    f'prosper_bot_span_seconds{{span="{name}",quantile="{q}"}} {value}'
+                )
+            lines.append(
+                f'prosper_bot_span_seconds_sum{{span="{name}"}} {recorder.span_totals[name]}'
+            )
+            lines.append(
+                f'prosper_bot_span_seconds_count{{span="{name}"}} {recorder.span_counts[name]}'
+            )
+
+        for metric, help_text, counts in [
+            ("api_calls", "Prosper API calls made.", recorder.api_calls),
+            ("api_errors", "Prosper API calls that failed.", recorder.api_errors),
+        ]:
+            lines.append(f"# HELP prosper_bot_{metric}_total {help_text}")
+            lines.append(f"# TYPE prosper_bot_{metric}_total counter")
+            for call, count in sorted(counts.items()):
+                lines.append(f'prosper_bot_{metric}_total{{call="{call}"}} {count}')
+
+        lines += [
+            "# HELP prosper_bot_cycles_total Bot cycles run.",
+            "# TYPE prosper_bot_cycles_total counter",
+            f"prosper_bot_cycles_total {recorder.cycles}",
+            "# HELP prosper_bot_cycle_errors_total Bot cycles that failed.",
+            "# TYPE prosper_bot_cycle_errors_total counter",
+            f"prosper_bot_cycle_errors_total {recorder.cycle_errors}",
+            "# HELP prosper_bot_last_cycle_timestamp_seconds When the last cycle ended.",
+            "# TYPE prosper_bot_last_cycle_timestamp_seconds gauge",
+            f"prosper_bot_last_cycle_timestamp_seconds {snapshot.timestamp.timestamp()}",
+        ]
+
+        # Write a temporary file and move it into place so the collector never reads a partial file
+        temp_path = f"{self._path}.tmp"
+        with open(temp_path, "w") as metrics_file:
+            metrics_file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self._path)
+
+
+class JsonLinesExporter:
+    """Appends a JSON object with the metrics of each cycle to a file."""
+
+    def __init__(self, path: str):
+        """Creates a new exporter.
+
+        Args:
+            path (str): The file to append the metrics to.
+        """
+        self._path = path
+
+    def __call__(self, snapshot: CycleMetrics):
+        """Appends the metrics.
+
+        Args:
+            snapshot (CycleMetrics): The metrics at the end of the cycle.
+        """
+        recorder = snapshot.recorder
+        record = {
+            "timestamp": snapshot.timestamp.isoformat(),
+            "error": snapshot.error,
+            "spans": snapshot.spans,
+            "api_calls": dict(snapshot.api_calls),
+            "api_errors": dict(snapshot.api_errors),
+            "percentiles": {
+                name: {
+                    f"p{int(q * 100)}": v for q, v in recorder.percentiles(name).items()
+                }
+                for name in snapshot.spans
+            },
+        }
+        with open(self._path, "a") as metrics_file:
+            metrics_file.write(json.dumps(record) + "\n")
+
+
+class MetricsExporters(Enum):
+    """Enumerates the formats the metrics can be exported in."""
+
+    PROMETHEUS = PrometheusExporter
+    JSON_LINES = JsonLinesExporter
+
+    def __str__(self):
+        """Return the name of the enum to make it more palatable in the CLI help."""
+        return self.name
+
+    def to_exporter(self, path: str) -> Callable[[CycleMetrics], None]:
+        """Creates an exporter that writes to the given file.
+
+        Args:
+            path (str): The file to write the metrics to.
+
+        Returns:
+            Callable[[CycleMetrics], None]: The exporter.
+        """
+        return self.value(path)
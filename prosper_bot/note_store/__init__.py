@@ -0,0 +1,221 @@
+import sqlite3
+from datetime import datetime, timedelta
+from logging import getLogger
+from os import makedirs
+from os.path import dirname, join
+from typing import Iterator, List, Optional, Tuple
+
+from platformdirs import user_cache_dir
+from prosper_api.client import Client
+from prosper_api.models import ListNotesRequest, Note
+from prosper_api.models.enums import ListNotesSortBy, LoanStatus, SortOrder
+
+from prosper_bot.client import DEFAULT_MAX_CONCURRENT_NOTE_REQUESTS, iter_note_pages
+
+__all__ = ["NoteStore"]
+
+logger = getLogger(__file__)
+
+DEFAULT_NOTE_STORE_PATH = join(user_cache_dir("prosper-bot"), "notes.db")
+DEFAULT_SYNC_MAX_AGE = timedelta(minutes=15)
+DEFAULT_RECOVERY_SYNC_MAX_AGE = timedelta(days=1)
+PAGE_SIZE = 100
+
+# Notes in these states still receive payments, so they have to be refreshed on every sync
+_ACTIVE_STATUSES = (
+    LoanStatus.ORIGINATION_DELAYED,
+    LoanStatus.CURRENT,
+    LoanStatus.FINAL_PAYMENT_IN_PROGRESS,
+)
+# Notes in these states can still receive recoveries and debt-sale proceeds, which trickle in, so they're refreshed less
+# often
+_RECOVERING_STATUSES = (
+    LoanStatus.CHARGED_OFF,
+    LoanStatus.DEFAULTED,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    loan_note_id TEXT PRIMARY KEY,
+    origination_date TEXT NOT NULL,
+    note_status INTEGER NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_by_status ON notes (note_status, origination_date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_synced TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recovery_sync_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_synced TEXT NOT NULL
+);
+"""
+
+
+class NoteStore:
+    """Local SQLite copy of the notes in the account.
+
+    Syncing lists the notes newest first and stops once it is past the oldest note that was still active at the last
+    sync; older notes are all settled, so they can't have changed. The first sync downloads everything, and later ones
+    only download the new notes and those still being paid. Charged-off and defaulted notes can still recover money, so
+    once `recovery_max_age` has passed, a sync also reaches back to the oldest of them.
+    """
+
+    def __init__(self, path: str = DEFAULT_NOTE_STORE_PATH):
+        """Opens the note store, creating it if needed.
+
+        Args:
+            path (str): The filesystem location of the database; `:memory:` keeps it in memory.
+        """
+        if path != ":memory:":
+            makedirs(dirname(path) or ".", exist_ok=True)
+        self._path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        """Implements the context manager interface."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Closes the store when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+    @property
+    def last_synced(self) -> Optional[datetime]:
+        """The time of the last completed sync, if any."""
+        return self._last_synced("sync_state")
+
+    def sync(
+        self,
+        client: Client,
+        max_age: timedelta = DEFAULT_SYNC_MAX_AGE,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_NOTE_REQUESTS,
+        recovery_max_age: timedelta = DEFAULT_RECOVERY_SYNC_MAX_AGE,
+    ) -> int:
+        """Brings the store up to date with the account.
+
+        Args:
+            client (Client): The Prosper API client.
+            max_age (timedelta): Skip the sync if the last one happened more recently than this.
+            max_concurrent_requests (int): How many pages of notes to fetch at once.
+            recovery_max_age (timedelta): Also refresh the charged-off and defaulted notes if they were last refreshed
+                longer ago than this.
+
+        Returns:
+            int: The number of notes that were added or changed.
+        """
+        last_synced = self.last_synced
+        if last_synced is not None and datetime.now() - last_synced < max_age:
+            logger.debug(f"Skipping note sync; last synced at {last_synced}")
+            return 0
+
+        last_recovery_synced = self._last_synced("recovery_sync_state")
+        refresh_recoveries = (
+            last_recovery_synced is None
+            or datetime.now() - last_recovery_synced >= recovery_max_age
+        )
+        cutoff = self._sync_cutoff(
+            _ACTIVE_STATUSES + (_RECOVERING_STATUSES if refresh_recoveries else ())
+        )
+        request = ListNotesRequest(
+            sort_by=ListNotesSortBy.ORIGINATION_DATE,
+            sort_dir=SortOrder.DESCENDING,
+            offset=0,
+            limit=PAGE_SIZE,
+        )
+        changed_count = 0
+        fetched_count = 0
+        with self._connection:
+            for notes in iter_note_pages(client, request, max_concurrent_requests):
+                fetched_count += len(notes)
+                changed_count += self._upsert(notes)
+                if (
+                    cutoff is not None
+                    and min(n.origination_date for n in notes) < cutoff
+                ):
+                    break
+
+            self._record_sync("sync_state")
+            if refresh_recoveries:
+                self._record_sync("recovery_sync_state")
+
+        logger.info(
+            f"Synced notes: {changed_count} new or changed of {fetched_count} fetched"
+        )
+        return changed_count
+
+    def notes(self) -> List[Note]:
+        """Gets all the stored notes.
+
+        Returns:
+            List[Note]: The notes, oldest first.
+        """
+        return list(self.iter_notes())
+
+    def iter_notes(self) -> Iterator[Note]:
+        """Streams the stored notes, reading them from the database as they are consumed.
+
+        Yields:
+            Note: Each note, oldest first.
+        """
+        for (serialized,) in self._connection.execute(
+            "SELECT note FROM notes ORDER BY origination_date, loan_note_id"
+        ):
+            yield Note.model_validate_json(serialized)
+
+    def _last_synced(self, table: str) -> Optional[datetime]:
+        row = self._connection.execute(
+            f"SELECT last_synced FROM {table} WHERE id = 0"
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def _record_sync(self, table: str):
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO {table} (id, last_synced) VALUES (0, ?)",
+            (datetime.now().isoformat(),),
+        )
+
+    def _sync_cutoff(self, statuses: Tuple[LoanStatus, ...]) -> Optional[str]:
+        # Everything originated on or after the oldest note in one of the statuses may have changed; with no such
+        # notes, only notes newer than the newest stored one can be new.
+        (oldest_active,) = self._connection.execute(
+            f"SELECT MIN(origination_date) FROM notes WHERE note_status IN ({','.join('?' * len(statuses))})",
+            [s.value for s in statuses],
+        ).fetchone()
+        if oldest_active is not None:
+            return oldest_active
+
+        (newest,) = self._connection.execute(
+            "SELECT MAX(origination_date) FROM notes"
+        ).fetchone()
+        return newest
+
+    def _upsert(self, notes: List[Note]) -> int:
+        changed_count = 0
+        for note in notes:
+            serialized = note.model_dump_json()
+            row = self._connection.execute(
+                "SELECT note FROM notes WHERE loan_note_id = ?", (note.loan_note_id,)
+            ).fetchone()
+            if row is not None and row[0] == serialized:
+                continue
+            if row is not None:
+                logger.debug(f"Note {note.loan_note_id} changed")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO notes (loan_note_id, origination_date, note_status, note) VALUES (?, ?, ?, ?)",
+                (
+                    note.loan_note_id,
+                    note.origination_date,
+                    note.note_status.value,
+                    serialized,
+                ),
+            )
+            changed_count += 1
+
+        return changed_count
@@ -0,0 +1,95 @@
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Iterator, Optional
+
+__all__ = ["CycleProfiler"]
+
+logger = getLogger(__file__)
+
+DEFAULT_CYCLES_PER_PROFILE = 10
+DEFAULT_TOP_FUNCTIONS = 25
+
+
+class CycleProfiler:
+    """Profiles bot cycles with cProfile, and writes a profile of every few cycles along with a summary of it.
+
+    Each profile is written as `cycles-<first>-<last>.prof`, which can be loaded with `pstats` or visualized with tools
+    like snakeviz, and `cycles-<first>-<last>.txt`, which lists the functions with the highest cumulative time. Only
+    the thread running the cycle is profiled; time spent waiting on worker threads shows up in the calling function.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        cycles_per_profile: int = DEFAULT_CYCLES_PER_PROFILE,
+        top: int = DEFAULT_TOP_FUNCTIONS,
+    ):
+        """Creates a new profiler.
+
+        Args:
+            directory (str): Where to write the profiles; it's created if it doesn't exist.
+            cycles_per_profile (int): How many cycles each profile covers.
+            top (int): How many functions to list in each summary.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._cycles_per_profile = max(cycles_per_profile, 1)
+        self._top = top
+        self._profile: Optional[cProfile.Profile] = None
+        self._first_cycle = 1
+        self._cycles = 0
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Profiles the enclosed cycle, and writes the profile once it covers enough cycles.
+
+        Yields:
+            None: Nothing; the cycle is counted when the block exits, whether or not it raises.
+        """
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+            self._cycles += 1
+            if self._cycles >= self._cycles_per_profile:
+                self.flush()
+
+    def flush(self) -> Optional[str]:
+        """Writes the profile of the cycles since the last one was written, if there were any.
+
+        Returns:
+            Optional[str]: The path of the profile, or `None` if there was nothing to write or writing failed.
+        """
+        if self._profile is None or not self._cycles:
+            return None
+
+        last_cycle = self._first_cycle + self._cycles - 1
+        base_path = os.path.join(
+            self._directory, f"cycles-{self._first_cycle:06d}-{last_cycle:06d}"
+        )
+        profile = self._profile
+        self._profile = None
+        self._first_cycle = last_cycle + 1
+        self._cycles = 0
+
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(self._top)
+        try:
+            profile.dump_stats(f"{base_path}.prof")
+            with open(f"{base_path}.txt", "w") as summary_file:
+                summary_file.write(summary.getvalue())
+        except OSError as e:
+            logger.warning(f"Failed to write profile: {e}")
+            return None
+
+        logger.info(f"Wrote profile to {base_path}.prof")
+        return f"{base_path}.prof"
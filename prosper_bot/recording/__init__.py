@@ -0,0 +1,223 @@
+import json
+import mmap
+import os
+from collections import deque
+from logging import getLogger
+from threading import Lock
+from time import time
+from typing import Any, Deque, Dict, Iterator, NamedTuple, Optional, Tuple
+
+import requests
+from prosper_api.client import Client
+from prosper_shared.omni_config import Config
+
+__all__ = ["ApiRecord", "RecordingClient", "ReplayClient"]
+
+logger = getLogger(__file__)
+
+_REQUEST_PREFIX = '{"request":'
+_TIME_PREFIX = ',"time":'
+_RESPONSE_PREFIX = ',"response":'
+_DECODER = json.JSONDecoder()
+
+
+def _request_key(method: str, url: str, params: Optional[dict], data: Optional[dict]):
+    # Canonical, so the same request always serializes the same way and can be matched without parsing the whole line
+    return json.dumps(
+        [method, url, params or {}, data or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+class ApiRecord(NamedTuple):
+    """A recorded API call."""
+
+    time: float
+    method: str
+    url: str
+    params: Dict[str, Any]
+    data: Dict[str, Any]
+    status: int
+    text: str
+
+
+class RecordingClient(Client):
+    """Wraps a Prosper API client and appends every request it makes, and the response, to a log.
+
+    Each line of the log is a JSON object with the `request` (the method, URL, query params, and payload), the `time`
+    it was made, and either the `response` body, embedded as-is, or the error `status` and its `text`. Lines are
+    flushed as they're written, so the log survives the process crashing.
+    """
+
+    def __init__(self, client: Client, path: str):
+        """Creates a new recording client.
+
+        Args:
+            client (Client): The client to record.
+            path (str): The log to append to; it's created if it doesn't exist.
+        """
+        # The wrapped client does the actual work, so there's nothing of the base client to initialize
+        self._client = client
+        self._config = getattr(client, "_config", None) or Config({})
+        self._auth_token_manager = None
+        self._lock = Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __enter__(self):
+        """Implements the context manager interface."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Closes the log when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Closes the log."""
+        with self._lock:
+            self._file.close()
+
+    def _do_request(self, method, url, params=None, data=None):
+        key = _request_key(method, url, params, data)
+        started = round(time(), 3)
+        try:
+            text = self._client._do_request(method, url, params=params, data=data)
+        except requests.HTTPError as e:
+            self._write(
+                f"{_REQUEST_PREFIX}{key}{_TIME_PREFIX}{started},"
+                f'"status":{e.response.status_code},"text":{json.dumps(e.response.text)}}}'
+            )
+            raise
+
+        try:
+            json.loads(text)
+            line = f"{_REQUEST_PREFIX}{key}{_TIME_PREFIX}{started}{_RESPONSE_PREFIX}{text}}}"
+        except ValueError:
+            # Only JSON can be embedded as-is
+            line = f'{_REQUEST_PREFIX}{key}{_TIME_PREFIX}{started},"status":200,"text":{json.dumps(text)}}}'
+        self._write(line)
+        return text
+
+    def _write(self, line: str):
+        # Newlines in the response would split the record, and they're never significant in JSON
+        line = line.replace("\n", " ")
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class ReplayClient(Client):
+    """Serves the responses from a log written by `RecordingClient` instead of calling Prosper.
+
+    The log is memory-mapped and only read as far as needed, so even huge logs open instantly. Each request is answered
+    with the next unused response recorded for the same request, so concurrent requests made in a different order
+    than when they were recorded are still matched; recorded errors are raised again. A request with no recorded
+    response left raises a `LookupError`.
+    """
+
+    def __init__(self, path: str, config: Optional[Config] = None):
+        """Opens a log for replay.
+
+        Args:
+            path (str): The log written by `RecordingClient`.
+            config (Optional[Config]): The config to expose to the bot and analytics. Omit to use an empty config.
+        """
+        # Nothing is sent to Prosper, so there's nothing of the base client to initialize
+        self._config = config if config is not None else Config({})
+        self._auth_token_manager = None
+        self._lock = Lock()
+        self._file = open(path, "rb")
+        self._log = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.fstat(self._file.fileno()).st_size
+            else None
+        )
+        self._position = 0
+        # Lines read past while looking for a request, by their request, so later requests don't have to read them again
+        self._skipped: Dict[str, Deque[str]] = {}
+
+    def __enter__(self):
+        """Implements the context manager interface."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Closes the log when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Closes the log."""
+        if self._log is not None:
+            self._log.close()
+        self._file.close()
+
+    def records(self) -> Iterator[ApiRecord]:
+        """Reads every record in the log, in the order they were written, regardless of what has been replayed.
+
+        Yields:
+            ApiRecord: The recorded calls.
+        """
+        for line, _ in self._lines(0):
+            key, _ = self._split_key(line)
+            method, url, params, data = json.loads(key)
+            started, status, text = self._parse_result(line)
+            yield ApiRecord(started, method, url, params, data, status, text)
+
+    def _do_request(self, method, url, params=None, data=None):
+        key = _request_key(method, url, params, data)
+        with self._lock:
+            line = self._next_line(key)
+        if line is None:
+            raise LookupError(f"No recorded response left for {method} {url}")
+
+        _, status, text = self._parse_result(line)
+        if status >= 400:
+            response = requests.Response()
+            response.status_code = status
+            response.url = url
+            response.reason = "Recorded error"
+            response._content = text.encode()
+            response.raise_for_status()
+        return text
+
+    def _next_line(self, key: str) -> Optional[str]:
+        skipped = self._skipped.get(key)
+        if skipped:
+            return skipped.popleft()
+
+        for line, self._position in self._lines(self._position):
+            line_key, _ = self._split_key(line)
+            if line_key == key:
+                return line
+            self._skipped.setdefault(line_key, deque()).append(line)
+        return None
+
+    def _lines(self, position: int) -> Iterator[Tuple[str, int]]:
+        # Yields each line with the position of the one after it
+        if self._log is None:
+            return
+        size = len(self._log)
+        while position < size:
+            end = self._log.find(b"\n", position)
+            if end == -1:
+                end = size
+            line = self._log[position:end].decode("utf-8")
+            position = end + 1
+            if line:
+                yield line, position
+
+    @staticmethod
+    def _split_key(line: str):
+        _, end = _DECODER.raw_decode(line, len(_REQUEST_PREFIX))
+        return line[len(_REQUEST_PREFIX) : end], end
+
+    @classmethod
+    def _parse_result(cls, line: str):
+        _, key_end = cls._split_key(line)
+        started, end = _DECODER.raw_decode(line, key_end + len(_TIME_PREFIX))
+        if line.startswith(_RESPONSE_PREFIX, end):
+            # Return the response exactly as it was recorded
+            return started, 200, line[end + len(_RESPONSE_PREFIX) : -1]
+
+        record = json.loads(line)
+        return started, record["status"], record["text"]
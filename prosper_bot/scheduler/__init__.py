@@ -0,0 +1,272 @@
+import random
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from logging import getLogger
+from threading import Lock
+from typing import Callable, Deque, Iterable, Optional, Tuple
+
+import humanize
+from prosper_api.models import Listing
+
+__all__ = [
+    "AdaptivePollScheduler",
+    "CycleOutcome",
+    "FixedPollScheduler",
+    "PollScheduler",
+    "PollSchedulers",
+]
+
+logger = getLogger(__file__)
+
+ACTIVE_POLL_TIME = timedelta(seconds=5)
+
+# How the search API formats the listing start dates
+LISTING_START_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+_MINUTES_PER_DAY = 24 * 60
+
+
+class CycleOutcome(Enum):
+    """Summarizes what happened in a bot cycle, which is what schedulers base the next poll on."""
+
+    INVESTED = "invested"
+    """Orders were placed; there may be cash left to deploy."""
+
+    NO_LISTINGS = "no-listings"
+    """There was cash to deploy, but no matching listings."""
+
+    IDLE = "idle"
+    """There was nothing to invest."""
+
+
+class PollScheduler(ABC):
+    """Decides how long the bot waits before its next cycle."""
+
+    def observe_listings(self, listings: Iterable[Listing]):
+        """Receives the listings returned by every search; schedulers can use them to learn when listings appear.
+
+        Args:
+            listings (Iterable[Listing]): The listings returned by a search.
+        """
+
+    @abstractmethod
+    def next_poll(self, outcome: CycleOutcome) -> timedelta:
+        """Gets how long to wait before the next cycle.
+
+        Args:
+            outcome (CycleOutcome): What happened in the cycle that just finished.
+
+        Returns:
+            timedelta: How long to sleep before the next cycle.
+        """
+
+
+class FixedPollScheduler(PollScheduler):
+    """Polls quickly while investing and at a fixed interval otherwise."""
+
+    def __init__(
+        self, poll_time: timedelta, active_poll_time: timedelta = ACTIVE_POLL_TIME
+    ):
+        """Creates a new fixed poll scheduler.
+
+        Args:
+            poll_time (timedelta): How long to wait when nothing was invested.
+            active_poll_time (timedelta): How long to wait after placing orders.
+        """
+        self._poll_time = poll_time
+        self._active_poll_time = active_poll_time
+
+    def next_poll(self, outcome: CycleOutcome) -> timedelta:
+        """Gets how long to wait before the next cycle.
+
+        Args:
+            outcome (CycleOutcome): What happened in the cycle that just finished.
+
+        Returns:
+            timedelta: How long to sleep before the next cycle.
+        """
+        if outcome == CycleOutcome.INVESTED:
+            return self._active_poll_time
+        return self._poll_time
+
+
+class AdaptivePollScheduler(PollScheduler):
+    """Learns when Prosper releases listings and polls aggressively around those times.
+
+    The start time of every listing seen in search results is recorded by time of day. Time-of-day bins holding at
+    least `hot_fraction` of the busiest bin's listings are considered bursts. Within a burst (or `burst_lead` before
+    one) the scheduler polls every `burst_poll_time`. Otherwise it backs off exponentially with jitter from
+    `poll_time` up to `max_poll_time`, but never sleeps past the start of the next burst.
+    """
+
+    def __init__(
+        self,
+        poll_time: timedelta,
+        active_poll_time: timedelta = ACTIVE_POLL_TIME,
+        burst_poll_time: timedelta = ACTIVE_POLL_TIME,
+        max_poll_time: timedelta = timedelta(minutes=15),
+        bin_size: timedelta = timedelta(minutes=5),
+        burst_lead: timedelta = timedelta(minutes=1),
+        hot_fraction: float = 0.5,
+        min_samples: int = 20,
+        max_samples: int = 10000,
+        jitter: float = 0.2,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        rng: Optional[random.Random] = None,
+    ):
+        """Creates a new adaptive poll scheduler.
+
+        Args:
+            poll_time (timedelta): The first backoff step outside of bursts.
+            active_poll_time (timedelta): How long to wait after placing orders.
+            burst_poll_time (timedelta): How long to wait during a burst.
+            max_poll_time (timedelta): The longest the scheduler will back off to.
+            bin_size (timedelta): The granularity of the time-of-day histogram.
+            burst_lead (timedelta): How long before a burst to start polling aggressively.
+            hot_fraction (float): The fraction of the busiest bin's count for a bin to be considered a burst.
+            min_samples (int): How many listings to observe before trusting the histogram.
+            max_samples (int): How many of the most recent listings to base the histogram on.
+            jitter (float): The maximum fraction by which to randomly shorten or lengthen backoff delays.
+            clock (Callable[[], datetime]): Gets the current time; must be timezone-aware.
+            rng (Optional[random.Random]): Random source for the jitter.
+        """
+        self._poll_time = poll_time
+        self._active_poll_time = active_poll_time
+        self._burst_poll_time = burst_poll_time
+        self._max_poll_time = max_poll_time
+        self._bin_minutes = max(int(bin_size.total_seconds() // 60), 1)
+        self._bin_count = -(-_MINUTES_PER_DAY // self._bin_minutes)
+        self._burst_lead = burst_lead
+        self._hot_fraction = hot_fraction
+        self._min_samples = min_samples
+        self._jitter = jitter
+        self._clock = clock
+        self._rng = rng if rng is not None else random.Random()
+
+        self._lock = Lock()
+        self._samples: Deque[int] = deque(maxlen=max_samples)
+        self._bin_counts: Counter = Counter()
+        self._seen_listings: OrderedDict = OrderedDict()
+        self._max_seen_listings = max_samples
+        self._backoff_steps = 0
+        self._last_reason: Optional[str] = None
+
+    def observe_listings(self, listings: Iterable[Listing]):
+        """Records the start time of each listing not seen before.
+
+        Args:
+            listings (Iterable[Listing]): The listings returned by a search.
+        """
+        with self._lock:
+            for listing in listings:
+                if listing.listing_number in self._seen_listings:
+                    continue
+                self._seen_listings[listing.listing_number] = None
+                if len(self._seen_listings) > self._max_seen_listings:
+                    self._seen_listings.popitem(last=False)
+
+                try:
+                    start_date = datetime.strptime(
+                        listing.listing_start_date, LISTING_START_DATE_FORMAT
+                    )
+                except ValueError:
+                    logger.debug(
+                        f"Unable to parse start date {listing.listing_start_date!r} of listing {listing.listing_number}"
+                    )
+                    continue
+
+                if len(self._samples) == self._samples.maxlen:
+                    self._bin_counts[self._samples[0]] -= 1
+                listing_bin = self._bin_of(start_date)
+                self._samples.append(listing_bin)
+                self._bin_counts[listing_bin] += 1
+
+    def next_poll(self, outcome: CycleOutcome) -> timedelta:
+        """Gets how long to wait before the next cycle.
+
+        Args:
+            outcome (CycleOutcome): What happened in the cycle that just finished.
+
+        Returns:
+            timedelta: How long to sleep before the next cycle.
+        """
+        with self._lock:
+            delay, reason = self._decide(outcome)
+
+        if reason != self._last_reason:
+            logger.info(f"Polling again in {humanize.precisedelta(delay)}: {reason}")
+            self._last_reason = reason
+        else:
+            logger.debug(f"Polling again in {humanize.precisedelta(delay)}: {reason}")
+
+        return delay
+
+    def _decide(self, outcome: CycleOutcome) -> Tuple[timedelta, str]:
+        if outcome == CycleOutcome.INVESTED:
+            self._backoff_steps = 0
+            return self._active_poll_time, "investing"
+
+        now = self._clock()
+        until_burst = self._time_until_burst(now)
+        if until_burst is not None and until_burst <= self._burst_lead:
+            self._backoff_steps = 0
+            return self._burst_poll_time, "listing burst expected"
+
+        backoff = min(
+            self._poll_time * (2**self._backoff_steps),
+            self._max_poll_time,
+        )
+        self._backoff_steps += 1
+        backoff *= 1 + self._rng.uniform(-self._jitter, self._jitter)
+
+        if until_burst is not None and backoff > until_burst - self._burst_lead:
+            return until_burst - self._burst_lead, "waking up for the next burst"
+
+        return backoff, "backing off"
+
+    def _time_until_burst(self, now: datetime) -> Optional[timedelta]:
+        if len(self._samples) < self._min_samples:
+            return None
+
+        now = now.astimezone(timezone.utc)
+        threshold = max(self._bin_counts.values()) * self._hot_fraction
+        now_bin = self._bin_of(now)
+        # The busiest bin is always over the threshold, so this always finds one within a day
+        offset = next(
+            offset
+            for offset in range(self._bin_count)
+            if self._bin_counts[(now_bin + offset) % self._bin_count] >= threshold
+        )
+        if offset == 0:
+            return timedelta(0)
+        minute_of_day = now.hour * 60 + now.minute + now.second / 60
+        return timedelta(minutes=(now_bin + offset) * self._bin_minutes - minute_of_day)
+
+    def _bin_of(self, moment: datetime) -> int:
+        moment = moment.astimezone(timezone.utc)
+        return (moment.hour * 60 + moment.minute) // self._bin_minutes
+
+
+class PollSchedulers(Enum):
+    """Enumerates the available poll schedulers."""
+
+    FIXED = (FixedPollScheduler,)
+    ADAPTIVE = (AdaptivePollScheduler,)
+
+    def __str__(self):
+        """Return the name of the enum to make it more palatable in the CLI help."""
+        return self.name
+
+    def to_scheduler(self, poll_time: timedelta) -> PollScheduler:
+        """Converts the enum into a scheduler.
+
+        Args:
+            poll_time (timedelta): The base poll interval when nothing is being invested.
+
+        Returns:
+            PollScheduler: Poll scheduler matching the inputs.
+        """
+        cls = self.value[0]
+
+        return cls(poll_time)
@@ -0,0 +1,224 @@
+from functools import partial
+from logging import getLogger
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+from prosper_api.models import Listing
+from prosper_api.models.enums import ProsperRating
+
+__all__ = [
+    "ListingColumns",
+    "ListingScorer",
+    "field",
+    "rank",
+    "rating_weights",
+]
+
+logger = getLogger(__file__)
+
+# Ratings are stored by their position in the enum, from NA (0) to AA (7), so better ratings have higher codes
+_RATINGS: List[ProsperRating] = list(ProsperRating)
+_RATING_CODES: Dict[ProsperRating, int] = {r: i for i, r in enumerate(_RATINGS)}
+
+
+def _floats(listings: List[Listing], name: str) -> np.ndarray:
+    # Missing values become NaN, which never compares as better than anything
+    return np.fromiter(
+        (
+            np.nan if value is None else float(value)
+            for value in (getattr(listing, name) for listing in listings)
+        ),
+        dtype=np.float64,
+        count=len(listings),
+    )
+
+
+def _ratings(listings: List[Listing]) -> np.ndarray:
+    return np.fromiter(
+        (_RATING_CODES[listing.prosper_rating] for listing in listings),
+        dtype=np.int8,
+        count=len(listings),
+    )
+
+
+_COLUMNS: Dict[str, Callable[[List[Listing]], np.ndarray]] = {
+    "prosper_rating": _ratings,
+    **{
+        name: partial(_floats, name=name)
+        for name in [
+            "lender_yield",
+            "listing_term",
+            "amount_remaining",
+            "listing_amount",
+            "percent_funded",
+            "borrower_rate",
+            "prosper_score",
+            "historical_return",
+        ]
+    },
+}
+
+
+class ListingColumns:
+    """The fields of a page of listings that scorers use, as one array per field.
+
+    The columns are `lender_yield`, `prosper_rating`, `listing_term`, `amount_remaining`, `listing_amount`,
+    `percent_funded`, `borrower_rate`, `prosper_score`, and `historical_return`, in the order of the listings. Missing
+    values are NaN; ratings are the positions in `ProsperRating`, from 0 for NA to 7 for AA. Each column is extracted
+    the first time it's read, so a page only pays for the fields its scorers use.
+    """
+
+    FIELDS = tuple(_COLUMNS)
+
+    def __init__(self, listings: List[Listing]):
+        """Wraps a page of listings.
+
+        Args:
+            listings (List[Listing]): The listings.
+        """
+        self._listings = listings
+
+    @classmethod
+    def from_listings(cls, listings: List[Listing]) -> "ListingColumns":
+        """Gets the columns of a page of listings.
+
+        Args:
+            listings (List[Listing]): The listings.
+
+        Returns:
+            ListingColumns: The columns.
+        """
+        return cls(listings)
+
+    def __len__(self) -> int:
+        """Gets the number of listings."""
+        return len(self._listings)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        """Extracts a column, and keeps it for the next time it's read."""
+        if name not in _COLUMNS:
+            raise AttributeError(name)
+        column = _COLUMNS[name](self._listings)
+        setattr(self, name, column)
+        return column
+
+
+class ListingScorer:
+    """Scores a whole page of listings in one vectorized pass; higher scores are better.
+
+    Scorers compose with arithmetic, so custom ranking logic is built from the columns without a Python call per
+    listing: `field("lender_yield") * 2 + rating_weights({"AA": 0.01})` or `-field("listing_term")`. Listings scored
+    NaN, like those missing a field a scorer uses, or excluded with `where`, are dropped by `rank`.
+    """
+
+    def __init__(self, score: Callable[[ListingColumns], np.ndarray]):
+        """Wraps a function from the columns of a page to a score per listing.
+
+        Args:
+            score (Callable[[ListingColumns], np.ndarray]): Computes the score of each listing from the columns.
+        """
+        self._score = score
+
+    def __call__(self, columns: ListingColumns) -> np.ndarray:
+        """Scores each listing of a page.
+
+        Args:
+            columns (ListingColumns): The columns of the page.
+
+        Returns:
+            np.ndarray: The scores, in the order of the listings.
+        """
+        return np.asarray(self._score(columns), dtype=np.float64)
+
+    def __add__(self, other: Union["ListingScorer", float]) -> "ListingScorer":
+        """Adds the scores of another scorer, or a constant."""
+        return ListingScorer(lambda c: self(c) + _scores(other, c))
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Union["ListingScorer", float]) -> "ListingScorer":
+        """Subtracts the scores of another scorer, or a constant."""
+        return ListingScorer(lambda c: self(c) - _scores(other, c))
+
+    def __mul__(self, other: Union["ListingScorer", float]) -> "ListingScorer":
+        """Multiplies by the scores of another scorer, or weighs the scores by a constant."""
+        return ListingScorer(lambda c: self(c) * _scores(other, c))
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "ListingScorer":
+        """Reverses the order of the scores."""
+        return ListingScorer(lambda c: -self(c))
+
+    def where(
+        self, condition: Callable[[ListingColumns], np.ndarray]
+    ) -> "ListingScorer":
+        """Keeps only the listings matching a condition.
+
+        Args:
+            condition (Callable[[ListingColumns], np.ndarray]): Gets whether each listing of a page matches.
+
+        Returns:
+            ListingScorer: A scorer that scores the rest NaN, so `rank` drops them.
+        """
+        return ListingScorer(lambda c: np.where(condition(c), self(c), np.nan))
+
+
+def _scores(scorer: Union[ListingScorer, float], columns: ListingColumns):
+    return scorer(columns) if isinstance(scorer, ListingScorer) else scorer
+
+
+def field(name: str) -> ListingScorer:
+    """Scores listings by one of their columns.
+
+    Args:
+        name (str): The name of the column, one of `ListingColumns.FIELDS`.
+
+    Returns:
+        ListingScorer: The scorer.
+
+    Raises:
+        ValueError: If there's no such column.
+    """
+    if name not in ListingColumns.FIELDS:
+        raise ValueError(
+            f"Unknown listing column {name}; expected one of {', '.join(ListingColumns.FIELDS)}"
+        )
+    return ListingScorer(lambda c: getattr(c, name))
+
+
+def rating_weights(weights: Dict[str, float]) -> ListingScorer:
+    """Scores listings by their prosper rating.
+
+    Args:
+        weights (Dict[str, float]): The score of each rating, by name; the ones left out score 0.
+
+    Returns:
+        ListingScorer: The scorer.
+    """
+    lookup = np.zeros(len(_RATINGS), dtype=np.float64)
+    for rating, weight in weights.items():
+        lookup[_RATING_CODES[ProsperRating[rating]]] = weight
+    return ListingScorer(lambda c: lookup[c.prosper_rating])
+
+
+def rank(listings: List[Listing], scorer: ListingScorer) -> List[Listing]:
+    """Orders a page of listings from the highest score to the lowest.
+
+    Args:
+        listings (List[Listing]): The listings.
+        scorer (ListingScorer): Scores the listings.
+
+    Returns:
+        List[Listing]: The listings with a score, best first; ties keep the order of the page.
+    """
+    if not listings:
+        return []
+
+    scores = scorer(ListingColumns.from_listings(listings))
+    order = np.argsort(-scores, kind="stable")
+    # NaNs sort last, so the scored listings are a prefix
+    scored_count = int(np.count_nonzero(~np.isnan(scores)))
+    if scored_count < len(listings):
+        logger.debug(f"Dropped {len(listings) - scored_count} unscored listings")
+    return [listings[i] for i in order[:scored_count]]
@@ -0,0 +1,651 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from logging import getLogger
+from threading import Lock
+from time import sleep
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from prosper_api.client import Client
+from prosper_api.models import (
+    Account,
+    AmountsByRating,
+    BidRequest,
+    Listing,
+    ListNotesResponse,
+    Note,
+    Order,
+    SearchListingsResponse,
+)
+from prosper_api.models.enums import (
+    BidResult,
+    BidStatus,
+    EmploymentStatus,
+    FICOScore,
+    ListingStatus,
+    LoanStatus,
+    OrderSource,
+    OrderStatus,
+)
+from prosper_shared.omni_config import Config
+
+from prosper_bot.scheduler import LISTING_START_DATE_FORMAT
+
+__all__ = ["ManualClock", "SimulatedClient", "SimulatorStats"]
+
+logger = getLogger(__file__)
+
+MIN_BID = Decimal("25.00")
+
+# Roughly the mix of ratings and yields on the platform
+_RATING_WEIGHTS = {
+    "AA": 6,
+    "A": 12,
+    "B": 20,
+    "C": 24,
+    "D": 18,
+    "E": 14,
+    "HR": 6,
+}
+_RATING_YIELDS = {
+    "AA": 0.06,
+    "A": 0.09,
+    "B": 0.12,
+    "C": 0.16,
+    "D": 0.20,
+    "E": 0.24,
+    "HR": 0.28,
+}
+_TERMS = [24, 36, 48, 60]
+_NOTES_DEFAULT_LIMIT = 25
+_NOTES_MAX_LIMIT = 100
+_LISTINGS_DEFAULT_LIMIT = 25
+_LISTINGS_MAX_LIMIT = 500
+_LISTING_DURATION = timedelta(days=14)
+
+
+class ManualClock:
+    """A clock that only moves when told to, so simulated time can be stepped deterministically."""
+
+    def __init__(self, now: datetime):
+        """Creates a new clock stopped at the given time.
+
+        Args:
+            now (datetime): The time to start at; advance it by assigning to `now`.
+        """
+        self.now = now
+
+    def __call__(self) -> datetime:
+        """Gets the clock's current time."""
+        return self.now
+
+
+class SimulatorStats:
+    """Counts what the simulator was asked to do, so throughput and fill rates can be measured end to end."""
+
+    def __init__(self):
+        """Creates a new set of zeroed counters."""
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.bids: Counter = Counter()
+        self.amount_invested = Decimal("0.00")
+
+    @property
+    def bid_count(self) -> int:
+        """The number of bids placed, whatever their result."""
+        return sum(self.bids.values())
+
+    @property
+    def fill_rate(self) -> float:
+        """The fraction of bids that succeeded, or `0.0` if there were none."""
+        if not self.bid_count:
+            return 0.0
+        return self.bids[BidResult.BID_SUCCEEDED.value] / self.bid_count
+
+
+class _SimulatedListing:
+    __slots__ = (
+        "listing",
+        "start",
+        "initial_funded",
+        "funding_per_minute",
+        "amount_funded",
+        "last_updated",
+    )
+
+    def __init__(
+        self,
+        listing: Listing,
+        start: datetime,
+        initial_funded: Decimal,
+        funding_per_minute: Decimal,
+    ):
+        self.listing = listing
+        self.start = start
+        self.initial_funded = initial_funded
+        self.funding_per_minute = funding_per_minute
+        self.amount_funded = initial_funded
+        self.last_updated = start
+
+    def advance(self, now: datetime):
+        # Other investors fund the listing at a steady rate
+        minutes = Decimal((now - self.start).total_seconds()) / 60
+        amount_funded = min(
+            max(
+                self.initial_funded + self.funding_per_minute * minutes,
+                self.amount_funded,
+            ),
+            self.listing.listing_amount,
+        ).quantize(Decimal("0.01"))
+        if amount_funded != self.amount_funded:
+            self.amount_funded = amount_funded
+            self.last_updated = now
+
+    @property
+    def amount_remaining(self) -> Decimal:
+        return self.listing.listing_amount - self.amount_funded
+
+    @property
+    def biddable(self) -> bool:
+        return self.amount_remaining > 0
+
+    @property
+    def percent_funded(self) -> Decimal:
+        return (self.amount_funded / self.listing.listing_amount).quantize(
+            Decimal("0.0001")
+        )
+
+    @property
+    def listing_status(self) -> ListingStatus:
+        return ListingStatus.ACTIVE if self.biddable else ListingStatus.COMPLETED
+
+    def __getattr__(self, name):
+        # Everything that doesn't change as the listing is funded comes straight from the listing
+        return getattr(self.listing, name)
+
+    def to_listing(self) -> Listing:
+        return self.listing.model_copy(
+            update={
+                "amount_funded": self.amount_funded,
+                "amount_remaining": self.amount_remaining,
+                "percent_funded": self.percent_funded,
+                "listing_status": self.listing_status,
+                "biddable": self.biddable,
+                "last_updated_date": self.last_updated.strftime(
+                    LISTING_START_DATE_FORMAT
+                ),
+            }
+        )
+
+
+class SimulatedClient(Client):
+    """In-process stand-in for the Prosper API.
+
+    It answers the account, listing search, order, and note calls from simulated state instead of the live service, so
+    the bot, the strategies, and analytics can be exercised end to end with realistic volumes. Only the HTTP layer is
+    replaced; requests are built and responses parsed by the real client. New listings arrive as a Poisson process and
+    are funded by other investors over time, every request can be delayed and can fail with an HTTP error, and the
+    `stats` count the requests, injected errors, and bid results.
+
+    Listing searches support the filters the bot uses: `biddable`, `invested`, `prosper_rating`, `listing_number`,
+    `listing_term`, the `amount_remaining`, `lender_yield`, and `listing_start_date` ranges, sorting, and paging. Other
+    filters are ignored.
+    """
+
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        cash: Decimal = Decimal("1000.00"),
+        listings_per_minute: float = 1.0,
+        initial_listings: int = 20,
+        funding_time: timedelta = timedelta(hours=1),
+        note_count: int = 0,
+        latency: timedelta = timedelta(0),
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        sleeper: Callable[[float], Any] = sleep,
+    ):
+        """Creates a new simulated Prosper API.
+
+        Args:
+            config (Optional[Config]): The config to expose to callers that read it from the client. Omit to use an
+                empty one.
+            cash (Decimal): The starting cash balance.
+            listings_per_minute (float): The average rate at which new listings arrive.
+            initial_listings (int): How many listings are already open when the simulation starts.
+            funding_time (timedelta): The average time other investors take to fully fund a listing.
+            note_count (int): How many notes to generate for the account's history.
+            latency (timedelta): How long each request takes.
+            latency_jitter (float): How much the latency varies, as a fraction of `latency`.
+            error_rate (float): The probability that a request fails.
+            error_status (int): The HTTP status of failed requests.
+            seed (Optional[int]): Seeds the random generator, for reproducible runs.
+            clock (Callable[[], datetime]): Gets the current time, with a time zone.
+            sleeper (Callable[[float], Any]): Waits for the given number of seconds to simulate latency.
+        """
+        # The simulator answers requests itself, so it needs neither credentials nor an auth token
+        self._config = config if config is not None else Config({})
+        self._auth_token_manager = None
+
+        self.stats = SimulatorStats()
+        self._cash = Decimal(cash)
+        self._listings_per_minute = listings_per_minute
+        self._funding_time = funding_time
+        self._latency = latency
+        self._latency_jitter = latency_jitter
+        self._error_rate = error_rate
+        self._error_status = error_status
+        self._rng = random.Random(seed)
+        self._clock = clock
+        self._sleeper = sleeper
+        self._lock = Lock()
+
+        self._listings: Dict[int, _SimulatedListing] = {}
+        self._next_listing_number = 10_000_000
+        self._pending_bids: Counter = Counter()
+        self._order_count = 0
+
+        now = self._clock()
+        self._last_advanced = now
+        for _ in range(initial_listings):
+            self._add_listing(now - timedelta(minutes=self._rng.uniform(0, 30)))
+        self._notes = self._generate_notes(note_count, now)
+
+    def deposit(self, amount: Decimal):
+        """Adds cash to the account.
+
+        Args:
+            amount (Decimal): The amount to deposit.
+        """
+        with self._lock:
+            self._cash += Decimal(amount)
+
+    def _do_request(self, method, url, params=None, data=None):
+        endpoint = f"{method} {url}"
+        with self._lock:
+            self.stats.requests[endpoint] += 1
+        if self._latency:
+            self._sleeper(
+                self._latency.total_seconds()
+                * (1 + self._rng.uniform(-self._latency_jitter, self._latency_jitter))
+            )
+        if self._rng.random() < self._error_rate:
+            logger.debug(f"Injecting a {self._error_status} error into {endpoint}")
+            with self._lock:
+                self.stats.errors[endpoint] += 1
+            response = requests.Response()
+            response.status_code = self._error_status
+            response.url = url
+            response.reason = "Simulated error"
+            response.raise_for_status()
+
+        with self._lock:
+            self._advance(self._clock())
+            if url == self._ACCOUNT_API_URL:
+                return self._get_account().model_dump_json()
+            if url == self._SEARCH_API_URL:
+                return self._search_listings(params or {}).model_dump_json()
+            if url == self._NOTES_API_URL:
+                return self._list_notes(params or {}).model_dump_json()
+            if url == self._ORDERS_API_URL and method == "POST":
+                return self._order(data or {}).model_dump_json()
+
+        raise NotImplementedError(f"The simulator doesn't support {endpoint}")
+
+    def _advance(self, now: datetime):
+        elapsed_minutes = (now - self._last_advanced).total_seconds() / 60
+        if elapsed_minutes > 0 and self._listings_per_minute > 0:
+            arrival = self._last_advanced
+            while True:
+                arrival += timedelta(
+                    minutes=self._rng.expovariate(self._listings_per_minute)
+                )
+                if arrival > now:
+                    break
+                self._add_listing(arrival)
+        self._last_advanced = max(now, self._last_advanced)
+
+        for listing_number, listing in list(self._listings.items()):
+            if now - listing.start > _LISTING_DURATION:
+                del self._listings[listing_number]
+            elif listing.amount_remaining > 0:
+                listing.advance(now)
+
+    def _add_listing(self, start: datetime):
+        rating = self._rng.choices(
+            list(_RATING_WEIGHTS), weights=list(_RATING_WEIGHTS.values())
+        )[0]
+        lender_yield = Decimal(
+            str(round(_RATING_YIELDS[rating] + self._rng.uniform(-0.02, 0.02), 4))
+        )
+        listing_amount = Decimal(self._rng.randrange(2000, 35000, 100))
+        listing_number = self._next_listing_number
+        self._next_listing_number += 1
+        listing = Listing(
+            listing_number=listing_number,
+            prosper_rating=rating,
+            listing_title=f"Simulated listing {listing_number}",
+            listing_start_date=start.strftime(LISTING_START_DATE_FORMAT),
+            listing_creation_date=(start - timedelta(days=1)).strftime(
+                LISTING_START_DATE_FORMAT
+            ),
+            listing_status=ListingStatus.ACTIVE,
+            listing_status_reason="Active",
+            invested=False,
+            biddable=True,
+            has_mortgage=self._rng.random() < 0.4,
+            credit_bureau_values_transunion_indexed={
+                "g102s_months_since_most_recent_inquiry": 3,
+                "credit_report_date": start.strftime(LISTING_START_DATE_FORMAT),
+                "at02s_open_accounts": 8,
+                "g041s_accounts_30_or_more_days_past_due_ever": 0,
+                "g093s_number_of_public_records": 0,
+                "g094s_number_of_public_record_bankruptcies": 0,
+                "g095s_months_since_most_recent_public_record": -1,
+                "g218b_number_of_delinquent_accounts": 0,
+                "g980s_inquiries_in_the_last_6_months": 1,
+                "re20s_age_of_oldest_revolving_account_in_months": 120,
+                "s207s_months_since_most_recent_public_record_bankruptcy": -1,
+                "re33s_balance_owed_on_all_revolving_accounts": 5000,
+                "at57s_amount_delinquent": 0,
+                "g099s_public_records_last_24_months": 0,
+                "at20s_oldest_trade_open_date": 200,
+                "at03s_current_credit_lines": 10,
+                "re101s_revolving_balance": 5000,
+                "bc34s_bankcard_utilization": 0.3,
+                "at01s_credit_lines": 20,
+                "fico_score": self._rng.choice(list(FICOScore)),
+            },
+            employment_status_description=EmploymentStatus.EMPLOYED,
+            investment_type_description="Fractional",
+            last_updated_date=start.strftime(LISTING_START_DATE_FORMAT),
+            decision_bureau="TransUnion",
+            member_key=f"SIM{listing_number}",
+            borrower_state="CA",
+            co_borrower_application=False,
+            income_verifiable=True,
+            lender_yield=lender_yield,
+            borrower_rate=lender_yield + Decimal("0.01"),
+            listing_amount=listing_amount,
+            listing_term=self._rng.choice(_TERMS),
+        )
+        funding_minutes = max(
+            self._rng.expovariate(1) * self._funding_time.total_seconds() / 60, 1
+        )
+        self._listings[listing_number] = _SimulatedListing(
+            listing,
+            start,
+            (listing_amount * Decimal(self._rng.uniform(0, 0.5))).quantize(
+                Decimal("0.01")
+            ),
+            listing_amount / Decimal(funding_minutes),
+        )
+
+    def _generate_notes(self, count: int, now: datetime) -> List[Note]:
+        notes = []
+        for i in range(count):
+            rating = self._rng.choices(
+                list(_RATING_WEIGHTS), weights=list(_RATING_WEIGHTS.values())
+            )[0]
+            lender_yield = Decimal(str(_RATING_YIELDS[rating]))
+            term = self._rng.choice(_TERMS)
+            age_in_months = self._rng.randrange(0, 72)
+            origination_date = (now - timedelta(days=age_in_months * 30.4)).date()
+            amount = Decimal(self._rng.randrange(25, 101))
+            paid_fraction = Decimal(min(age_in_months / term, 1))
+            if self._rng.random() < _RATING_YIELDS[rating] / 2:
+                # Defaults are more likely for the riskier ratings
+                status = LoanStatus.CHARGED_OFF
+                paid_fraction *= Decimal(self._rng.uniform(0, 1))
+            elif paid_fraction >= 1:
+                status = LoanStatus.COMPLETED
+            else:
+                status = LoanStatus.CURRENT
+            principal_paid = (amount * paid_fraction).quantize(Decimal("0.01"))
+            principal_balance = (
+                amount - principal_paid if status == LoanStatus.CURRENT else 0
+            )
+            interest_paid = (principal_paid * lender_yield * term / 24).quantize(
+                Decimal("0.01")
+            )
+            loan_number = 1_000_000 + i
+            notes.append(
+                Note(
+                    origination_date=origination_date.isoformat(),
+                    principal_balance_pro_rata_share=principal_balance,
+                    service_fees_paid_pro_rata_share=0,
+                    principal_paid_pro_rata_share=principal_paid,
+                    interest_paid_pro_rata_share=interest_paid,
+                    prosper_fees_paid_pro_rata_share=0,
+                    late_fees_paid_pro_rata_share=0,
+                    collection_fees_paid_pro_rata_share=0,
+                    debt_sale_proceeds_received_pro_rata_share=0,
+                    platform_proceeds_net_received=0,
+                    next_payment_due_amount_pro_rata_share=(
+                        (amount / term).quantize(Decimal("0.01"))
+                        if status == LoanStatus.CURRENT
+                        else 0
+                    ),
+                    note_ownership_amount=amount,
+                    note_sale_gross_amount_received=0,
+                    note_sale_fees_paid=0,
+                    loan_note_id=f"{loan_number}-1",
+                    listing_number=loan_number,
+                    note_status=status,
+                    note_status_description=status.name,
+                    is_sold=False,
+                    is_sold_folio=False,
+                    loan_number=loan_number,
+                    amount_borrowed=amount * 100,
+                    borrower_rate=lender_yield + Decimal("0.01"),
+                    lender_yield=lender_yield,
+                    prosper_rating=rating,
+                    term=term,
+                    age_in_months=age_in_months,
+                    accrued_interest=0,
+                    payment_received=principal_paid + interest_paid,
+                    loan_settlement_status="Unspecified",
+                    loan_extension_status="Unspecified",
+                    loan_extension_term=0,
+                    is_in_bankruptcy=False,
+                    co_borrower_application=False,
+                    days_past_due=0,
+                    next_payment_due_date=(now + timedelta(days=15)).date().isoformat(),
+                    ownership_start_date=origination_date.isoformat(),
+                )
+            )
+        return notes
+
+    def _get_account(self) -> Account:
+        invested_notes = Counter()
+        outstanding_principal = Decimal(0)
+        for note in self._notes:
+            if note.note_status == LoanStatus.CURRENT:
+                invested_notes[
+                    note.prosper_rating.name
+                ] += note.principal_balance_pro_rata_share
+                outstanding_principal += note.principal_balance_pro_rata_share
+        pending_investments = sum(self._pending_bids.values(), Decimal(0))
+        total_account_value = self._cash + outstanding_principal + pending_investments
+        return Account(
+            available_cash_balance=self._cash,
+            pending_investments_primary_market=pending_investments,
+            pending_investments_secondary_market=0,
+            pending_quick_invest_orders=0,
+            total_principal_received_on_active_notes=0,
+            total_amount_invested_on_active_notes=outstanding_principal,
+            outstanding_principal_on_active_notes=outstanding_principal,
+            total_account_value=total_account_value,
+            pending_deposit=0,
+            last_deposit_amount=0,
+            last_deposit_date=self._last_advanced.strftime(LISTING_START_DATE_FORMAT),
+            last_withdraw_amount=0,
+            last_withdraw_date=self._last_advanced.strftime(LISTING_START_DATE_FORMAT),
+            external_user_id="SIMULATED",
+            prosper_account_digest="SIMULATED",
+            invested_notes={r: invested_notes[r] for r in AmountsByRating.model_fields},
+            pending_bids={
+                r: self._pending_bids[r] for r in AmountsByRating.model_fields
+            },
+        )
+
+    def _search_listings(self, params: Dict[str, Any]) -> SearchListingsResponse:
+        # Filter, sort, and page the simulated listings first so only the returned page is converted into models
+        now = self._last_advanced
+        matches_search = _SearchFilter(params)
+        listings = [
+            listing
+            for listing in self._listings.values()
+            if listing.start <= now and matches_search(listing)
+        ]
+
+        sort_by, sort_dir = (params.get("sort_by") or "lender_yield desc").split()
+        listings.sort(
+            key=lambda listing: _sort_key(getattr(listing, sort_by)),
+            reverse=sort_dir == "desc",
+        )
+        page = _page(listings, params, _LISTINGS_DEFAULT_LIMIT, _LISTINGS_MAX_LIMIT)
+        page["result"] = [listing.to_listing() for listing in page["result"]]
+        return SearchListingsResponse(**page)
+
+    def _list_notes(self, params: Dict[str, Any]) -> ListNotesResponse:
+        sort_by, sort_dir = (params.get("sort_by") or "prosper_rating desc").split()
+        notes = sorted(
+            self._notes,
+            key=lambda note: _sort_key(getattr(note, sort_by)),
+            reverse=sort_dir == "desc",
+        )
+        return ListNotesResponse(
+            **_page(notes, params, _NOTES_DEFAULT_LIMIT, _NOTES_MAX_LIMIT)
+        )
+
+    def _order(self, data: Dict[str, Any]) -> Order:
+        now = self._last_advanced
+        bid_requests = []
+        for bid_request in data.get("bid_requests", []):
+            listing_id = int(bid_request["listing_id"])
+            amount = Decimal(str(bid_request["bid_amount"]))
+            bid_result = self._bid(listing_id, amount)
+            self.stats.bids[bid_result.value] += 1
+            bid_requests.append(
+                BidRequest(
+                    listing_id=listing_id,
+                    bid_status=(
+                        BidStatus.PENDING
+                        if bid_result == BidResult.BID_SUCCEEDED
+                        else BidStatus.EXPIRED
+                    ),
+                    bid_amount=amount,
+                    bid_amount_placed=(
+                        amount if bid_result == BidResult.BID_SUCCEEDED else 0
+                    ),
+                    bid_result=bid_result,
+                )
+            )
+
+        self._order_count += 1
+        return Order(
+            order_id=f"SIM-{self._order_count}",
+            order_date=now.strftime(LISTING_START_DATE_FORMAT),
+            bid_requests=bid_requests,
+            order_status=OrderStatus.COMPLETED,
+            source=OrderSource.API,
+            order_amount=sum((b.bid_amount for b in bid_requests), Decimal(0)),
+            order_amount_placed=sum(
+                (b.bid_amount_placed for b in bid_requests), Decimal(0)
+            ),
+        )
+
+    def _bid(self, listing_id: int, amount: Decimal) -> BidResult:
+        listing = self._listings.get(listing_id)
+        if listing is None:
+            return BidResult.BID_FAILED
+        if listing.amount_remaining <= 0:
+            return BidResult.LISTING_NOT_BIDDABLE
+        if amount < MIN_BID:
+            return BidResult.AMOUNT_BID_TOO_LOW
+        if amount > listing.amount_remaining:
+            return BidResult.AMOUNT_BID_TOO_HIGH
+        if amount > self._cash:
+            return BidResult.INSUFFICIENT_FUNDS
+
+        self._cash -= amount
+        listing.amount_funded += amount
+        listing.listing = listing.listing.model_copy(update={"invested": True})
+        self._pending_bids[listing.listing.prosper_rating.name] += amount
+        self.stats.amount_invested += amount
+        return BidResult.BID_SUCCEEDED
+
+
+def _sort_key(value):
+    return getattr(value, "value", value)
+
+
+def _bool_param(value: Optional[str]) -> Optional[bool]:
+    return None if value is None else value == "true"
+
+
+def _list_param(value: Optional[str]) -> Optional[List[str]]:
+    return None if value is None else value.split(",")
+
+
+class _SearchFilter:
+    # Parses the search params once, rather than for every listing
+
+    def __init__(self, params: Dict[str, Any]):
+        self._flags = [
+            (field, _bool_param(params[field]))
+            for field in ["biddable", "invested"]
+            if params.get(field) is not None
+        ]
+        self._allowed_values = [
+            (field, set(_list_param(params[field])))
+            for field in ["prosper_rating", "listing_number", "listing_term"]
+            if params.get(field) is not None
+        ]
+        self._ranges = []
+        for field, convert in [
+            ("amount_remaining", Decimal),
+            ("lender_yield", Decimal),
+            ("listing_start_date", str),
+        ]:
+            minimum = params.get(f"{field}_min")
+            maximum = params.get(f"{field}_max")
+            if minimum is not None or maximum is not None:
+                self._ranges.append(
+                    (
+                        field,
+                        None if minimum is None else convert(minimum),
+                        None if maximum is None else convert(maximum),
+                    )
+                )
+
+    def __call__(self, listing: _SimulatedListing) -> bool:
+        for field, expected in self._flags:
+            if getattr(listing, field) != expected:
+                return False
+        for field, allowed in self._allowed_values:
+            if str(_sort_key(getattr(listing, field))) not in allowed:
+                return False
+        for field, minimum, maximum in self._ranges:
+            value = getattr(listing, field)
+            if minimum is not None and value < minimum:
+                return False
+            if maximum is not None and value > maximum:
+                return False
+
+        return True
+
+
+def _page(
+    results: List, params: Dict[str, Any], default_limit: int, max_limit: int
+) -> Dict[str, Any]:
+    offset = int(params.get("offset") or 0)
+    limit = min(int(params.get("limit") or default_limit), max_limit)
+    page = results[offset : offset + limit]
+    return {"result": page, "result_count": len(page), "total_count": len(results)}
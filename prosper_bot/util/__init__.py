@@ -4,8 +4,6 @@ from decimal import Decimal
 from numbers import Number
 from typing import Any, Callable, Dict, Hashable, Iterable
 
-import black
-
 logger = logging.getLogger(__file__)
 
 
@@ -38,6 +36,10 @@ def ppprint(o: Any) -> str:
     Returns:
         str: A formatted string representation of the value
     """
+    # black takes longer to import than the rest of the bot, so only load it when it's needed;
+    # the autoimport hook honours "fmt: skip", so it leaves the import here
+    import black  # fmt: skip
+
     return black.format_file_contents(repr_lambda(o), fast=False, mode=black.Mode())
 
 
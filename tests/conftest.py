@@ -0,0 +1,10 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from prosper_bot.simulator import ManualClock
+
+
+@pytest.fixture
+def clock():
+    return ManualClock(datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc))
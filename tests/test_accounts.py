@@ -0,0 +1,268 @@
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from prosper_api.models.enums import BidResult
+from prosper_shared.omni_config import Config
+
+from prosper_bot.accounts import MultiAccountRunner, load_account_config
+from prosper_bot.allocation_strategy import AllocationStrategies
+from prosper_bot.client import PooledClient
+from prosper_bot.recording import ReplayClient
+from prosper_bot.scheduler import CycleOutcome, FixedPollScheduler
+from prosper_bot.simulator import SimulatedClient
+
+_SHARED_CONFIG = {
+    "prosper-api": {"auth": {"token-cache": "/cache/token-cache"}},
+    "prosper-bot": {
+        "analytics": {"note-store": "/cache/notes.db"},
+        "bot": {"min-bid": Decimal("25.00"), "strategy": "AGGRESSIVE"},
+        "cli": {"profile-dir": "profiles"},
+    },
+}
+
+
+def _account_config(bot_config=None) -> Config:
+    return Config(
+        {
+            "prosper-bot": {
+                "cli": {"single-run": True},
+                "bot": {
+                    "max-orders-per-cycle": 4,
+                    "strategy": AllocationStrategies.OVERALL_HIGHEST_RATE,
+                    **(bot_config or {}),
+                },
+            }
+        }
+    )
+
+
+class TestLoadAccountConfig:
+    def test_load_account_config_json(self, tmp_path):
+        path = tmp_path / "first.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "prosper-api": {"credentials": {"username": "first-user"}},
+                    "prosper-bot": {
+                        "analytics": {"note-store": "/first/notes.db"},
+                        "bot": {"strategy": "CONSERVATIVE"},
+                    },
+                }
+            )
+        )
+
+        config = load_account_config(Config(_SHARED_CONFIG), str(path), "first")
+
+        assert config.get("prosper-api") == {
+            "auth": {"token-cache": "/cache/token-cache-first"},
+            "credentials": {"username": "first-user"},
+        }
+        assert config.get("prosper-bot") == {
+            "analytics": {"note-store": "/first/notes.db"},
+            "bot": {"min-bid": Decimal("25.00"), "strategy": "CONSERVATIVE"},
+            "cli": {"profile-dir": "profiles-first"},
+        }
+
+    def test_load_account_config_toml(self, tmp_path):
+        path = tmp_path / "second.toml"
+        path.write_text(
+            '[prosper-api.credentials]\nusername = "second-user"\n'
+            '[prosper-bot.bot]\nmetrics-file = "second.prom"\n'
+        )
+        shared_config = Config(_SHARED_CONFIG)
+
+        config = load_account_config(shared_config, str(path), "second")
+
+        assert config.get("prosper-api.credentials.username") == "second-user"
+        assert config.get("prosper-bot.bot.metrics-file") == "second.prom"
+        assert config.get("prosper-bot.bot.min-bid") == Decimal("25.00")
+        assert shared_config.get("prosper-api") == _SHARED_CONFIG["prosper-api"]
+        assert shared_config.get("prosper-bot") == _SHARED_CONFIG["prosper-bot"]
+
+    def test_load_account_config_when_unsupported(self, tmp_path):
+        with pytest.raises(ValueError):
+            load_account_config(Config({}), str(tmp_path / "first.ini"), "first")
+
+    def test_load_account_config_when_missing(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_account_config(Config({}), str(tmp_path / "first.json"), "first")
+
+
+class TestMultiAccountRunner:
+    @pytest.fixture
+    def clock(self):
+        now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        return lambda: now
+
+    @pytest.fixture
+    def sleeper(self, mocker):
+        return mocker.MagicMock(side_effect=[None] * 10 + [AssertionError()])
+
+    def test_run(self, clock, sleeper):
+        runner = MultiAccountRunner(
+            FixedPollScheduler(timedelta(minutes=1)), single_run=True, sleeper=sleeper
+        )
+        clients = {
+            "first": SimulatedClient(seed=3, cash=Decimal("100.00"), clock=clock),
+            "second": SimulatedClient(seed=4, cash=Decimal("50.00"), clock=clock),
+        }
+        for name, client in clients.items():
+            runner.add_account(name, _account_config(), client)
+
+        runner.run()
+
+        assert clients["first"].stats.bids == {BidResult.BID_SUCCEEDED.value: 4}
+        assert clients["second"].stats.bids == {BidResult.BID_SUCCEEDED.value: 2}
+        assert all(
+            client.get_account_info().available_cash_balance == 0
+            for client in clients.values()
+        )
+        # The accounts invested together in the first round, then the second round found them out of cash
+        assert [bot.metrics.cycles for bot in runner.bots.values()] == [2, 2]
+        sleeper.assert_called_once_with(5.0)
+
+    def test_run_round_rotates_accounts(self, mocker):
+        scheduler = mocker.MagicMock()
+        scheduler.next_poll.return_value = timedelta(seconds=5)
+        runner = MultiAccountRunner(scheduler)
+        order = []
+        for name in ["first", "second", "third"]:
+            bot = runner.add_account(name, _account_config(), mocker.MagicMock())
+            mocker.patch.object(
+                bot,
+                "_run_cycle",
+                side_effect=lambda cash, delay, name=name: (
+                    order.append(name),
+                    runner._schedulers[name].next_poll(
+                        CycleOutcome.INVESTED if name == "second" else CycleOutcome.IDLE
+                    ),
+                    (cash, delay),
+                )[-1],
+            )
+        cash = {"first": None, "second": None, "third": None}
+
+        delays = [runner._run_round(cash, timedelta(minutes=1)) for _ in range(3)]
+
+        assert order == [
+            "first",
+            "second",
+            "third",
+            "second",
+            "third",
+            "first",
+            "third",
+            "first",
+            "second",
+        ]
+        assert delays == [timedelta(seconds=5)] * 3
+        scheduler.next_poll.assert_called_with(CycleOutcome.INVESTED)
+        assert scheduler.next_poll.call_count == 3
+        assert all(s.delay == timedelta(seconds=5) for s in runner._schedulers.values())
+
+    def test_run_round_when_every_cycle_fails(self, mocker):
+        scheduler = mocker.MagicMock()
+        runner = MultiAccountRunner(scheduler)
+        client = mocker.MagicMock()
+        client.get_account_info.side_effect = Exception("Should be caught")
+        runner.add_account("first", _account_config(), client)
+
+        delay = runner._run_round({"first": None}, timedelta(minutes=2))
+
+        assert delay == timedelta(minutes=2)
+        scheduler.next_poll.assert_not_called()
+
+    def test_run_round_without_accounts(self, mocker):
+        scheduler = mocker.MagicMock()
+        runner = MultiAccountRunner(scheduler)
+
+        assert runner._run_round({}, timedelta(minutes=1)) == timedelta(minutes=1)
+
+    def test_run_when_interrupted(self, mocker, clock):
+        runner = MultiAccountRunner(
+            FixedPollScheduler(timedelta(minutes=1)), sleeper=mocker.MagicMock()
+        )
+        analyze_mock = mocker.patch("prosper_bot.accounts.analyze")
+        bot = runner.add_account(
+            "first",
+            _account_config({"analytics": True}),
+            SimulatedClient(seed=3, clock=clock),
+        )
+        mocker.patch.object(bot, "_run_cycle", side_effect=KeyboardInterrupt())
+        report_mock = mocker.patch.object(bot.latency, "report")
+
+        runner.run()
+
+        analyze_mock.assert_called_once_with(bot.client)
+        report_mock.assert_called_once()
+
+    def test_run_when_not_single_run(self, mocker, clock):
+        sleeper = mocker.MagicMock(side_effect=[None, KeyboardInterrupt()])
+        runner = MultiAccountRunner(
+            FixedPollScheduler(timedelta(minutes=1)), sleeper=sleeper
+        )
+        runner.add_account(
+            "first", _account_config(), SimulatedClient(seed=3, clock=clock)
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            runner.run()
+
+        assert sleeper.call_count == 2
+
+    def test_from_config(self, mocker, tmp_path):
+        (tmp_path / "first.json").write_text(
+            json.dumps({"prosper-api": {"credentials": {"username": "first-user"}}})
+        )
+        (tmp_path / "second.json").write_text(
+            json.dumps({"prosper-bot": {"bot": {"api-replay": str(tmp_path / "r")}}})
+        )
+        (tmp_path / "r").touch()
+        mocker.patch("prosper_api.client.AuthTokenManager")
+        session = mocker.MagicMock()
+        config = Config(
+            {
+                **_SHARED_CONFIG,
+                "prosper-bot": {
+                    **_SHARED_CONFIG["prosper-bot"],
+                    "bot": {
+                        "poll-scheduler": "FIXED",
+                        "accounts": f"{tmp_path / 'first.json'}, ,{tmp_path / 'second.json'}",
+                    },
+                    "cli": {"single-run": True},
+                },
+            }
+        )
+
+        runner = MultiAccountRunner.from_config(config, session)
+
+        assert list(runner.bots) == ["first", "second"]
+        assert runner.single_run
+        assert type(runner.scheduler) is FixedPollScheduler
+        first_client = runner.bots["first"].client._client
+        assert type(first_client) is PooledClient
+        assert first_client._session == session
+        assert first_client._config.get("prosper-api.credentials.username") == (
+            "first-user"
+        )
+        assert type(runner.bots["second"].client._client) is ReplayClient
+
+    def test_from_config_when_names_clash(self, mocker, tmp_path):
+        mocker.patch("prosper_api.client.AuthTokenManager")
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a" / "first.json").write_text("{}")
+        (tmp_path / "b" / "first.json").write_text("{}")
+        config = Config(
+            {
+                "prosper-bot": {
+                    "bot": {
+                        "accounts": f"{tmp_path / 'a' / 'first.json'},{tmp_path / 'b' / 'first.json'}"
+                    }
+                }
+            }
+        )
+
+        with pytest.raises(ValueError):
+            MultiAccountRunner.from_config(config)
@@ -1,4 +1,8 @@
+import logging
 from decimal import Decimal
+from itertools import islice
+from threading import Event
+from time import sleep
 
 import pytest
 from prosper_api.client import Client
@@ -16,13 +20,18 @@ from prosper_api.models.enums import (
 )
 
 from prosper_bot.allocation_strategy import (
+    DEFAULT_MAX_CONCURRENT_SEARCHES,
+    DEFAULT_SEARCH_PARAMS,
+    AllocationState,
     AllocationStrategies,
     AllocationStrategy,
     FixedTargetAllocationStrategy,
     HighestMatchingRateAllocationStrategy,
-    _search_params,
-    set_search_param,
+    plan_allocation,
 )
+from prosper_bot.listing_index import SeenListingIndex
+from prosper_bot.scoring import field
+from prosper_bot.simulator import SimulatedClient
 
 
 class TestAllocationStrategy:
@@ -177,6 +186,188 @@ class TestAllocationStrategy:
             0,
         ]
 
+    def test_allocation_strategy_with_seen_listings(self, mock_client):
+        seen_listings = SeenListingIndex()
+        seen_listings.mark_invested(3)
+
+        first_poll = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter([SearchListingsRequest()]),
+            local_sort=lambda listing: -listing.lender_yield,
+            seen_listings=seen_listings,
+        )
+        assert [listing.listing_number for listing in first_poll] == [
+            9,
+            8,
+            7,
+            6,
+            5,
+            4,
+            2,
+            1,
+            0,
+        ]
+
+        mock_client.search_listings.side_effect = lambda x: SearchListingsResponse(
+            result=[
+                self.minimal_listing(listing_num).model_copy(
+                    update={"amount_remaining": 100.0} if listing_num == 5 else {}
+                )
+                for listing_num in range(10)
+            ],
+            result_count=10,
+            total_count=10,
+        )
+        second_poll = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter([SearchListingsRequest()]),
+            local_sort=lambda listing: -listing.lender_yield,
+            seen_listings=seen_listings,
+        )
+        assert [listing.listing_number for listing in second_poll] == [
+            9,
+            8,
+            7,
+            6,
+            5,
+            4,
+            2,
+            1,
+            0,
+        ]
+
+    def test_allocation_strategy_with_concurrent_searches(self, mock_client):
+        api_params = [SearchListingsRequest(offset=i) for i in range(3)]
+
+        def search_listings(request):
+            # Make the searches finish in the reverse order they were requested
+            sleep((3 - request.offset) * 0.05)
+            return SearchListingsResponse(
+                result=[
+                    self.minimal_listing(request.offset * 10 + i) for i in range(2)
+                ],
+                result_count=2,
+                total_count=2,
+            )
+
+        mock_client.search_listings.side_effect = search_listings
+
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter(api_params),
+            max_concurrent_searches=3,
+        )
+
+        assert next(allocation_strategy).listing_number == 0
+        assert mock_client.search_listings.call_count == 3
+        assert [listing.listing_number for listing in allocation_strategy] == [
+            1,
+            10,
+            11,
+            20,
+            21,
+        ]
+        assert mock_client.search_listings.call_count == 3
+
+    def test_allocation_strategy_with_concurrent_searches_in_batches(self, mock_client):
+        api_params = [SearchListingsRequest(offset=i) for i in range(3)]
+
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter(api_params),
+            max_concurrent_searches=2,
+        )
+
+        assert len(list(allocation_strategy)) == 30
+        assert [
+            c.args[0].offset for c in mock_client.search_listings.call_args_list
+        ] == [0, 1, 2]
+
+    def test_allocation_strategy_with_prefetch(self, mock_client):
+        api_params = [SearchListingsRequest(offset=i) for i in range(3)]
+
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter(api_params),
+            prefetch_depth=1,
+        )
+
+        assert next(allocation_strategy).listing_number == 0
+        assert [
+            f.result()[0].offset for f in allocation_strategy._pending_searches
+        ] == [1]
+        assert len(list(allocation_strategy)) == 29
+        assert [
+            c.args[0].offset for c in mock_client.search_listings.call_args_list
+        ] == [0, 1, 2]
+        assert allocation_strategy._executor is None
+
+    def test_allocation_strategy_with_prefetch_timeout(self, mock_client):
+        api_params = [SearchListingsRequest(offset=i) for i in range(3)]
+        searching = Event()
+        mock_client.search_listings.side_effect = lambda r: searching.wait(5)
+
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter(api_params),
+            timeout_seconds=0.1,
+            prefetch_depth=2,
+        )
+
+        try:
+            with pytest.raises(StopIteration):
+                next(allocation_strategy)
+            assert allocation_strategy._executor is None
+        finally:
+            searching.set()
+
+    def test_allocation_strategy_close_cancels_searches(self, mocker, mock_client):
+        api_params = [SearchListingsRequest(offset=i) for i in range(3)]
+
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            search_request_iterator=iter(api_params),
+            prefetch_depth=2,
+        )
+        next(allocation_strategy)
+        executor = allocation_strategy._executor
+        shutdown_spy = mocker.spy(executor, "shutdown")
+        pending_searches = list(allocation_strategy._pending_searches)
+
+        del allocation_strategy
+
+        shutdown_spy.assert_called_once_with(wait=False, cancel_futures=True)
+        # A search that was already running can't be cancelled, but is left to finish
+        assert all(f.cancelled() or f.running() or f.done() for f in pending_searches)
+
+    def test_allocation_strategy_with_scorer(self, mock_client):
+        allocation_strategy = AllocationStrategy(
+            mock_client,
+            iter([SearchListingsRequest()]),
+            local_sort=lambda listing: listing.listing_number % 2,
+            scorer=(-field("lender_yield")).where(lambda c: c.lender_yield < 5),
+        )
+
+        # The scorer ranks the page and drops what it doesn't score; the local sort only breaks ties
+        assert [listing.listing_number for listing in allocation_strategy] == [
+            0,
+            1,
+            2,
+            3,
+            4,
+        ]
+
+    @pytest.mark.parametrize("strategy_enum", list(AllocationStrategies))
+    def test_allocation_strategies_to_strategy_with_scorer(
+        self, mock_client, strategy_enum
+    ):
+        scorer = -field("lender_yield")
+
+        strategy = strategy_enum.to_strategy(mock_client, scorer=scorer)
+
+        assert strategy._scorer is scorer
+        assert next(strategy).listing_number == 0
+
     def test_highest_allocation_strategy(self, mock_client):
         allocation_strategy = HighestMatchingRateAllocationStrategy(mock_client)
 
@@ -199,6 +390,233 @@ class TestAllocationStrategy:
             [ProsperRating.A],
         ]
 
+    @pytest.fixture
+    def rating_c_client(self, mock_client):
+        mock_client.search_listings.side_effect = (
+            lambda request: SearchListingsResponse(
+                result=(
+                    [self.minimal_listing(1)]
+                    if request.prosper_rating == [ProsperRating.C]
+                    else []
+                ),
+                result_count=0,
+                total_count=0,
+            )
+        )
+        return mock_client
+
+    def test_fixed_target_allocation_strategy_searches_lazily(self, rating_c_client):
+        allocation_strategy = FixedTargetAllocationStrategy(
+            rating_c_client,
+            AllocationStrategies.AGGRESSIVE.value[1],
+            max_concurrent_searches=1,
+        )
+
+        assert next(allocation_strategy).listing_number == 1
+        # A single bid stops searching at the first rating with listings
+        assert allocation_strategy._executor is None
+        assert (
+            rating_c_client.search_listings.call_count
+            == [r.prosper_rating for r in allocation_strategy._search_requests].index(
+                [ProsperRating.C]
+            )
+            + 1
+        )
+        assert allocation_strategy._search_request.prosper_rating == [ProsperRating.C]
+
+    @pytest.mark.parametrize(
+        "bid_amounts", [None, [Decimal("25.00"), Decimal("25.00")]]
+    )
+    def test_fixed_target_allocation_strategy_searches_concurrently(
+        self, rating_c_client, bid_amounts
+    ):
+        allocation_strategy = FixedTargetAllocationStrategy(
+            rating_c_client,
+            AllocationStrategies.AGGRESSIVE.value[1],
+            bid_amounts=bid_amounts,
+        )
+
+        list(allocation_strategy)
+
+        # Single bids and batches alike search a few ratings at a time
+        assert (
+            allocation_strategy._max_concurrent_searches
+            == DEFAULT_MAX_CONCURRENT_SEARCHES
+        )
+        assert rating_c_client.search_listings.call_count == 7
+
+    def test_fixed_target_allocation_strategy_with_account(self, mock_client):
+        allocation_strategy = FixedTargetAllocationStrategy(
+            mock_client,
+            AllocationStrategies.CONSERVATIVE.value[1],
+            account=self.TEST_ACCOUNT,
+        )
+
+        mock_client.get_account_info.assert_not_called()
+        assert allocation_strategy._search_requests[0].prosper_rating == [
+            ProsperRating.A
+        ]
+
+    def test_allocation_state_apply_order(self):
+        state = AllocationState()
+        state.sync(self.TEST_ACCOUNT)
+        listing = self.minimal_listing(1).model_copy(
+            update={"prosper_rating": ProsperRating.A}
+        )
+
+        state.apply_order([(listing, Decimal("25.00")), (listing, Decimal("30.00"))])
+
+        assert state.values["A"] == Decimal("415.112822")
+        assert state.values["AA"] == Decimal("357.569852")
+        assert state.total_value == self.TEST_ACCOUNT.total_account_value
+        assert state._cash == Decimal("-54.999442")
+        assert state._pending_investments == Decimal("105.17")
+
+    @pytest.mark.parametrize(
+        ["order_amount", "update", "expected_rebuilt"],
+        [
+            # Nothing happened
+            (None, {}, False),
+            # The bot's own order changed the digest, and left the cash where it expected
+            (Decimal("25.00"), {"prosper_account_digest": "changed"}, False),
+            # Something else changed the account
+            (None, {"prosper_account_digest": "changed"}, True),
+            (None, {"available_cash_balance": Decimal("100.00")}, True),
+            # The order didn't go through
+            (Decimal("25.00"), {"available_cash_balance": Decimal("25.00")}, True),
+        ],
+    )
+    def test_allocation_state_sync(self, order_amount, update, expected_rebuilt):
+        state = AllocationState()
+        account = self.TEST_ACCOUNT.model_copy(
+            update={"available_cash_balance": Decimal("25.00")}
+        )
+        assert state.sync(account)
+        if order_amount is not None:
+            listing = self.minimal_listing(1).model_copy(
+                update={"prosper_rating": ProsperRating.A}
+            )
+            state.apply_order([(listing, order_amount)])
+            account = account.model_copy(
+                update={"available_cash_balance": Decimal("0.00")}
+            )
+
+        assert state.sync(account.model_copy(update=update)) == expected_rebuilt
+        assert state.reconciliations == (2 if expected_rebuilt else 1)
+        # Once in sync, an unchanged account is never rebuilt
+        assert not state.sync(account.model_copy(update=update))
+
+    def test_fixed_target_allocation_strategy_with_allocation_state(
+        self, caplog, mock_client
+    ):
+        caplog.set_level("DEBUG")
+        state = AllocationState()
+        targets = AllocationStrategies.CONSERVATIVE.value[1]
+
+        FixedTargetAllocationStrategy(
+            mock_client, targets, account=self.TEST_ACCOUNT, allocation_state=state
+        )
+        FixedTargetAllocationStrategy(
+            mock_client, targets, account=self.TEST_ACCOUNT, allocation_state=state
+        )
+
+        assert [
+            r.levelname for r in caplog.records if "Total value" in r.getMessage()
+        ] == ["INFO", "DEBUG"]
+        assert state.reconciliations == 1
+
+    def test_allocation_state_log_when_disabled(self, caplog):
+        caplog.set_level("INFO")
+        state = AllocationState()
+        state.sync(self.TEST_ACCOUNT)
+
+        state.log({}, logging.DEBUG)
+
+        assert caplog.records == []
+
+    @pytest.fixture
+    def rated_listings_client(self, mock_client):
+        # Two listings per rating, numbered by rating: 10 and 11 for the first rating, 20 and 21 for the second, etc.
+        ratings = list(ProsperRating)
+        mock_client.search_listings.side_effect = (
+            lambda request: SearchListingsResponse(
+                result=[
+                    self.minimal_listing(
+                        (ratings.index(request.prosper_rating[0]) + 1) * 10 + i
+                    ).model_copy(update={"prosper_rating": request.prosper_rating[0]})
+                    for i in range(2)
+                ],
+                result_count=2,
+                total_count=2,
+            )
+        )
+        return mock_client
+
+    @pytest.mark.parametrize(
+        ["bid_amounts", "expected_ratings"],
+        [
+            # Without a batch, listings come from the rating furthest below its target first
+            (None, ["A", "A", "AA", "AA"]),
+            ([Decimal("1000.00")], ["A", "A", "AA", "AA"]),
+            # A batch is spread over the ratings as each bid changes their errors, and ends with the last bid
+            ([Decimal("1000.00")] * 3, ["A", "AA", "B"]),
+            ([Decimal("25.00")] * 3, ["A", "A", "AA"]),
+        ],
+    )
+    def test_fixed_target_allocation_strategy_with_bid_amounts(
+        self, rated_listings_client, bid_amounts, expected_ratings
+    ):
+        allocation_strategy = FixedTargetAllocationStrategy(
+            rated_listings_client,
+            AllocationStrategies.CONSERVATIVE.value[1],
+            account=self.TEST_ACCOUNT,
+            bid_amounts=bid_amounts,
+        )
+
+        assert [
+            listing.prosper_rating.name for listing in islice(allocation_strategy, 4)
+        ] == expected_ratings
+
+    def test_plan_allocation(self):
+        listings = {
+            rating: [
+                self.minimal_listing(i * 10 + j).model_copy(
+                    update={"prosper_rating": ProsperRating[rating]}
+                )
+                for j in range(count)
+            ]
+            for i, (rating, count) in enumerate([("A", 3), ("B", 1), ("C", 0)])
+        }
+
+        bids = plan_allocation(
+            {"A": 0.0, "B": Decimal("10.00")},
+            {"A": Decimal("0.5"), "B": Decimal("0.5"), "C": Decimal("0.5")},
+            Decimal("100.00"),
+            [Decimal("30.00"), Decimal("20.00"), Decimal("20.00"), Decimal("20.00")],
+            listings,
+        )
+
+        # A is furthest below its target, then B; once B runs out of listings, the rest go to A
+        assert [(listing.listing_number, amount) for listing, amount in bids] == [
+            (0, Decimal("30.00")),
+            (10, Decimal("20.00")),
+            (1, Decimal("20.00")),
+            (2, Decimal("20.00")),
+        ]
+
+    def test_plan_allocation_without_enough_candidates(self):
+        bids = plan_allocation(
+            {"A": 0.0},
+            {"A": Decimal("1.0")},
+            Decimal("100.00"),
+            [Decimal("25.00")] * 3,
+            {"A": [self.minimal_listing(1)]},
+        )
+
+        assert [(listing.listing_number, amount) for listing, amount in bids] == [
+            (1, Decimal("25.00"))
+        ]
+
     @pytest.mark.parametrize(
         ["strategy_enum", "expected_class", "expected_search_request"],
         [
@@ -240,21 +658,142 @@ class TestAllocationStrategy:
     def test_allocation_strategies_to_strategy(
         self, mock_client, strategy_enum, expected_class, expected_search_request
     ):
-        strategy = strategy_enum.to_strategy(mock_client)
+        seen_listings = SeenListingIndex()
+        strategy = strategy_enum.to_strategy(mock_client, seen_listings=seen_listings)
 
         assert isinstance(strategy, expected_class)
+        assert strategy._seen_listings is seen_listings
         assert strategy._search_requests == [
-            SearchListingsRequest(**{**_search_params, **r})
-            for r in expected_search_request
+            DEFAULT_SEARCH_PARAMS.to_request(**r) for r in expected_search_request
         ]
 
-    def test_set_search_param(self):
-        set_search_param("random_param", 100)
-        assert _search_params == {
-            "biddable": True,
-            "invested": False,
-            "limit": 10,
-            "random_param": 100,
-            "sort_by": "lender_yield",
-            "sort_dir": "desc",
+    @pytest.mark.parametrize("strategy_enum", list(AllocationStrategies))
+    def test_allocation_strategies_to_strategy_searches_inline(
+        self, mock_client, strategy_enum
+    ):
+        strategy = strategy_enum.to_strategy(mock_client, max_concurrent_searches=1)
+
+        assert strategy._executor is None
+
+    @pytest.mark.parametrize(
+        ["strategy_enum", "expected_depth"],
+        [
+            (AllocationStrategies.AGGRESSIVE, 2),
+            (AllocationStrategies.CONSERVATIVE, 2),
+            # A single search has nothing to prefetch
+            (AllocationStrategies.OVERALL_HIGHEST_RATE, 0),
+        ],
+    )
+    def test_allocation_strategies_to_strategy_with_prefetch(
+        self, mock_client, strategy_enum, expected_depth
+    ):
+        strategy = strategy_enum.to_strategy(mock_client, prefetch_depth=2)
+
+        assert strategy._prefetch_depth == expected_depth
+
+    def test_search_params(self):
+        search_params = DEFAULT_SEARCH_PARAMS._replace(
+            amount_remaining_max=Decimal("30.00")
+        )
+
+        assert search_params.to_request(prosper_rating=[ProsperRating.A]) == (
+            SearchListingsRequest(
+                limit=10,
+                biddable=True,
+                invested=False,
+                sort_by="lender_yield",
+                sort_dir="desc",
+                amount_remaining_max=Decimal("30.00"),
+                prosper_rating=[ProsperRating.A],
+            )
+        )
+        assert DEFAULT_SEARCH_PARAMS.amount_remaining_max is None
+
+    def test_search_params_with_constraints(self):
+        search_params = DEFAULT_SEARCH_PARAMS._replace(
+            prosper_rating=("NA", "AA"),
+            listing_term=(36,),
+            lender_yield_min=Decimal("0.10"),
+            lender_yield_max=Decimal("0.20"),
+            amount_remaining_min=Decimal("25.00"),
+        )
+
+        request = search_params.to_request()
+
+        assert request.prosper_rating == [ProsperRating.NA, ProsperRating.AA]
+        assert request.listing_term == [36]
+        assert request.lender_yield_min == Decimal("0.10")
+        assert request.lender_yield_max == Decimal("0.20")
+        assert request.amount_remaining_min == Decimal("25.00")
+        # A single search narrows the ratings down further
+        assert search_params.to_request(prosper_rating=[ProsperRating.AA]) == (
+            request.model_copy(update={"prosper_rating": [ProsperRating.AA]})
+        )
+        assert search_params.allows_rating("AA")
+        assert not search_params.allows_rating("A")
+        assert DEFAULT_SEARCH_PARAMS.allows_rating("A")
+
+    def test_fixed_target_allocation_strategy_with_rating_constraint(
+        self, rated_listings_client
+    ):
+        allocation_strategy = FixedTargetAllocationStrategy(
+            rated_listings_client,
+            AllocationStrategies.CONSERVATIVE.value[1],
+            account=self.TEST_ACCOUNT,
+            search_params=DEFAULT_SEARCH_PARAMS._replace(prosper_rating=("B", "C")),
+        )
+
+        assert [r.prosper_rating for r in allocation_strategy._search_requests] == [
+            [ProsperRating.B],
+            [ProsperRating.C],
+        ]
+        assert {listing.prosper_rating.name for listing in allocation_strategy} == {
+            "B",
+            "C",
         }
+
+    @pytest.mark.parametrize("strategy_enum", list(AllocationStrategies))
+    def test_allocation_strategies_to_strategy_with_local_filter(
+        self, mock_client, strategy_enum
+    ):
+        strategy = strategy_enum.to_strategy(
+            mock_client, local_filter=lambda listing: listing.listing_number % 3 == 0
+        )
+
+        assert [listing.listing_number for listing in islice(strategy, 4)] == [
+            0,
+            3,
+            6,
+            9,
+        ]
+
+    def test_search_params_are_pushed_down(self):
+        client = SimulatedClient(seed=3, initial_listings=200)
+        search_params = DEFAULT_SEARCH_PARAMS._replace(
+            limit=500,
+            listing_term=(36,),
+            lender_yield_min=Decimal("0.15"),
+        )
+
+        listings = list(
+            HighestMatchingRateAllocationStrategy(client, search_params=search_params)
+        )
+
+        assert listings
+        assert all(
+            listing.listing_term == 36 and listing.lender_yield >= Decimal("0.15")
+            for listing in listings
+        )
+        assert len(listings) < len(
+            client.search_listings(SearchListingsRequest(limit=500)).result
+        )
+
+    @pytest.mark.parametrize("strategy_enum", list(AllocationStrategies))
+    def test_allocation_strategies_to_strategy_with_search_params(
+        self, mock_client, strategy_enum
+    ):
+        search_params = DEFAULT_SEARCH_PARAMS._replace(limit=3)
+
+        strategy = strategy_enum.to_strategy(mock_client, search_params=search_params)
+
+        assert all(r.limit == 3 for r in strategy._search_requests)
@@ -1,8 +1,64 @@
+from datetime import date
+
+import numpy as np
 import pytest
 from prosper_api.models import ListNotesResponse, Note
 from prosper_api.models.enums import LoanStatus
 
 from prosper_bot.analytics import analyze
+from prosper_bot.analytics.irr import _NoteColumns
+from prosper_bot.note_store import NoteStore
+
+
+def _note(
+    loan_note_id,
+    origination_date,
+    prosper_rating,
+    note_status,
+    note_ownership_amount,
+    principal_balance,
+    principal_paid,
+    interest_paid,
+):
+    return Note(
+        origination_date=origination_date,
+        principal_balance_pro_rata_share=principal_balance,
+        service_fees_paid_pro_rata_share=0.0,
+        principal_paid_pro_rata_share=principal_paid,
+        interest_paid_pro_rata_share=interest_paid,
+        prosper_fees_paid_pro_rata_share=0.0,
+        late_fees_paid_pro_rata_share=0.0,
+        collection_fees_paid_pro_rata_share=0.0,
+        debt_sale_proceeds_received_pro_rata_share=0.0,
+        platform_proceeds_net_received=0.0,
+        next_payment_due_amount_pro_rata_share=0.0,
+        note_ownership_amount=note_ownership_amount,
+        note_sale_gross_amount_received=0.0,
+        note_sale_fees_paid=0.0,
+        loan_note_id=loan_note_id,
+        listing_number=111111,
+        note_status=note_status,
+        note_status_description=note_status.name,
+        is_sold=False,
+        is_sold_folio=False,
+        loan_number=11111,
+        amount_borrowed=5000.0,
+        borrower_rate=0.25,
+        lender_yield=0.24,
+        prosper_rating=prosper_rating,
+        term=36,
+        age_in_months=12,
+        accrued_interest=0.0,
+        payment_received=0.0,
+        loan_settlement_status="Unspecified",
+        loan_extension_status="Unspecified",
+        loan_extension_term=0,
+        is_in_bankruptcy=False,
+        co_borrower_application=False,
+        days_past_due=0,
+        next_payment_due_date="2024-01-01",
+        ownership_start_date=origination_date,
+    )
 
 
 class TestAnalytics:
@@ -62,13 +118,106 @@ class TestAnalytics:
         )
 
         with caplog.at_level("INFO"):
-            analyze(client_mock)
+            analyze(client_mock, NoteStore(":memory:"))
 
-        assert len(caplog.records) == 4
-        assert caplog.records[0].message in ["Overall IRR: 3.92%", "Overall IRR: 3.93%"]
-        assert caplog.records[1].message in [
+        assert len(caplog.records) == 5
+        assert caplog.records[0].message == (
+            "Synced notes: 1 new or changed of 1 fetched"
+        )
+        assert caplog.records[1].message in ["Overall IRR: 3.92%", "Overall IRR: 3.93%"]
+        assert caplog.records[2].message in [
             "IRR for N/A: 3.92%",
             "IRR for N/A: 3.93%",
         ]
-        assert caplog.records[2].message == "Oldest active note date: 2021-01-02"
-        assert caplog.records[3].message == "Newest active note date: 2021-01-02"
+        assert caplog.records[3].message == "Oldest active note date: 2021-01-02"
+        assert caplog.records[4].message == "Newest active note date: 2021-01-02"
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+    def test_analytics_by_rating(self, mocker, client_mock, caplog, chunk_size):
+        class _Today(date):
+            @classmethod
+            def today(cls):
+                return cls(2024, 1, 1)
+
+        mocker.patch("prosper_bot.analytics.irr.date", _Today)
+        mocker.patch("prosper_bot.analytics.irr._CHUNK_SIZE", chunk_size)
+        xirr_calls = []
+        mocker.patch(
+            "prosper_bot.analytics.irr.xirr",
+            side_effect=lambda dates, cashflows: xirr_calls.append(
+                (np.datetime_as_string(dates).tolist(), cashflows.tolist())
+            )
+            or 0.1,
+        )
+        client_mock._config.get.return_value = None
+        client_mock.list_notes.return_value = ListNotesResponse(
+            result=[
+                _note("1-1", "2021-01-01", "A", LoanStatus.CURRENT, 25, 20, 5, 1),
+                _note("2-1", "2021-02-01", "B", LoanStatus.CHARGED_OFF, 50, 40, 10, 2),
+                _note("3-1", "2021-03-01", "A", LoanStatus.COMPLETED, 25, 5, 15, 3),
+                _note("4-1", "2021-01-01", "A", LoanStatus.CURRENT, 25, 25, 0, 2),
+            ],
+            result_count=4,
+            total_count=4,
+        )
+
+        with caplog.at_level("INFO"):
+            analyze(client_mock, NoteStore(":memory:"))
+
+        assert xirr_calls == [
+            (
+                ["2021-01-01", "2021-02-01", "2021-03-01", "2024-01-01"],
+                [-50.0, -50.0, -25.0, 83.0],
+            ),
+            (["2021-01-01", "2021-03-01", "2024-01-01"], [-50.0, -25.0, 71.0]),
+            (["2021-02-01", "2024-01-01"], [-50.0, 52.0]),
+        ]
+        assert [r.message for r in caplog.records[1:]] == [
+            "Overall IRR: 10.00%",
+            "IRR for A: 10.00%",
+            "IRR for B: 10.00%",
+            "Oldest active note date: 2021-01-01",
+            "Newest active note date: 2021-01-01",
+        ]
+
+    def test_analytics_opens_configured_note_store(self, mocker, client_mock):
+        note_store_mock = mocker.patch("prosper_bot.analytics.NoteStore")
+        analyze_mock = mocker.patch("prosper_bot.analytics._analyze")
+        client_mock._config.get.side_effect = lambda key: (
+            "/some/path/to/notes.db" if key.endswith("note-store") else None
+        )
+
+        analyze(client_mock)
+
+        note_store_mock.assert_called_once_with("/some/path/to/notes.db")
+        analyze_mock.assert_called_once_with(
+            client_mock,
+            note_store_mock.return_value.__enter__.return_value,
+            "2006-01-05",
+        )
+        note_store_mock.return_value.__exit__.assert_called_once()
+
+    def test_analytics_without_active_notes(self, mocker, client_mock, caplog):
+        mocker.patch("prosper_bot.analytics.irr.xirr", return_value=0.1)
+        client_mock._config.get.return_value = None
+        client_mock.list_notes.return_value = ListNotesResponse(
+            result=[
+                _note("1-1", "2021-01-01", "A", LoanStatus.COMPLETED, 25, 0, 25, 1),
+            ],
+            result_count=1,
+            total_count=1,
+        )
+
+        with caplog.at_level("INFO"):
+            analyze(client_mock, NoteStore(":memory:"))
+
+        assert [r.message for r in caplog.records[-2:]] == [
+            "Oldest active note date: None",
+            "Newest active note date: None",
+        ]
+
+    def test_note_columns_when_empty(self):
+        columns = _NoteColumns.from_notes([])
+
+        assert all(len(c) == 0 for c in columns)
+        assert len(columns.received()) == 0
@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from prosper_api.models import SearchListingsRequest
+from prosper_api.models.enums import SearchListingsSortBy, SortOrder
+
+from prosper_bot.allocation_strategy import AllocationStrategies
+from prosper_bot.backtest import (
+    Backtester,
+    BacktestResult,
+    ListingSnapshot,
+    Purchase,
+    _ListingFeed,
+    load_snapshots,
+    main,
+    save_snapshots,
+    simulate_snapshots,
+)
+
+_TIMESTAMP = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    return list(simulate_snapshots(50, seed=11))
+
+
+class TestListingFeed:
+    @pytest.fixture
+    def listings(self, snapshots):
+        return snapshots[0].listings
+
+    @pytest.fixture
+    def invested(self):
+        return set()
+
+    @pytest.fixture
+    def feed(self, listings, invested):
+        feed = _ListingFeed(invested)
+        by_rating = {}
+        for listing in listings:
+            by_rating.setdefault(listing.prosper_rating.name, []).append(listing)
+        feed.load(by_rating)
+        return feed
+
+    def test_search_listings(self, feed, listings):
+        response = feed.search_listings(SearchListingsRequest(limit=500))
+
+        assert response.result == sorted(
+            listings, key=lambda listing: listing.lender_yield, reverse=True
+        )
+        assert response.result_count == len(listings)
+
+    def test_search_listings_sorts_and_pages(self, feed, listings):
+        response = feed.search_listings(
+            SearchListingsRequest(
+                sort_by=SearchListingsSortBy.LISTING_NUMBER,
+                sort_dir=SortOrder.ASCENDING,
+                offset=2,
+                limit=3,
+            )
+        )
+
+        assert [listing.listing_number for listing in response.result] == sorted(
+            listing.listing_number for listing in listings
+        )[2:5]
+
+    def test_search_listings_filters(self, feed, listings, invested):
+        listing = listings[0]
+        rating = listing.prosper_rating
+
+        def search(**kwargs):
+            return [
+                listing.listing_number
+                for listing in feed.search_listings(
+                    SearchListingsRequest(limit=500, **kwargs)
+                ).result
+            ]
+
+        assert search(prosper_rating=[rating]) == [
+            other.listing_number
+            for other in sorted(
+                listings, key=lambda other: other.lender_yield, reverse=True
+            )
+            if other.prosper_rating == rating
+        ]
+        assert search(
+            listing_number=[listing.listing_number],
+            amount_remaining_min=listing.amount_remaining,
+            amount_remaining_max=listing.amount_remaining,
+        ) == [listing.listing_number]
+        assert search(lender_yield_max=Decimal("-1")) == []
+        assert search(biddable=False) == []
+        assert search(invested=True) == []
+        assert len(search(invested=None)) == len(listings)
+
+        invested.add(listing.listing_number)
+
+        assert search(invested=True) == [listing.listing_number]
+        assert listing.listing_number not in search(invested=False)
+
+
+class TestBacktester:
+    @pytest.mark.parametrize("strategy", list(AllocationStrategies))
+    def test_run(self, snapshots, strategy):
+        backtester = Backtester(
+            snapshots,
+            cash=Decimal("100.00"),
+            deposit_per_cycle=Decimal("25.00"),
+            max_orders_per_cycle=2,
+            invested={"AA": Decimal("500.00")},
+        )
+
+        result = backtester.run(strategy)
+
+        assert result.strategy == strategy
+        assert result.cycles == 50
+        assert len(result.purchases) > 0
+        assert len({p.listing_number for p in result.purchases}) == len(
+            result.purchases
+        )
+        spent = sum(p.amount for p in result.purchases)
+        assert result.cash == Decimal("100.00") + 50 * Decimal("25.00") - spent
+        assert sum(result.invested.values()) == Decimal("500.00") + spent
+        assert sum(result.rating_mix.values()) == spent
+        assert result.cycles_per_second > 0
+        # Runs don't affect each other
+        assert backtester.run(strategy).purchases == result.purchases
+
+    def test_run_skips_bids_too_high(self, snapshots):
+        listing = (
+            snapshots[0]
+            .listings[0]
+            .model_copy(update={"amount_remaining": Decimal("10.00")})
+        )
+
+        result = Backtester([ListingSnapshot(_TIMESTAMP, [listing])]).run(
+            AllocationStrategies.OVERALL_HIGHEST_RATE
+        )
+
+        assert result.purchases == []
+        assert result.cash == Decimal("1000.00")
+
+    def test_run_without_cash(self, snapshots):
+        result = Backtester(snapshots, cash=Decimal(0)).run(
+            AllocationStrategies.AGGRESSIVE
+        )
+
+        assert result.purchases == []
+
+
+class TestBacktestResult:
+    def test_report(self, mocker):
+        mocker.patch("shutil.get_terminal_size", return_value=(20, 24))
+        result = BacktestResult(
+            AllocationStrategies.AGGRESSIVE,
+            10,
+            [
+                Purchase(_TIMESTAMP, 1, "C", Decimal("0.1234"), Decimal("25.00")),
+                Purchase(_TIMESTAMP, 2, "A", Decimal("0.0812"), Decimal("75.00")),
+            ],
+            Decimal("900.00"),
+            {"AA": Decimal(0), "A": Decimal("75.00"), "C": Decimal("25.00")},
+            0.5,
+        )
+        lines = []
+
+        result.report(lines.append)
+
+        assert lines == [
+            "## AGGRESSIVE: 2 purchases totaling $100.00 over 10 cycles (20 cycles/s); $900.00 cash left",
+            "2024-01-01T12:00:00+00:00 1  C 12.34% $25.00",
+            "2024-01-01T12:00:00+00:00 2  A  8.12% $75.00",
+            "### AGGRESSIVE rating mix of purchases ###",
+            "C: |-----| 25.00%",
+            "A: |---------------| 75.00%",
+            "### AGGRESSIVE rating mix of the account ###",
+            "A: |---------------| 75.00%",
+            "C: |-----| 25.00%",
+        ]
+
+    def test_report_without_purchases(self):
+        result = BacktestResult(
+            AllocationStrategies.AGGRESSIVE, 0, [], Decimal(0), {"A": Decimal(0)}, 0.0
+        )
+        lines = []
+
+        result.report(lines.append, show_purchases=False)
+
+        assert lines == [
+            "## AGGRESSIVE: 0 purchases totaling $0.00 over 0 cycles (0 cycles/s); $0.00 cash left"
+        ]
+
+
+class TestSnapshots:
+    def test_save_and_load(self, tmp_path):
+        snapshots = list(simulate_snapshots(3, seed=2, interval=timedelta(minutes=5)))
+
+        save_snapshots(snapshots, str(tmp_path / "snapshots.jsonl"))
+
+        assert load_snapshots(str(tmp_path / "snapshots.jsonl")) == snapshots
+        assert [s.timestamp for s in snapshots] == [
+            _TIMESTAMP + timedelta(minutes=5 * i) for i in range(1, 4)
+        ]
+
+    def test_simulate_snapshots_pages(self):
+        snapshot = next(
+            simulate_snapshots(1, listings_per_minute=0, initial_listings=1500)
+        )
+
+        assert len(snapshot.listings) > 500
+
+
+def test_main(tmp_path, capsys):
+    path = str(tmp_path / "snapshots.jsonl")
+
+    assert main(["--cycles", "5", "--save-snapshots", path, "--summary-only"]) == 0
+    simulated_out, _ = capsys.readouterr()
+    assert (
+        main(
+            [
+                "--snapshots",
+                path,
+                "--strategy",
+                "CONSERVATIVE",
+                "--cash",
+                "50",
+                "--max-orders-per-cycle",
+                "2",
+            ]
+        )
+        == 0
+    )
+    replayed_out, _ = capsys.readouterr()
+
+    assert [
+        line[:5] for line in simulated_out.splitlines() if line.startswith("## ")
+    ] == [
+        "## AG",
+        "## CO",
+        "## OV",
+    ]
+    assert replayed_out.startswith("## CONSERVATIVE: 2 purchases totaling $50.00")
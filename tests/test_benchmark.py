@@ -0,0 +1,116 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from prosper_bot.benchmark import (
+    Metric,
+    compare,
+    load_baseline,
+    main,
+    run_benchmarks,
+    save_baseline,
+)
+
+
+class TestBenchmark:
+    @pytest.fixture
+    def metrics(self):
+        return [
+            Metric("cycle.latency.median", 10.0, "ms"),
+            Metric("strategy.listings_per_second", 1000.0, "listings/s", True),
+        ]
+
+    def test_run_benchmarks(self):
+        metrics = run_benchmarks(cycles=2, listing_count=50, note_count=20)
+
+        assert [m.name for m in metrics] == [
+            "cycle.latency.median",
+            "cycle.latency.max",
+            "cycle.api_calls",
+            "cycle.fill_rate",
+            "strategy.construction",
+            "strategy.listings_per_second",
+            "strategy.scored_listings_per_second",
+            "strategy.plan",
+            "analytics.sync",
+            "analytics.analyze",
+            "analytics.peak_memory",
+        ]
+        assert all(m.value > 0 for m in metrics)
+
+    @pytest.mark.parametrize(
+        ["latency", "listings_per_second", "expected_regressions"],
+        [
+            (10.0, 1000.0, []),
+            (11.9, 801.0, []),
+            (
+                12.1,
+                1000.0,
+                ["cycle.latency.median: 12.10ms vs. 10.00ms (+21% worse)"],
+            ),
+            (
+                5.0,
+                790.0,
+                [
+                    "strategy.listings_per_second: 790.00listings/s vs. 1000.00listings/s (+21% worse)"
+                ],
+            ),
+        ],
+    )
+    def test_compare(self, metrics, latency, listings_per_second, expected_regressions):
+        baseline = {m.name: m for m in metrics}
+
+        assert (
+            compare(
+                [
+                    Metric("cycle.latency.median", latency, "ms"),
+                    Metric(
+                        "strategy.listings_per_second",
+                        listings_per_second,
+                        "listings/s",
+                        True,
+                    ),
+                    Metric("analytics.analyze", 100.0, "ms"),
+                ],
+                baseline,
+            )
+            == expected_regressions
+        )
+
+    def test_compare_with_zero_baseline(self):
+        assert (
+            compare(
+                [Metric("cycle.fill_rate", 1.0, "")],
+                {"cycle.fill_rate": Metric("cycle.fill_rate", 0.0, "")},
+            )
+            == []
+        )
+
+    def test_save_and_load_baseline(self, metrics):
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "baseline.json")
+            save_baseline(metrics, path)
+
+            assert load_baseline(path) == {m.name: m for m in metrics}
+
+    def test_main(self, mocker, metrics, capsys):
+        run_benchmarks_mock = mocker.patch(
+            "prosper_bot.benchmark.run_benchmarks", return_value=metrics
+        )
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "baseline.json")
+
+            assert main(["--notes", "100", "--save-baseline", path]) == 0
+            run_benchmarks_mock.assert_called_once_with(100, 5000, 100, 20240101)
+
+            run_benchmarks_mock.return_value = [metrics[0]._replace(value=20.0)]
+            assert main(["--baseline", path]) == 1
+
+        out, err = capsys.readouterr()
+        assert (
+            "cycle.latency.median                    20.00 ms (baseline 10.00)" in out
+        )
+        assert err == (
+            "REGRESSION cycle.latency.median: 20.00ms vs. 10.00ms (+100% worse)\n"
+        )
@@ -1,17 +1,180 @@
+import asyncio
 import datetime
 from datetime import timedelta
 from decimal import Decimal
+from os import listdir
 from os.path import join
 from tempfile import TemporaryDirectory
+from time import sleep
 
 import pytest
-from prosper_api.models import Account, Listing, Order
+from prosper_api.models import Account, Listing, Order, SearchListingsResponse
+from prosper_api.models.enums import ProsperRating
 from prosper_shared.omni_config import Config
 
-from prosper_bot.allocation_strategy import AllocationStrategies
+from prosper_bot import allocation_strategy
+from prosper_bot.allocation_strategy import (
+    DEFAULT_MAX_CONCURRENT_SEARCHES,
+    DEFAULT_SEARCH_PARAMS,
+    AllocationStrategies,
+)
 from prosper_bot.bot import bot
-from prosper_bot.bot.bot import Bot
+from prosper_bot.bot.bot import (
+    API_RECORDING_CONFIG,
+    API_REPLAY_CONFIG,
+    METRICS_FORMAT_CONFIG,
+    POLL_SCHEDULER_CONFIG,
+    AsyncBot,
+    Bot,
+)
 from prosper_bot.cli import DRY_RUN_CONFIG
+from prosper_bot.recording import RecordingClient, ReplayClient
+from prosper_bot.scheduler import AdaptivePollScheduler, FixedPollScheduler
+
+
+def _listing() -> Listing:
+    return Listing(
+        **{
+            "credit_bureau_values_transunion_indexed": {
+                "g102s_months_since_most_recent_inquiry": -4.0,
+                "credit_report_date": "2023-08-28 17:35:20 +0000",
+                "at02s_open_accounts": 6.0,
+                "g041s_accounts_30_or_more_days_past_due_ever": 0.0,
+                "g093s_number_of_public_records": 0.0,
+                "g094s_number_of_public_record_bankruptcies": -4.0,
+                "g095s_months_since_most_recent_public_record": -4.0,
+                "g218b_number_of_delinquent_accounts": 0.0,
+                "g980s_inquiries_in_the_last_6_months": -4.0,
+                "re20s_age_of_oldest_revolving_account_in_months": 142.0,
+                "s207s_months_since_most_recent_public_record_bankruptcy": -4.0,
+                "re33s_balance_owed_on_all_revolving_accounts": 6565.0,
+                "at57s_amount_delinquent": 0.0,
+                "g099s_public_records_last_24_months": -4.0,
+                "at20s_oldest_trade_open_date": 189.0,
+                "at03s_current_credit_lines": 6.0,
+                "re101s_revolving_balance": 6565.0,
+                "bc34s_bankcard_utilization": 17.0,
+                "at01s_credit_lines": 28.0,
+                "fico_score": "780-799",
+            },
+            "listing_number": 11111111,
+            "listing_start_date": "2023-08-28 22:00:47 +0000",
+            "historical_return": 0.04485,
+            "historical_return_10th_pctl": 0.03404,
+            "historical_return_90th_pctl": 0.05707,
+            "employment_status_description": "Employed",
+            "occupation": "Nurse (RN)",
+            "has_mortgage": True,
+            "co_borrower_application": False,
+            "investment_type_description": "Fractional",
+            "last_updated_date": "2023-08-29 14:33:41 +0000",
+            "invested": True,
+            "biddable": False,
+            "lender_yield": 0.1295,
+            "borrower_rate": 0.1395,
+            "borrower_apr": 0.1677,
+            "listing_term": 48,
+            "listing_monthly_payment": 273.01,
+            "prosper_score": 11,
+            "listing_category_id": 7,
+            "listing_title": "Other",
+            "income_range": 6,
+            "income_range_description": "$100,000+",
+            "stated_monthly_income": 8333.33,
+            "income_verifiable": True,
+            "dti_wprosper_loan": 0.2478,
+            "borrower_state": "AL",
+            "prior_prosper_loans_active": 0,
+            "prior_prosper_loans": 0,
+            "prior_prosper_loans_late_cycles": 0,
+            "prior_prosper_loans_late_payments_one_month_plus": 0,
+            "lender_indicator": 0,
+            "channel_code": "40000",
+            "amount_participation": 0.0,
+            "investment_typeid": 1,
+            "loan_number": 2119830,
+            "months_employed": 46.0,
+            "investment_product_id": 1,
+            "decision_bureau": "TransUnion",
+            "member_key": "AAAAAAAAAAAAAAAAAAAAAAAAA",
+            "listing_end_date": "2023-08-29 14:33:31 +0000",
+            "listing_creation_date": "2023-08-28 17:42:57 +0000",
+            "loan_origination_date": "2023-08-30 07:00:00 +0000",
+            "listing_status": 6,
+            "listing_status_reason": "Completed",
+            "listing_amount": 10000.0,
+            "amount_funded": 10000.0,
+            "amount_remaining": 0.0,
+            "percent_funded": 1.0,
+            "partial_funding_indicator": True,
+            "funding_threshold": 0.7,
+            "prosper_rating": "AA",
+        }
+    )
+
+
+def _account(available_cash: Decimal) -> Account:
+    return Account(
+        **{
+            "available_cash_balance": available_cash,
+            "pending_investments_primary_market": 0.0,
+            "pending_investments_secondary_market": 0.0,
+            "pending_quick_invest_orders": 0.0,
+            "total_principal_received_on_active_notes": 111.11,
+            "total_amount_invested_on_active_notes": 1111.11,
+            "outstanding_principal_on_active_notes": 1111.11,
+            "total_account_value": 1111.11,
+            "pending_deposit": 0.0,
+            "last_deposit_amount": 30.0,
+            "last_deposit_date": "2023-10-23 07:00:00 +0000",
+            "last_withdraw_amount": -14.31,
+            "last_withdraw_date": "2012-11-07 08:00:00 +0000",
+            "external_user_id": "AAAAAAAAA-0000-AAAA-AAAA-AAAAAAAA",
+            "prosper_account_digest": "Aa=",
+            "invested_notes": {
+                "NA": 0,
+                "HR": 11.080180,
+                "E": 1111.056157,
+                "D": 111.837770,
+                "C": 111.719430,
+                "B": 111.842790,
+                "A": 111.991266,
+                "AA": 111.641243,
+            },
+            "pending_bids": {
+                "NA": 0,
+                "HR": 0,
+                "E": 0,
+                "D": 0,
+                "C": 0,
+                "B": 0,
+                "A": 0,
+                "AA": 0,
+            },
+        }
+    )
+
+
+def _order(bid_requests=None) -> Order:
+    return Order(
+        **{
+            "order_id": "AAAAAAAA-AAAA-AAAA-AAAA-AAAAAAAAAAA",
+            "bid_requests": (
+                bid_requests
+                if bid_requests is not None
+                else [
+                    {
+                        "listing_id": 11111111,
+                        "bid_amount": 25.0,
+                        "bid_status": "PENDING",
+                    }
+                ]
+            ),
+            "order_status": "IN_PROGRESS",
+            "source": "AI",
+            "order_date": "2023-09-18 16:08:23 +0000",
+        }
+    )
 
 
 class TestBot:
@@ -72,6 +235,251 @@ class TestBot:
             == expected_output
         )
 
+    @pytest.mark.parametrize(
+        [
+            "available_cash",
+            "min_bid",
+            "total_account_value",
+            "target_loan_count",
+            "max_orders",
+            "expected_output",
+        ],
+        [
+            (Decimal("24.99"), Decimal("25"), None, None, 5, []),
+            (Decimal("110.886866"), Decimal("25"), None, None, 1, [Decimal("35.88")]),
+            (
+                Decimal("110.886866"),
+                Decimal("25"),
+                None,
+                None,
+                2,
+                [Decimal("35.88"), Decimal("25.00")],
+            ),
+            (
+                Decimal("110.886866"),
+                Decimal("25"),
+                None,
+                None,
+                5,
+                [
+                    Decimal("35.88"),
+                    Decimal("25.00"),
+                    Decimal("25.00"),
+                    Decimal("25.00"),
+                ],
+            ),
+            (
+                Decimal("74.996866"),
+                Decimal("25"),
+                None,
+                None,
+                5,
+                [Decimal("49.99"), Decimal("25.00")],
+            ),
+            (
+                Decimal("111.10"),
+                Decimal("30"),
+                Decimal("2000"),
+                40,
+                5,
+                [Decimal("61.10"), Decimal("50.00")],
+            ),
+        ],
+    )
+    def test_get_bid_amounts(
+        self,
+        available_cash: Decimal,
+        min_bid: Decimal,
+        total_account_value: Decimal,
+        target_loan_count: int,
+        max_orders: int,
+        expected_output,
+    ):
+        bid_amounts = Bot.get_bid_amounts(
+            available_cash, min_bid, total_account_value, target_loan_count, max_orders
+        )
+
+        assert bid_amounts == expected_output
+        assert sum(bid_amounts) <= available_cash
+
+    @pytest.mark.parametrize(
+        ["cli_config", "listing_count", "expected_bid_requests"],
+        [
+            (
+                {},
+                3,
+                [
+                    {"listing_id": 0, "bid_amount": Decimal("35.88")},
+                    {"listing_id": 1, "bid_amount": Decimal("25.00")},
+                    {"listing_id": 2, "bid_amount": Decimal("25.00")},
+                ],
+            ),
+            (
+                {},
+                2,
+                [
+                    {"listing_id": 0, "bid_amount": Decimal("35.88")},
+                    {"listing_id": 1, "bid_amount": Decimal("25.00")},
+                ],
+            ),
+            ({"dry-run": True}, 3, None),
+        ],
+    )
+    def test_do_run_with_batch(
+        self, mocker, client_mock, cli_config, listing_count, expected_bid_requests
+    ):
+        config = Config(
+            {
+                "prosper-shared": {"serde": {"use-decimals": True}},
+                "prosper-bot": {
+                    "cli": cli_config,
+                    "bot": {"max-orders-per-cycle": 5},
+                },
+            }
+        )
+        config.get_as_enum = mocker.MagicMock()
+        config.get_as_enum.return_value = AllocationStrategies.AGGRESSIVE
+        strategy_mock = mocker.MagicMock()
+        mocker.patch.object(
+            AllocationStrategies.AGGRESSIVE, "to_strategy", strategy_mock
+        )
+        strategy_mock.return_value.__next__.side_effect = [
+            _listing().model_copy(update={"listing_number": i})
+            for i in range(listing_count)
+        ] + [StopIteration()]
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("110.886866")
+        )
+        # The last bid fails, and the rest are still being processed
+        client_mock.return_value._do_post.return_value = _order(
+            [{**b, "bid_status": "PENDING"} for b in (expected_bid_requests or [])[:-1]]
+            + [
+                {
+                    **b,
+                    "bid_status": "EXPIRED",
+                    "bid_result": "LISTING_NOT_BIDDABLE",
+                }
+                for b in (expected_bid_requests or [])[-1:]
+            ]
+        ).model_dump_json()
+
+        botty = Bot(config)
+        cash, sleep_time = botty._do_run(None)
+
+        assert sleep_time == timedelta(seconds=5)
+        client_mock.return_value.order.assert_not_called()
+        if expected_bid_requests:
+            client_mock.return_value._do_post.assert_called_once_with(
+                client_mock.return_value._ORDERS_API_URL,
+                {"bid_requests": expected_bid_requests},
+            )
+            assert all(
+                botty.seen_listings.is_invested(b["listing_id"])
+                for b in expected_bid_requests[:-1]
+            )
+            # Only the placed bids are invested, so the failed one can be bid on again
+            assert not botty.seen_listings.is_invested(
+                expected_bid_requests[-1]["listing_id"]
+            )
+            assert sum(botty.allocation_state.values.values()) == sum(
+                b["bid_amount"] for b in expected_bid_requests[:-1]
+            )
+        else:
+            client_mock.return_value._do_post.assert_not_called()
+            assert not botty.seen_listings.is_invested(0)
+
+    @pytest.mark.parametrize(
+        ["scheduler_name", "expected_scheduler_class"],
+        [
+            (None, FixedPollScheduler),
+            ("FIXED", FixedPollScheduler),
+            ("ADAPTIVE", AdaptivePollScheduler),
+        ],
+    )
+    def test_init_scheduler(
+        self, client_mock, scheduler_name, expected_scheduler_class
+    ):
+        bot_config = (
+            {} if scheduler_name is None else {"poll-scheduler": scheduler_name}
+        )
+        botty = Bot(Config({"prosper-bot": {"bot": bot_config}}))
+
+        assert type(botty.scheduler) is expected_scheduler_class
+        assert botty.client._search_listeners == [
+            botty.scheduler.observe_listings,
+            botty.latency.observe_listings,
+        ]
+
+    def test_init_when_recording(self, client_mock, tmp_path):
+        botty = Bot(
+            Config(
+                {
+                    "prosper-bot": {
+                        "bot": {"api-recording": str(tmp_path / "recording.jsonl")}
+                    }
+                }
+            )
+        )
+
+        assert type(botty.client._client) is RecordingClient
+        assert botty.client._client._client == client_mock.return_value
+        assert (tmp_path / "recording.jsonl").exists()
+
+    def test_init_when_replaying(self, client_mock, tmp_path):
+        (tmp_path / "recording.jsonl").touch()
+
+        botty = Bot(
+            Config(
+                {
+                    "prosper-bot": {
+                        "bot": {"api-replay": str(tmp_path / "recording.jsonl")}
+                    }
+                }
+            )
+        )
+
+        assert type(botty.client._client) is ReplayClient
+        client_mock.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ["bot_config", "expected_searches"],
+        [
+            ({}, DEFAULT_MAX_CONCURRENT_SEARCHES),
+            ({"concurrent-searches": 7}, 7),
+            ({"concurrent-searches": -1}, 1),
+        ],
+    )
+    def test_init_concurrent_searches(self, client_mock, bot_config, expected_searches):
+        botty = Bot(Config({"prosper-bot": {"bot": bot_config}}))
+
+        assert botty.max_concurrent_searches == expected_searches
+
+    @pytest.mark.parametrize(
+        ["bot_config", "expected_depth"],
+        [({}, 0), ({"prefetch-depth": 2}, 2), ({"prefetch-depth": -1}, 0)],
+    )
+    def test_init_prefetch_depth(self, client_mock, bot_config, expected_depth):
+        botty = Bot(Config({"prosper-bot": {"bot": bot_config}}))
+
+        assert botty.prefetch_depth == expected_depth
+
+    @pytest.mark.parametrize(
+        ["bot_config", "expected_limit"],
+        [
+            ({}, 10),
+            ({"search-limit": 1}, 1),
+            ({"search-limit": -1}, 1),
+            ({"search-limit": 500}, 500),
+            ({"search-limit": 501}, 500),
+        ],
+    )
+    def test_init_search_params(self, client_mock, bot_config, expected_limit):
+        botty = Bot(Config({"prosper-bot": {"bot": bot_config}}))
+
+        assert botty.search_params == DEFAULT_SEARCH_PARAMS._replace(
+            limit=expected_limit
+        )
+
     @pytest.mark.timeout("5")
     def test_run_when_exception(self, mocker, client_mock):
         analyze_mock = mocker.patch("prosper_bot.bot.bot.analyze")
@@ -88,6 +496,37 @@ class TestBot:
         do_run_mock.assert_has_calls([mocker.call(None), mocker.call(None)])
         analyze_mock.assert_called_once()
 
+    def test_run_when_profiling(self, mocker, client_mock, tmp_path):
+        botty = Bot(
+            Config(
+                {
+                    "prosper-bot": {
+                        "cli": {
+                            "single-run": True,
+                            "profile": True,
+                            "profile-dir": str(tmp_path),
+                            "profile-cycles": 2,
+                        }
+                    }
+                }
+            )
+        )
+        mocker.patch("prosper_bot.bot.bot.sleep")
+        mocker.patch.object(botty, "_do_run").side_effect = [
+            (Decimal("100.00"), timedelta(minutes=1)),
+            (Decimal("100.00"), timedelta(minutes=1)),
+            (Decimal("0.00"), timedelta(minutes=1)),
+        ]
+
+        botty.run()
+
+        assert sorted(listdir(tmp_path)) == [
+            "cycles-000001-000002.prof",
+            "cycles-000001-000002.txt",
+            "cycles-000003-000003.prof",
+            "cycles-000003-000003.txt",
+        ]
+
     @pytest.mark.parametrize(
         [
             "cli_config",
@@ -168,148 +607,46 @@ class TestBot:
         config.get_as_enum.return_value = AllocationStrategies.AGGRESSIVE
         dry_run = config.get_as_bool(DRY_RUN_CONFIG, False)
         strategy_mock = mocker.MagicMock()
-        AllocationStrategies.AGGRESSIVE.to_strategy = strategy_mock
+        mocker.patch.object(
+            AllocationStrategies.AGGRESSIVE, "to_strategy", strategy_mock
+        )
         if expect_matching_listings:
-            strategy_mock.return_value.__next__.return_value = Listing(
-                **{
-                    "credit_bureau_values_transunion_indexed": {
-                        "g102s_months_since_most_recent_inquiry": -4.0,
-                        "credit_report_date": "2023-08-28 17:35:20 +0000",
-                        "at02s_open_accounts": 6.0,
-                        "g041s_accounts_30_or_more_days_past_due_ever": 0.0,
-                        "g093s_number_of_public_records": 0.0,
-                        "g094s_number_of_public_record_bankruptcies": -4.0,
-                        "g095s_months_since_most_recent_public_record": -4.0,
-                        "g218b_number_of_delinquent_accounts": 0.0,
-                        "g980s_inquiries_in_the_last_6_months": -4.0,
-                        "re20s_age_of_oldest_revolving_account_in_months": 142.0,
-                        "s207s_months_since_most_recent_public_record_bankruptcy": -4.0,
-                        "re33s_balance_owed_on_all_revolving_accounts": 6565.0,
-                        "at57s_amount_delinquent": 0.0,
-                        "g099s_public_records_last_24_months": -4.0,
-                        "at20s_oldest_trade_open_date": 189.0,
-                        "at03s_current_credit_lines": 6.0,
-                        "re101s_revolving_balance": 6565.0,
-                        "bc34s_bankcard_utilization": 17.0,
-                        "at01s_credit_lines": 28.0,
-                        "fico_score": "780-799",
-                    },
-                    "listing_number": 11111111,
-                    "listing_start_date": "2023-08-28 22:00:47 +0000",
-                    "historical_return": 0.04485,
-                    "historical_return_10th_pctl": 0.03404,
-                    "historical_return_90th_pctl": 0.05707,
-                    "employment_status_description": "Employed",
-                    "occupation": "Nurse (RN)",
-                    "has_mortgage": True,
-                    "co_borrower_application": False,
-                    "investment_type_description": "Fractional",
-                    "last_updated_date": "2023-08-29 14:33:41 +0000",
-                    "invested": True,
-                    "biddable": False,
-                    "lender_yield": 0.1295,
-                    "borrower_rate": 0.1395,
-                    "borrower_apr": 0.1677,
-                    "listing_term": 48,
-                    "listing_monthly_payment": 273.01,
-                    "prosper_score": 11,
-                    "listing_category_id": 7,
-                    "listing_title": "Other",
-                    "income_range": 6,
-                    "income_range_description": "$100,000+",
-                    "stated_monthly_income": 8333.33,
-                    "income_verifiable": True,
-                    "dti_wprosper_loan": 0.2478,
-                    "borrower_state": "AL",
-                    "prior_prosper_loans_active": 0,
-                    "prior_prosper_loans": 0,
-                    "prior_prosper_loans_late_cycles": 0,
-                    "prior_prosper_loans_late_payments_one_month_plus": 0,
-                    "lender_indicator": 0,
-                    "channel_code": "40000",
-                    "amount_participation": 0.0,
-                    "investment_typeid": 1,
-                    "loan_number": 2119830,
-                    "months_employed": 46.0,
-                    "investment_product_id": 1,
-                    "decision_bureau": "TransUnion",
-                    "member_key": "AAAAAAAAAAAAAAAAAAAAAAAAA",
-                    "listing_end_date": "2023-08-29 14:33:31 +0000",
-                    "listing_creation_date": "2023-08-28 17:42:57 +0000",
-                    "loan_origination_date": "2023-08-30 07:00:00 +0000",
-                    "listing_status": 6,
-                    "listing_status_reason": "Completed",
-                    "listing_amount": 10000.0,
-                    "amount_funded": 10000.0,
-                    "amount_remaining": 0.0,
-                    "percent_funded": 1.0,
-                    "partial_funding_indicator": True,
-                    "funding_threshold": 0.7,
-                    "prosper_rating": "AA",
-                }
-            )
+            strategy_mock.return_value.__next__.return_value = _listing()
         else:
             strategy_mock.return_value.__next__.side_effect = StopIteration()
 
-        client_mock.return_value.get_account_info.return_value = Account(
-            **{
-                "available_cash_balance": available_cash,
-                "pending_investments_primary_market": 0.0,
-                "pending_investments_secondary_market": 0.0,
-                "pending_quick_invest_orders": 0.0,
-                "total_principal_received_on_active_notes": 111.11,
-                "total_amount_invested_on_active_notes": 1111.11,
-                "outstanding_principal_on_active_notes": 1111.11,
-                "total_account_value": 1111.11,
-                "pending_deposit": 0.0,
-                "last_deposit_amount": 30.0,
-                "last_deposit_date": "2023-10-23 07:00:00 +0000",
-                "last_withdraw_amount": -14.31,
-                "last_withdraw_date": "2012-11-07 08:00:00 +0000",
-                "external_user_id": "AAAAAAAAA-0000-AAAA-AAAA-AAAAAAAA",
-                "prosper_account_digest": "Aa=",
-                "invested_notes": {
-                    "NA": 0,
-                    "HR": 11.080180,
-                    "E": 1111.056157,
-                    "D": 111.837770,
-                    "C": 111.719430,
-                    "B": 111.842790,
-                    "A": 111.991266,
-                    "AA": 111.641243,
-                },
-                "pending_bids": {
-                    "NA": 0,
-                    "HR": 0,
-                    "E": 0,
-                    "D": 0,
-                    "C": 0,
-                    "B": 0,
-                    "A": 0,
-                    "AA": 0,
-                },
-            }
-        )
-        client_mock.return_value.order.return_value = Order(
-            **{
-                "order_id": "AAAAAAAA-AAAA-AAAA-AAAA-AAAAAAAAAAA",
-                "bid_requests": [
-                    {
-                        "listing_id": 11111111,
-                        "bid_amount": 25.0,
-                        "bid_status": "PENDING",
-                    }
-                ],
-                "order_status": "IN_PROGRESS",
-                "source": "AI",
-                "order_date": "2023-09-18 16:08:23 +0000",
-            }
+        client_mock.return_value.get_account_info.return_value = _account(
+            available_cash
         )
+        client_mock.return_value.order.return_value = _order()
 
         botty = Bot(config)
         cash, sleep_time = botty._do_run(previous_cash)
 
         client_mock.return_value.get_account_info.assert_called_once()
+        if previous_cash != available_cash:
+            strategy_mock.assert_called_once_with(
+                botty.client,
+                client_mock.return_value.get_account_info.return_value,
+                botty.seen_listings,
+                max_concurrent_searches=DEFAULT_MAX_CONCURRENT_SEARCHES,
+                prefetch_depth=0,
+                bid_amounts=mocker.ANY,
+                allocation_state=botty.allocation_state,
+                search_params=mocker.ANY,
+            )
+            # Almost-funded listings are only searched for in the cycles that need them
+            assert strategy_mock.call_args.kwargs["search_params"] == (
+                DEFAULT_SEARCH_PARAMS._replace(amount_remaining_max=available_cash)
+                if bot_config.get("search-for-almost-funded")
+                and available_cash < Decimal("25")
+                else DEFAULT_SEARCH_PARAMS
+            )
+            strategy_mock.return_value.close.assert_called_once()
+        if expected_order_amount:
+            assert strategy_mock.call_args.kwargs["bid_amounts"] == [
+                expected_order_amount
+            ]
         assert cash == available_cash
         if (
             available_cash != previous_cash
@@ -331,13 +668,340 @@ class TestBot:
             )
         else:
             client_mock.return_value.order.assert_not_called()
+        # The order is applied to the allocation state, so the next cycle doesn't rebuild it
+        assert botty.allocation_state._ordered_since_sync == bool(expected_order_amount)
 
     def test_init_when_config_is_none(self, mocker):
         build_config_mock = mocker.patch("prosper_bot.bot.bot.build_config")
         with TemporaryDirectory() as tmpdir:
-            build_config_mock.return_value.get_as_str.return_value = join(
-                tmpdir, "token_cache"
+            build_config_mock.return_value.get_as_str.side_effect = (
+                lambda key, default=None: (
+                    default
+                    if key
+                    in [
+                        POLL_SCHEDULER_CONFIG,
+                        METRICS_FORMAT_CONFIG,
+                        API_RECORDING_CONFIG,
+                        API_REPLAY_CONFIG,
+                    ]
+                    else join(tmpdir, "token_cache")
+                )
             )
             botty = Bot()
 
         assert botty.config == build_config_mock.return_value
+
+
+class TestAsyncBot:
+    @pytest.fixture
+    def client_mock(self, mocker):
+        return mocker.patch("prosper_bot.bot.bot.Client")
+
+    @pytest.fixture
+    def strategy_mock(self, mocker):
+        strategy_mock = mocker.MagicMock()
+        mocker.patch.object(
+            AllocationStrategies.AGGRESSIVE, "to_strategy", strategy_mock
+        )
+        return strategy_mock
+
+    def _config(self, mocker, cli_config=None, bot_config=None):
+        config = Config(
+            {
+                "prosper-shared": {"serde": {"use-decimals": True}},
+                "prosper-bot": {"cli": cli_config or {}, "bot": bot_config or {}},
+            }
+        )
+        config.get_as_enum = mocker.MagicMock()
+        config.get_as_enum.return_value = AllocationStrategies.AGGRESSIVE
+        return config
+
+    @pytest.mark.parametrize(
+        ["cli_config", "bot_config", "available_cash", "expected_order_amount"],
+        [
+            ({}, {}, Decimal("111.1111"), Decimal("36.11")),
+            (
+                {},
+                {"search-for-almost-funded": True},
+                Decimal("24.99"),
+                Decimal("24.99"),
+            ),
+            ({"dry-run": True}, {}, Decimal("111.1111"), None),
+        ],
+    )
+    def test_do_run_async_places_order(
+        self,
+        mocker,
+        client_mock,
+        strategy_mock,
+        cli_config,
+        bot_config,
+        available_cash,
+        expected_order_amount,
+    ):
+        client_mock.return_value.get_account_info.return_value = _account(
+            available_cash
+        )
+        client_mock.return_value.order.return_value = _order()
+        strategy_mock.return_value.__next__.return_value = _listing()
+        botty = AsyncBot(self._config(mocker, cli_config, bot_config))
+
+        async def do_run():
+            result = await botty._do_run_async(None)
+            await botty._settle_orders()
+            return result
+
+        cash, sleep_time = asyncio.run(do_run())
+
+        assert cash == available_cash
+        assert sleep_time == timedelta(seconds=5)
+        client_mock.return_value.get_account_info.assert_called_once()
+        strategy_mock.return_value.close.assert_called()
+        if expected_order_amount:
+            client_mock.return_value.order.assert_called_once_with(
+                11111111, expected_order_amount
+            )
+        else:
+            client_mock.return_value.order.assert_not_called()
+
+    def test_do_run_async_when_cash_unchanged(self, mocker, client_mock, strategy_mock):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("111.1111")
+        )
+        botty = AsyncBot(self._config(mocker))
+
+        cash, sleep_time = asyncio.run(botty._do_run_async(Decimal("111.1111")))
+
+        assert cash == Decimal("111.1111")
+        assert sleep_time == timedelta(minutes=1)
+        assert not botty._speculate
+        client_mock.return_value.order.assert_not_called()
+
+    def test_do_run_async_when_no_cash(self, mocker, client_mock, strategy_mock):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("1.00")
+        )
+        botty = AsyncBot(self._config(mocker))
+
+        cash, sleep_time = asyncio.run(botty._do_run_async(None))
+
+        assert sleep_time == timedelta(minutes=1)
+        assert not botty._speculate
+
+        # Once idle, the bot stops searching alongside the account fetch
+        strategy_mock.reset_mock()
+        asyncio.run(botty._do_run_async(None))
+        strategy_mock.assert_not_called()
+
+    def test_do_run_async_when_no_listings(self, mocker, client_mock, strategy_mock):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("111.1111")
+        )
+        strategy_mock.return_value.__next__.side_effect = StopIteration()
+        botty = AsyncBot(self._config(mocker))
+
+        cash, sleep_time = asyncio.run(botty._do_run_async(None))
+
+        assert sleep_time == timedelta(minutes=1)
+        client_mock.return_value.order.assert_not_called()
+
+    def test_do_run_async_when_order_fails(
+        self, mocker, client_mock, strategy_mock, caplog
+    ):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("111.1111")
+        )
+        client_mock.return_value.order.side_effect = Exception("Order failed")
+        strategy_mock.return_value.__next__.return_value = _listing()
+        botty = AsyncBot(self._config(mocker))
+
+        async def do_run():
+            await botty._do_run_async(None)
+            await botty._settle_orders()
+
+        asyncio.run(do_run())
+
+        assert "Failed to place order for 11111111: Order failed" in caplog.text
+
+    def test_do_run_async_plans_batches(self, mocker, client_mock):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("75.00")
+        )
+        client_mock.return_value.search_listings.side_effect = (
+            lambda request: SearchListingsResponse(
+                result=(
+                    [
+                        _listing().model_copy(update={"listing_number": n})
+                        for n in range(6)
+                    ]
+                    if request.prosper_rating == [ProsperRating.AA]
+                    else []
+                ),
+                result_count=6,
+                total_count=6,
+            )
+        )
+        client_mock.return_value._do_post.side_effect = lambda url, data: _order(
+            [{**b, "bid_status": "PENDING"} for b in data["bid_requests"]]
+        ).model_dump_json()
+        plan_allocation = mocker.patch(
+            "prosper_bot.allocation_strategy.plan_allocation",
+            wraps=allocation_strategy.plan_allocation,
+        )
+        botty = AsyncBot(self._config(mocker, bot_config={"max-orders-per-cycle": 3}))
+
+        async def do_run():
+            for _ in range(2):
+                await botty._do_run_async(None)
+                await botty._settle_orders()
+
+        asyncio.run(do_run())
+
+        # The first cycle plans once the account is known; the next speculative search plans the same bids up front
+        assert [len(c.args[3]) for c in plan_allocation.call_args_list] == [3, 3]
+        assert client_mock.return_value._do_post.call_count == 2
+
+    def test_plans_match(self):
+        bids = [Decimal("25.00"), Decimal("25.00")]
+
+        assert AsyncBot._plans_match(None, [Decimal("30.00")])
+        assert AsyncBot._plans_match([Decimal("25.00")], [Decimal("30.00")])
+        assert not AsyncBot._plans_match(bids, [Decimal("30.00")])
+        assert AsyncBot._plans_match(bids, list(bids))
+        assert not AsyncBot._plans_match(None, bids)
+
+    def test_do_run_async_waits_for_discarded_search(
+        self, mocker, client_mock, strategy_mock
+    ):
+        client_mock.return_value.get_account_info.return_value = _account(
+            Decimal("24.99")
+        )
+        client_mock.return_value.order.return_value = _order()
+        events = []
+
+        def next_listing():
+            events.append("start")
+            sleep(0.05)
+            events.append("end")
+            return _listing()
+
+        strategy_mock.return_value.__next__.side_effect = next_listing
+        botty = AsyncBot(
+            self._config(mocker, bot_config={"search-for-almost-funded": True})
+        )
+
+        async def do_run():
+            await botty._do_run_async(None)
+            await botty._settle_orders()
+
+        asyncio.run(do_run())
+
+        # The speculative search used other search params, so it's replaced, but only once it's done
+        assert events == ["start", "end", "start", "end"]
+        client_mock.return_value.order.assert_called_once_with(
+            11111111, Decimal("24.99")
+        )
+
+    def test_do_run_async_when_account_fetch_fails(
+        self, mocker, client_mock, strategy_mock
+    ):
+        client_mock.return_value.get_account_info.side_effect = Exception(
+            "Account failed"
+        )
+        events = []
+
+        def next_listing():
+            sleep(0.05)
+            events.append("searched")
+            raise Exception("Search failed")
+
+        strategy_mock.return_value.__next__.side_effect = next_listing
+        botty = AsyncBot(self._config(mocker))
+
+        async def do_run():
+            with pytest.raises(Exception, match="Account failed"):
+                await botty._do_run_async(None)
+            return list(events)
+
+        # The speculative search isn't left running after the cycle fails, and its own failure doesn't mask the cycle's
+        assert asyncio.run(do_run()) == ["searched"]
+
+    @pytest.mark.timeout("5")
+    def test_run_when_exception(self, mocker, client_mock):
+        analyze_mock = mocker.patch("prosper_bot.bot.bot.analyze")
+        botty = AsyncBot(Config({"prosper-bot": {"bot": {"analytics": True}}}))
+        do_run_mock = mocker.patch.object(botty, "_do_run_async")
+        mocker.patch.object(bot, "POLL_TIME", timedelta(milliseconds=10))
+        do_run_mock.side_effect = [
+            Exception("Should be caught"),
+            (Decimal("100.00"), timedelta(milliseconds=10)),
+            KeyboardInterrupt("This should do it"),
+        ]
+
+        botty.run()
+
+        do_run_mock.assert_has_calls(
+            [mocker.call(None), mocker.call(None), mocker.call(Decimal("100.00"))]
+        )
+        analyze_mock.assert_called_once_with(botty.client)
+
+    @pytest.mark.timeout("5")
+    def test_run_when_single_run(self, mocker, client_mock):
+        botty = AsyncBot(Config({"prosper-bot": {"cli": {"single-run": True}}}))
+        do_run_mock = mocker.patch.object(botty, "_do_run_async")
+        do_run_mock.return_value = (Decimal("0"), timedelta(minutes=1))
+
+        botty.run()
+
+        do_run_mock.assert_called_once_with(None)
+
+    def test_run_when_profiling(self, mocker, client_mock, tmp_path):
+        botty = AsyncBot(
+            Config(
+                {
+                    "prosper-bot": {
+                        "cli": {
+                            "single-run": True,
+                            "profile": True,
+                            "profile-dir": str(tmp_path),
+                        }
+                    }
+                }
+            )
+        )
+        do_run_mock = mocker.patch.object(botty, "_do_run_async")
+        do_run_mock.return_value = (Decimal("0"), timedelta(minutes=1))
+
+        botty.run()
+
+        assert sorted(listdir(tmp_path)) == [
+            "cycles-000001-000001.prof",
+            "cycles-000001-000001.txt",
+        ]
+
+
+@pytest.mark.parametrize(
+    ["bot_config", "expected_class"], [({}, Bot), ({"async": True}, AsyncBot)]
+)
+def test_runner(mocker, bot_config, expected_class):
+    mocker.patch("prosper_bot.bot.bot.build_config").return_value = Config(
+        {"prosper-bot": {"bot": bot_config}}
+    )
+    run_mock = mocker.patch.object(expected_class, "run", autospec=True)
+    mocker.patch("prosper_bot.bot.bot.Client")
+
+    bot.runner()
+
+    run_mock.assert_called_once()
+    assert type(run_mock.call_args.args[0]) is expected_class
+
+
+def test_runner_when_accounts(mocker):
+    config = Config({"prosper-bot": {"bot": {"accounts": "first.json,second.json"}}})
+    mocker.patch("prosper_bot.bot.bot.build_config").return_value = config
+    runner_mock = mocker.patch("prosper_bot.accounts.MultiAccountRunner")
+
+    bot.runner()
+
+    runner_mock.from_config.assert_called_once_with(config)
+    runner_mock.from_config.return_value.run.assert_called_once()
@@ -29,10 +29,24 @@ class TestCli:
                 "--dry-run",
                 "--verbose",
                 "--single-run",
+                "--profile",
+                "--profile-dir=fake-profiles",
+                "--profile-cycles=5",
                 "--min-bid=30",
                 "--target-loan-count=600",
                 "--search-for-almost-funded",
                 "--analytics",
+                "--async",
+                "--max-orders-per-cycle=5",
+                "--search-limit=200",
+                "--concurrent-searches=2",
+                "--prefetch-depth=1",
+                "--poll-scheduler=ADAPTIVE",
+                "--metrics-file=fake-metrics.prom",
+                "--metrics-format=JSON_LINES",
+                "--api-recording=fake-recording.jsonl",
+                "--api-replay=fake-replay.jsonl",
+                "--accounts=first.json,second.toml",
                 # TODO: the --strategy param is broken :(
                 # "--strategy=CONSERVATIVE",
             ],
@@ -47,12 +61,26 @@ class TestCli:
                 "target-loan-count": 600,
                 "search-for-almost-funded": True,
                 "analytics": True,
+                "async": True,
+                "max-orders-per-cycle": 5,
+                "search-limit": 200,
+                "concurrent-searches": 2,
+                "prefetch-depth": 1,
+                "poll-scheduler": "ADAPTIVE",
+                "metrics-file": "fake-metrics.prom",
+                "metrics-format": "JSON_LINES",
+                "api-recording": "fake-recording.jsonl",
+                "api-replay": "fake-replay.jsonl",
+                "accounts": "first.json,second.toml",
             }
         )
         assert config._config_dict["prosper-bot"]["cli"] == {
             "dry-run": True,
             "verbose": True,
             "single-run": True,
+            "profile": True,
+            "profile-dir": "fake-profiles",
+            "profile-cycles": 5,
         }
         assert config._config_dict["prosper-api"] == {
             "auth": {"token-cache": "fake-token-cache"},
@@ -77,6 +105,11 @@ class TestCli:
             for v in config_schemata["prosper-api"]["auth"].keys()
             if v._expected_val == "token-cache"
         )._default = "/some/path/to/token-cache"
+        next(
+            v
+            for v in config_schemata["prosper-bot"]["analytics"].keys()
+            if getattr(v, "_expected_val", None) == "note-store"
+        )._default = "/some/path/to/notes.db"
         source = _ArgParseSource(
             _arg_parse_from_schema(
                 config_schemata, input_schemata, prog_name="prosper-bot"
@@ -0,0 +1,250 @@
+from datetime import timedelta
+from decimal import Decimal
+from time import sleep
+
+import pytest
+import requests
+from prosper_api import client as prosper_api_client
+from prosper_api.client import Client
+from prosper_api.models import ListNotesRequest, ListNotesResponse
+from prosper_api.models.enums import ListNotesSortBy
+from prosper_shared.omni_config import Config
+
+from prosper_bot.client import BotClient, PooledClient, iter_note_pages, iter_notes
+
+
+class TestBotClient:
+    @pytest.fixture
+    def client_mock(self, mocker):
+        client = mocker.MagicMock()
+        client.get_account_info.side_effect = lambda: mocker.sentinel.account
+        return client
+
+    def test_get_account_info_when_cached(self, client_mock):
+        bot_client = BotClient(client_mock)
+
+        assert bot_client.get_account_info() == bot_client.get_account_info()
+        client_mock.get_account_info.assert_called_once()
+
+    def test_get_account_info_when_expired(self, client_mock):
+        bot_client = BotClient(client_mock, account_ttl=timedelta(seconds=-1))
+
+        bot_client.get_account_info()
+        bot_client.get_account_info()
+
+        assert client_mock.get_account_info.call_count == 2
+
+    def test_order_invalidates_account_info(self, client_mock):
+        bot_client = BotClient(client_mock)
+        bot_client.get_account_info()
+
+        assert (
+            bot_client.order(1234, Decimal("25.00")) == client_mock.order.return_value
+        )
+        bot_client.get_account_info()
+
+        client_mock.order.assert_called_once_with(1234, Decimal("25.00"))
+        assert client_mock.get_account_info.call_count == 2
+
+    def test_order_batch(self, client_mock):
+        client_mock._do_post.return_value = """{
+            "order_id": "AAAAAAAA-AAAA-AAAA-AAAA-AAAAAAAAAAA",
+            "bid_requests": [
+                {"listing_id": 1234, "bid_amount": 30.0, "bid_status": "PENDING"},
+                {"listing_id": 5678, "bid_amount": 25.0, "bid_status": "PENDING"}
+            ],
+            "order_status": "IN_PROGRESS",
+            "source": "AI",
+            "order_date": "2023-09-18 16:08:23 +0000"
+        }"""
+        bot_client = BotClient(client_mock)
+        bot_client.get_account_info()
+
+        order = bot_client.order_batch(
+            [(1234, Decimal("30.00")), (5678, Decimal("25.00"))]
+        )
+        bot_client.get_account_info()
+
+        assert [b.listing_id for b in order.bid_requests] == [1234, 5678]
+        client_mock._do_post.assert_called_once_with(
+            client_mock._ORDERS_API_URL,
+            {
+                "bid_requests": [
+                    {"listing_id": 1234, "bid_amount": Decimal("30.00")},
+                    {"listing_id": 5678, "bid_amount": Decimal("25.00")},
+                ]
+            },
+        )
+        assert client_mock.get_account_info.call_count == 2
+
+    def test_order_batch_with_prosper_client(self, mocker):
+        # Fails if the Prosper API client renames the internals batches are posted with
+        request_mock = mocker.patch("requests.request")
+        request_mock.return_value.text = """{
+            "order_id": "AAAAAAAA-AAAA-AAAA-AAAA-AAAAAAAAAAA",
+            "bid_requests": [],
+            "order_status": "IN_PROGRESS",
+            "source": "AI",
+            "order_date": "2023-09-18 16:08:23 +0000"
+        }"""
+        bot_client = BotClient(Client(Config({}), mocker.MagicMock()))
+
+        bot_client.order_batch([(1234, Decimal("30.00"))])
+
+        request_mock.assert_called_once_with(
+            "POST",
+            "https://api.prosper.com/v1/orders/",
+            params={},
+            json={
+                "bid_requests": [{"listing_id": 1234, "bid_amount": Decimal("30.00")}]
+            },
+            headers=mocker.ANY,
+        )
+
+    def test_passes_through_other_attributes(self, client_mock):
+        bot_client = BotClient(client_mock)
+
+        assert bot_client.list_notes is client_mock.list_notes
+        assert bot_client._config is client_mock._config
+
+    def test_search_listings_notifies_listeners(self, mocker, client_mock):
+        bot_client = BotClient(client_mock)
+        listener = mocker.MagicMock()
+        failing_listener = mocker.MagicMock(side_effect=Exception("Should be caught"))
+        bot_client.add_search_listener(failing_listener)
+        bot_client.add_search_listener(listener)
+
+        response = bot_client.search_listings(mocker.sentinel.request)
+
+        assert response == client_mock.search_listings.return_value
+        client_mock.search_listings.assert_called_once_with(mocker.sentinel.request)
+        failing_listener.assert_called_once_with(response.result)
+        listener.assert_called_once_with(response.result)
+
+
+class TestIterNotes:
+    @pytest.fixture
+    def client_mock(self, mocker):
+        def list_notes(request):
+            # Later pages come back first, to check that they're reassembled in order
+            sleep((100 - request.offset) / 10000)
+            page = list(range(request.offset, min(request.offset + request.limit, 95)))
+            return ListNotesResponse.model_construct(
+                result=page, result_count=len(page), total_count=95
+            )
+
+        client = mocker.MagicMock()
+        client.list_notes.side_effect = list_notes
+        return client
+
+    @pytest.mark.parametrize("max_concurrent_requests", [0, 1, 4, 20])
+    def test_iter_notes(self, client_mock, max_concurrent_requests):
+        notes = list(
+            iter_notes(
+                client_mock,
+                ListNotesRequest(sort_by=ListNotesSortBy.ORIGINATION_DATE, limit=10),
+                max_concurrent_requests,
+            )
+        )
+
+        assert notes == list(range(95))
+        assert client_mock.list_notes.call_count == 10
+        assert {c.args[0].sort_by for c in client_mock.list_notes.call_args_list} == {
+            ListNotesSortBy.ORIGINATION_DATE
+        }
+
+    def test_iter_notes_with_defaults(self, client_mock):
+        assert list(iter_notes(client_mock)) == list(range(95))
+        client_mock.list_notes.assert_called_once_with(
+            ListNotesRequest(offset=0, limit=100)
+        )
+
+    def test_iter_note_pages_when_stopped_early(self, client_mock):
+        pages = iter_note_pages(
+            client_mock, ListNotesRequest(limit=10), max_concurrent_requests=3
+        )
+
+        assert next(pages) == list(range(10))
+        assert next(pages) == list(range(10, 20))
+        pages.close()
+
+        # The first page, plus the second and the two in flight behind it
+        assert client_mock.list_notes.call_count == 4
+
+    def test_iter_note_pages_when_page_is_short(self, client_mock):
+        client_mock.list_notes.side_effect = lambda request: (
+            ListNotesResponse.model_construct(
+                result=[request.offset] * (10 if request.offset < 20 else 5),
+                result_count=10,
+                total_count=95,
+            )
+        )
+
+        pages = list(
+            iter_note_pages(
+                client_mock, ListNotesRequest(limit=10), max_concurrent_requests=1
+            )
+        )
+
+        assert pages == [[0] * 10, [10] * 10, [20] * 5]
+
+
+class TestPooledClient:
+    @pytest.fixture
+    def session_mock(self, mocker):
+        session = mocker.MagicMock()
+        session.request.return_value.text = '{"result": []}'
+        return session
+
+    @pytest.fixture
+    def token_manager_mock(self, mocker):
+        token_manager = mocker.MagicMock()
+        token_manager.get_token.return_value = "fake-token"
+        return token_manager
+
+    def test_do_request(self, session_mock, token_manager_mock):
+        client = PooledClient(Config({}), session_mock, token_manager_mock)
+
+        # Fails if the Prosper API client stops sending its requests through `requests.request`
+
+        assert (
+            client._do_request("GET", "https://fake.url", params={"limit": 1})
+            == '{"result": []}'
+        )
+        session_mock.request.assert_called_once_with(
+            "GET",
+            "https://fake.url",
+            params={"limit": 1},
+            json={},
+            headers={
+                "Authorization": "bearer fake-token",
+                "Accept": "application/json",
+            },
+        )
+        session_mock.request.return_value.raise_for_status.assert_called_once()
+
+    def test_session_is_shared(self, session_mock, token_manager_mock):
+        first = PooledClient(Config({}), session_mock, token_manager_mock)
+        second = PooledClient(Config({}), session_mock, token_manager_mock)
+
+        first._do_post("https://fake.url", {"id": 1})
+        second._do_get("https://fake.url")
+
+        assert session_mock.request.call_count == 2
+
+    def test_default_session(self, token_manager_mock):
+        client = PooledClient(Config({}), auth_token_manager=token_manager_mock)
+
+        assert isinstance(client._session, requests.Session)
+
+    def test_other_clients_are_not_pooled(
+        self, mocker, session_mock, token_manager_mock
+    ):
+        PooledClient(Config({}), session_mock, token_manager_mock)
+        request_mock = mocker.patch("requests.request")
+
+        Client(Config({}), token_manager_mock)._do_get("https://fake.url")
+
+        request_mock.assert_called_once()
+        session_mock.request.assert_not_called()
+        assert prosper_api_client.requests.codes is requests.codes
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+# Only needed for pretty-printing and analytics, and together they used to make up about half of the startup time
+DEFERRED_MODULES = ["black", "numpy", "pyxirr"]
+# Generous enough for slow CI machines; importing the bot takes about half a second locally
+IMPORT_TIME_BUDGET_US = 3_000_000
+
+
+def _import_times(module):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print(','.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            cumulative_times[name.strip()] = int(cumulative)
+
+    return set(result.stdout.strip().split(",")), cumulative_times
+
+
+class TestImportTime:
+    @pytest.mark.parametrize("module", ["prosper_bot.bot.bot", "prosper_bot.cli"])
+    def test_heavy_modules_are_deferred(self, module):
+        loaded_modules, _ = _import_times(module)
+
+        assert module in loaded_modules
+        assert [m for m in DEFERRED_MODULES if m in loaded_modules] == []
+
+    def test_import_time_budget(self):
+        _, cumulative_times = _import_times("prosper_bot.bot.bot")
+
+        assert cumulative_times["prosper_bot.bot.bot"] < IMPORT_TIME_BUDGET_US
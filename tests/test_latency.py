@@ -0,0 +1,138 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from prosper_api.models import BidRequest, Order
+from prosper_api.models.enums import BidResult, BidStatus, OrderSource, OrderStatus
+
+from prosper_bot.latency import ListingLatencyTracker, OrderSample
+from prosper_bot.metrics import MetricsRecorder
+
+
+def _listing(mocker, listing_number, start_date="2024-01-01 11:59:58 +0000"):
+    return mocker.MagicMock(
+        listing_number=listing_number, listing_start_date=start_date
+    )
+
+
+def _order(results):
+    return Order(
+        order_id="fake-order",
+        order_date="2024-01-01 12:00:00 +0000",
+        bid_requests=[
+            BidRequest(
+                listing_id=listing_id,
+                bid_amount=Decimal("25.00"),
+                bid_status=BidStatus.PENDING,
+                bid_result=result,
+            )
+            for listing_id, result in results
+        ],
+        order_status=OrderStatus.IN_PROGRESS,
+        source=OrderSource.API,
+    )
+
+
+class TestListingLatencyTracker:
+    @pytest.fixture
+    def metrics(self):
+        return MetricsRecorder()
+
+    @pytest.fixture
+    def tracker(self, metrics, clock):
+        return ListingLatencyTracker(metrics, max_listings=3, clock=clock)
+
+    def test_record_order(self, mocker, tracker, metrics, clock):
+        tracker.observe_listings(
+            [_listing(mocker, 1), _listing(mocker, 2, "not a date")]
+        )
+        clock.now += timedelta(seconds=10)
+        # Later sightings don't move the first sighting
+        tracker.observe_listings([_listing(mocker, 1), _listing(mocker, 3)])
+        clock.now += timedelta(seconds=5)
+
+        samples = tracker.record_order(
+            [1, 2, 3, 4],
+            tracker.now(),
+            _order(
+                [
+                    (1, BidResult.BID_SUCCEEDED),
+                    (2, BidResult.LISTING_NOT_BIDDABLE),
+                    (3, BidResult.NONE),
+                ]
+            ),
+        )
+
+        assert samples == [
+            OrderSample(
+                1, timedelta(seconds=2), timedelta(seconds=15), "BID_SUCCEEDED"
+            ),
+            OrderSample(2, None, timedelta(seconds=15), "LISTING_NOT_BIDDABLE"),
+            OrderSample(3, timedelta(seconds=12), timedelta(seconds=5), "PENDING"),
+            OrderSample(4, None, None, "PENDING"),
+        ]
+        assert tracker.samples == samples
+        assert tracker.funded_rate == 0.25
+        assert metrics.span_counts == {
+            "listing.discovery_delay": 2,
+            "listing.order_latency": 3,
+        }
+        assert metrics.span_totals["listing.order_latency"] == 35
+
+    def test_record_order_when_failed(self, mocker, tracker, clock):
+        tracker.observe_listings([_listing(mocker, 1)])
+
+        samples = tracker.record_order([1], clock(), None)
+
+        assert [s.result for s in samples] == ["ERROR"]
+
+    def test_observe_listings_forgets_oldest(self, mocker, tracker, clock):
+        tracker.observe_listings([_listing(mocker, i) for i in range(1, 5)])
+
+        samples = tracker.record_order([1, 4], clock(), None)
+
+        assert [s.order_latency for s in samples] == [None, timedelta(0)]
+
+    def test_without_metrics(self, mocker, clock):
+        tracker = ListingLatencyTracker(clock=clock)
+        tracker.observe_listings([_listing(mocker, 1)])
+
+        assert tracker.record_order([1], clock(), None)[0].order_latency == timedelta(0)
+
+    def test_report(self, mocker, tracker, clock):
+        tracker.observe_listings([_listing(mocker, i) for i in range(1, 4)])
+        clock.now += timedelta(minutes=2)
+        tracker.record_order(
+            [1, 2],
+            tracker.now(),
+            _order([(1, BidResult.BID_SUCCEEDED), (2, BidResult.AMOUNT_BID_TOO_HIGH)]),
+        )
+        clock.now += timedelta(hours=2)
+        tracker.record_order([3, 5], tracker.now(), None)
+        mocker.patch("shutil.get_terminal_size", return_value=(20, 24))
+        lines = []
+
+        tracker.report(lines.append)
+
+        assert lines == [
+            "### Listing start to first sighting (polling) ###",
+            "< 5s   : |---------------| 75.00%",
+            "unknown: |-----| 25.00%",
+            "### First sighting to order (strategy and ordering) ###",
+            "< 5m   : |----------| 50.00%",
+            ">= 1h  : |-----| 25.00%",
+            "unknown: |-----| 25.00%",
+            "### Bid outcomes ###",
+            "AMOUNT_BID_TOO_HIGH: |-----| 25.00%",
+            "BID_SUCCEEDED      : |-----| 25.00%",
+            "ERROR              : |----------| 50.00%",
+            "25.0% of 4 bids landed on listings that were already funded",
+        ]
+
+    def test_report_without_orders(self, tracker):
+        lines = []
+
+        tracker.report(lines.append)
+
+        assert lines == ["No orders placed yet; nothing to report."]
+        assert tracker.funded_rate == 0.0
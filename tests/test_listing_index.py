@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+
+from prosper_bot.listing_index import SeenListingIndex
+
+
+def _listing(mocker, listing_number, amount_remaining=1000.0):
+    return mocker.MagicMock(
+        listing_number=listing_number,
+        last_updated_date="2023-08-29 12:00:00 +0000",
+        listing_status=2,
+        amount_funded=100.0,
+        amount_remaining=amount_remaining,
+        lender_yield=0.25,
+        invested=False,
+    )
+
+
+class TestSeenListingIndex:
+    @pytest.fixture
+    def index(self, clock):
+        return SeenListingIndex(max_size=3, ttl=timedelta(minutes=10), clock=clock)
+
+    def test_observe(self, mocker, index):
+        assert index.observe(_listing(mocker, 1))
+        assert not index.observe(_listing(mocker, 1))
+        assert index.observe(_listing(mocker, 1, amount_remaining=975.0))
+        assert len(index) == 1
+
+    def test_observe_evicts_least_recently_used(self, mocker, index):
+        for listing_number in range(3):
+            index.observe(_listing(mocker, listing_number))
+        index.observe(_listing(mocker, 0))
+
+        index.observe(_listing(mocker, 3))
+
+        assert list(index._entries) == [2, 0, 3]
+        assert index.observe(_listing(mocker, 1))
+
+    def test_observe_evicts_expired(self, mocker, index, clock):
+        index.observe(_listing(mocker, 1))
+        clock.now += timedelta(minutes=5)
+        index.observe(_listing(mocker, 2))
+        clock.now += timedelta(minutes=6)
+
+        index.observe(_listing(mocker, 3))
+
+        assert list(index._entries) == [2, 3]
+        assert not index.observe(_listing(mocker, 2))
+        clock.now += timedelta(minutes=10)
+        assert index.observe(_listing(mocker, 2))
+
+    def test_invested(self, index, clock):
+        index.mark_invested(1)
+        clock.now += timedelta(minutes=5)
+        index.mark_invested(2)
+
+        assert index.is_invested(1)
+        assert not index.is_invested(3)
+        clock.now += timedelta(minutes=6)
+        assert not index.is_invested(1)
+        assert index.is_invested(2)
+        assert list(index._invested) == [2]
@@ -0,0 +1,157 @@
+import json
+from os.path import exists, join
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from prosper_bot.metrics import (
+    JsonLinesExporter,
+    MetricsExporters,
+    MetricsRecorder,
+    PrometheusExporter,
+)
+
+
+class TestMetricsRecorder:
+    @pytest.fixture
+    def exporter(self, mocker):
+        return mocker.MagicMock()
+
+    @pytest.fixture
+    def recorder(self, exporter):
+        return MetricsRecorder(exporter, window=4)
+
+    def test_cycle(self, mocker, recorder, exporter):
+        mocker.patch("prosper_bot.metrics.perf_counter", side_effect=range(100))
+
+        with recorder.cycle():
+            with recorder.span("strategy"):
+                pass
+            with recorder.api_call("search_listings"):
+                pass
+            recorder.record_since_cycle_start("decision")
+
+        metrics = exporter.call_args.args[0]
+        assert metrics.spans == {
+            "strategy": 1,
+            "api.search_listings": 1,
+            "decision": 6,
+            "cycle": 6,
+        }
+        assert metrics.api_calls == {"search_listings": 1}
+        assert metrics.api_errors == {}
+        assert not metrics.error
+        assert metrics.recorder is recorder
+        assert recorder.cycles == 1
+        assert recorder.cycle_errors == 0
+
+    def test_cycle_when_error(self, recorder, exporter):
+        with pytest.raises(ValueError):
+            with recorder.cycle():
+                with recorder.api_call("order"):
+                    raise ValueError("Order failed")
+
+        metrics = exporter.call_args.args[0]
+        assert metrics.error
+        assert metrics.api_errors == {"order": 1}
+        assert recorder.api_errors == {"order": 1}
+        assert recorder.cycle_errors == 1
+
+    def test_cycle_when_export_fails(self, recorder, exporter, caplog):
+        exporter.side_effect = OSError("Disk full")
+
+        with recorder.cycle():
+            pass
+
+        assert caplog.records[-1].message == "Failed to export metrics: Disk full"
+
+    def test_record_since_cycle_start_outside_cycle(self, recorder):
+        recorder.record_since_cycle_start("decision")
+
+        assert recorder.span_names == []
+
+    def test_percentiles(self, recorder):
+        assert recorder.percentiles("cycle") == {}
+
+        for seconds in [9.0, 1.0, 2.0, 3.0, 4.0]:
+            recorder.record("cycle", seconds)
+
+        # Only the most recent samples count toward the percentiles
+        assert recorder.percentiles("cycle") == {0.5: 3.0, 0.9: 4.0, 0.99: 4.0}
+        assert recorder.span_totals["cycle"] == 19.0
+        assert recorder.span_counts["cycle"] == 5
+
+    def test_without_exporter(self):
+        recorder = MetricsRecorder()
+
+        with recorder.cycle():
+            pass
+
+        assert recorder.cycles == 1
+
+
+class TestExporters:
+    @pytest.fixture
+    def recorder(self, mocker):
+        mocker.patch("prosper_bot.metrics.perf_counter", side_effect=range(100))
+        return MetricsRecorder()
+
+    def _run_cycle(self, recorder, exporter):
+        recorder._exporter = exporter
+        with recorder.cycle():
+            with recorder.api_call("get_account_info"):
+                pass
+            with pytest.raises(ValueError):
+                with recorder.api_call("order"):
+                    raise ValueError()
+
+    def test_prometheus(self, recorder):
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "prosper-bot.prom")
+
+            self._run_cycle(recorder, MetricsExporters.PROMETHEUS.to_exporter(path))
+
+            with open(path) as metrics_file:
+                lines = metrics_file.read().splitlines()
+            assert not exists(f"{path}.tmp")
+
+        assert lines[:2] == [
+            "# HELP prosper_bot_span_seconds Time spent in each phase of the bot cycle, over the most recent cycles.",
+            "# TYPE prosper_bot_span_seconds summary",
+        ]
+        assert 'prosper_bot_span_seconds{span="cycle",quantile="0.5"} 5' in lines
+        assert 'prosper_bot_span_seconds_sum{span="api.order"} 1' in lines
+        assert 'prosper_bot_span_seconds_count{span="api.order"} 1' in lines
+        assert 'prosper_bot_api_calls_total{call="get_account_info"} 1' in lines
+        assert 'prosper_bot_api_calls_total{call="order"} 1' in lines
+        assert 'prosper_bot_api_errors_total{call="order"} 1' in lines
+        assert "prosper_bot_cycles_total 1" in lines
+        assert "prosper_bot_cycle_errors_total 0" in lines
+        assert lines[-1].startswith("prosper_bot_last_cycle_timestamp_seconds ")
+
+    def test_json_lines(self, recorder):
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "prosper-bot.jsonl")
+
+            self._run_cycle(recorder, MetricsExporters.JSON_LINES.to_exporter(path))
+            self._run_cycle(recorder, JsonLinesExporter(path))
+
+            with open(path) as metrics_file:
+                records = [json.loads(line) for line in metrics_file]
+
+        assert len(records) == 2
+        assert records[1]["error"] is False
+        assert records[1]["spans"] == {
+            "api.get_account_info": 1,
+            "api.order": 1,
+            "cycle": 5,
+        }
+        assert records[1]["api_calls"] == {"get_account_info": 1, "order": 1}
+        assert records[1]["api_errors"] == {"order": 1}
+        assert records[1]["percentiles"]["cycle"] == {"p50": 5, "p90": 5, "p99": 5}
+
+    def test_exporters_enum(self):
+        assert str(MetricsExporters.PROMETHEUS) == "PROMETHEUS"
+        assert isinstance(
+            MetricsExporters.PROMETHEUS.to_exporter("metrics.prom"), PrometheusExporter
+        )
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pytest
+from prosper_api.models import ListNotesResponse, Note
+from prosper_api.models.enums import ListNotesSortBy, LoanStatus, SortOrder
+
+from prosper_bot.note_store import NoteStore
+
+
+def _note(loan_note_id, origination_date, note_status=LoanStatus.CURRENT, paid=0.0):
+    return Note(
+        origination_date=origination_date,
+        principal_balance_pro_rata_share=25.0 - paid,
+        service_fees_paid_pro_rata_share=0.0,
+        principal_paid_pro_rata_share=paid,
+        interest_paid_pro_rata_share=0.0,
+        prosper_fees_paid_pro_rata_share=0.0,
+        late_fees_paid_pro_rata_share=0.0,
+        collection_fees_paid_pro_rata_share=0.0,
+        debt_sale_proceeds_received_pro_rata_share=0.0,
+        platform_proceeds_net_received=0.0,
+        next_payment_due_amount_pro_rata_share=1.0,
+        note_ownership_amount=25.0,
+        note_sale_gross_amount_received=0.0,
+        note_sale_fees_paid=0.0,
+        loan_note_id=loan_note_id,
+        listing_number=111111,
+        note_status=note_status,
+        note_status_description=note_status.name,
+        is_sold=False,
+        is_sold_folio=False,
+        loan_number=11111,
+        amount_borrowed=5000.0,
+        borrower_rate=0.25,
+        lender_yield=0.24,
+        prosper_rating="C",
+        term=36,
+        age_in_months=1,
+        accrued_interest=0.0,
+        payment_received=0.0,
+        loan_settlement_status="Unspecified",
+        loan_extension_status="Unspecified",
+        loan_extension_term=0,
+        is_in_bankruptcy=False,
+        co_borrower_application=False,
+        days_past_due=0,
+        next_payment_due_date="2024-01-01",
+        ownership_start_date=origination_date,
+    )
+
+
+class TestNoteStore:
+    @pytest.fixture(autouse=True)
+    def page_size(self, mocker):
+        mocker.patch("prosper_bot.note_store.PAGE_SIZE", 2)
+
+    @pytest.fixture
+    def account_notes(self):
+        return [
+            _note("0-2", "2020-11-01", LoanStatus.COMPLETED),
+            _note("0-1", "2020-12-01", LoanStatus.COMPLETED),
+            _note("1-1", "2021-01-01", LoanStatus.COMPLETED),
+            _note("2-1", "2021-02-01", LoanStatus.CHARGED_OFF),
+            _note("3-1", "2021-03-01"),
+            _note("4-1", "2021-04-01"),
+            _note("5-1", "2021-05-01", LoanStatus.COMPLETED),
+        ]
+
+    @pytest.fixture
+    def client_mock(self, mocker, account_notes):
+        def list_notes(request):
+            assert request.sort_by == ListNotesSortBy.ORIGINATION_DATE
+            assert request.sort_dir == SortOrder.DESCENDING
+            notes = sorted(
+                account_notes, key=lambda n: n.origination_date, reverse=True
+            )
+            page = notes[request.offset : request.offset + request.limit]
+            return ListNotesResponse(
+                result=page, result_count=len(page), total_count=len(notes)
+            )
+
+        client = mocker.MagicMock()
+        client.list_notes.side_effect = list_notes
+        return client
+
+    @pytest.fixture
+    def store(self):
+        with NoteStore(":memory:") as store:
+            yield store
+
+    def test_sync_when_empty(self, store, client_mock, account_notes):
+        assert store.last_synced is None
+
+        assert store.sync(client_mock) == 7
+
+        assert client_mock.list_notes.call_count == 4
+        assert store.notes() == account_notes
+        assert store.last_synced is not None
+
+    def test_sync_without_concurrent_requests(self, store, client_mock, account_notes):
+        # Fetches one page at a time rather than stopping after the first one
+        assert store.sync(client_mock, max_concurrent_requests=0) == 7
+
+        assert store.notes() == account_notes
+
+    def test_sync_when_recently_synced(self, store, client_mock):
+        store.sync(client_mock)
+
+        assert store.sync(client_mock) == 0
+        assert client_mock.list_notes.call_count == 4
+
+    def test_sync_stops_at_oldest_active_note(self, store, client_mock, account_notes):
+        store.sync(client_mock)
+        account_notes[4] = _note("3-1", "2021-03-01", paid=5.0)
+        account_notes.append(_note("6-1", "2021-06-01"))
+
+        assert (
+            store.sync(client_mock, max_age=timedelta(0), max_concurrent_requests=1)
+            == 2
+        )
+
+        # The second sync stops at the page past the oldest active note, never reaching the 0-x notes
+        assert client_mock.list_notes.call_count == 7
+        assert store.notes() == sorted(account_notes, key=lambda n: n.origination_date)
+
+    def test_sync_refreshes_recovering_notes(self, store, client_mock, account_notes):
+        account_notes[1] = _note("0-1", "2020-12-01", LoanStatus.CHARGED_OFF)
+        store.sync(client_mock)
+        account_notes[1] = _note("0-1", "2020-12-01", LoanStatus.CHARGED_OFF, paid=5.0)
+
+        # The charged-off notes were just refreshed, so the recovery waits for the next refresh
+        assert (
+            store.sync(client_mock, max_age=timedelta(0), max_concurrent_requests=1)
+            == 0
+        )
+        assert (
+            store.sync(
+                client_mock,
+                max_age=timedelta(0),
+                max_concurrent_requests=1,
+                recovery_max_age=timedelta(0),
+            )
+            == 1
+        )
+        assert account_notes[1] in store.notes()
+
+    def test_sync_without_active_notes(self, store, client_mock, account_notes):
+        account_notes[4:6] = []
+        store.sync(client_mock)
+        account_notes.append(_note("6-1", "2021-06-01"))
+
+        assert (
+            store.sync(client_mock, max_age=timedelta(0), max_concurrent_requests=1)
+            == 1
+        )
+
+        # The second sync stops at the page past the newest stored note
+        assert client_mock.list_notes.call_count == 5
+        assert [n.loan_note_id for n in store.notes()] == [
+            "0-2",
+            "0-1",
+            "1-1",
+            "2-1",
+            "5-1",
+            "6-1",
+        ]
+
+    def test_persists_between_runs(self, client_mock, account_notes):
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "cache", "notes.db")
+            with NoteStore(path) as store:
+                store.sync(client_mock)
+                last_synced = store.last_synced
+
+            with NoteStore(path) as store:
+                assert store.notes() == account_notes
+                assert store.last_synced == last_synced
+                assert datetime.now() - last_synced < timedelta(minutes=1)
@@ -0,0 +1,71 @@
+from os import listdir
+from os.path import join
+from pstats import Stats
+
+import pytest
+
+from prosper_bot.profiler import CycleProfiler
+
+
+def _busy_cycle():
+    return sum(i * i for i in range(1000))
+
+
+class TestCycleProfiler:
+    @pytest.fixture
+    def profiler(self, tmp_path):
+        return CycleProfiler(str(tmp_path / "profiles"), cycles_per_profile=2, top=5)
+
+    def test_cycle(self, profiler, tmp_path):
+        for _ in range(5):
+            with profiler.cycle():
+                _busy_cycle()
+
+        assert sorted(listdir(tmp_path / "profiles")) == [
+            "cycles-000001-000002.prof",
+            "cycles-000001-000002.txt",
+            "cycles-000003-000004.prof",
+            "cycles-000003-000004.txt",
+        ]
+        assert profiler.flush() == join(
+            tmp_path, "profiles", "cycles-000005-000005.prof"
+        )
+        stats = Stats(join(tmp_path, "profiles", "cycles-000001-000002.prof"))
+        assert any(
+            function == "_busy_cycle" and calls == 2
+            for (_, _, function), (_, calls, *_) in stats.stats.items()
+        )
+        summary = (tmp_path / "profiles" / "cycles-000001-000002.txt").read_text()
+        assert "Ordered by: cumulative time" in summary
+        assert "_busy_cycle" in summary
+
+    def test_cycle_when_error(self, profiler, tmp_path):
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                with profiler.cycle():
+                    raise ValueError()
+
+        assert len(listdir(tmp_path / "profiles")) == 2
+
+    def test_flush_without_cycles(self, profiler, tmp_path):
+        assert profiler.flush() is None
+
+        with profiler.cycle():
+            pass
+        profiler.flush()
+
+        assert profiler.flush() is None
+        assert len(listdir(tmp_path / "profiles")) == 2
+
+    def test_flush_when_write_fails(self, profiler, mocker, caplog):
+        mocker.patch(
+            "cProfile.Profile.dump_stats", side_effect=OSError("Read-only file system")
+        )
+        with profiler.cycle():
+            pass
+
+        assert profiler.flush() is None
+        assert (
+            caplog.records[-1].message
+            == "Failed to write profile: Read-only file system"
+        )
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+import requests
+from prosper_api.models import SearchListingsRequest
+from prosper_shared.omni_config import Config
+
+from prosper_bot.recording import RecordingClient, ReplayClient
+from prosper_bot.simulator import SimulatedClient
+
+
+class TestRecording:
+    @pytest.fixture
+    def simulated_client(self):
+        clock = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        return SimulatedClient(seed=5, note_count=10, clock=lambda: clock)
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "recording.jsonl")
+
+    def test_record_and_replay(self, simulated_client, path):
+        with RecordingClient(simulated_client, path) as recorder:
+            account = recorder.get_account_info()
+            listings = recorder.search_listings(SearchListingsRequest(limit=5))
+            order = recorder.order(listings.result[0].listing_number, Decimal("25.00"))
+            notes = recorder.list_notes()
+
+        with ReplayClient(path) as replay:
+            assert replay.get_account_info() == account
+            assert replay.search_listings(SearchListingsRequest(limit=5)) == listings
+            assert (
+                replay.order(listings.result[0].listing_number, Decimal("25.00"))
+                == order
+            )
+            assert replay.list_notes() == notes
+            with pytest.raises(LookupError):
+                replay.get_account_info()
+
+    def test_replay_out_of_order(self, simulated_client, path):
+        with RecordingClient(simulated_client, path) as recorder:
+            first = recorder.search_listings(SearchListingsRequest(limit=2))
+            second = recorder.search_listings(SearchListingsRequest(limit=3))
+            third = recorder.search_listings(SearchListingsRequest(limit=2))
+
+        with ReplayClient(path) as replay:
+            assert replay.search_listings(SearchListingsRequest(limit=3)) == second
+            assert replay.search_listings(SearchListingsRequest(limit=2)) == first
+            assert replay.search_listings(SearchListingsRequest(limit=2)) == third
+            with pytest.raises(LookupError):
+                replay.search_listings(SearchListingsRequest(limit=3))
+
+    def test_replay_errors(self, path):
+        with RecordingClient(SimulatedClient(error_rate=1.0), path) as recorder:
+            with pytest.raises(requests.HTTPError):
+                recorder.get_account_info()
+
+        with ReplayClient(path) as replay:
+            with pytest.raises(requests.HTTPError) as e:
+                replay.get_account_info()
+
+        assert e.value.response.status_code == 503
+
+    def test_replay_text_responses(self, mocker, path):
+        inner = mocker.MagicMock()
+        inner._config = Config({"key": "value"})
+        inner._do_request.return_value = "not\njson"
+
+        with RecordingClient(inner, path) as recorder:
+            assert recorder._do_request("GET", "https://fake.url") == "not\njson"
+            assert recorder._config == inner._config
+
+        with ReplayClient(path) as replay:
+            assert replay._do_request("GET", "https://fake.url") == "not\njson"
+
+    def test_replay_empty_recording(self, path):
+        open(path, "w").close()
+
+        with ReplayClient(path) as replay:
+            assert list(replay.records()) == []
+            with pytest.raises(LookupError):
+                replay.get_account_info()
+
+    def test_records(self, mocker, path):
+        inner = mocker.MagicMock()
+        inner._config = None
+        inner._do_request.return_value = '{"a": 1}'
+        mocker.patch("prosper_bot.recording.time", return_value=1700000000.1234)
+
+        with RecordingClient(inner, path) as recorder:
+            recorder._do_request("GET", "https://fake.url", params={"limit": 1})
+            recorder._do_request("POST", "https://fake.url", data={"id": 2})
+
+        with ReplayClient(path) as replay:
+            replay._do_request("POST", "https://fake.url", data={"id": 2})
+            records = list(replay.records())
+
+        assert [tuple(r) for r in records] == [
+            (
+                1700000000.123,
+                "GET",
+                "https://fake.url",
+                {"limit": 1},
+                {},
+                200,
+                '{"a": 1}',
+            ),
+            (
+                1700000000.123,
+                "POST",
+                "https://fake.url",
+                {},
+                {"id": 2},
+                200,
+                '{"a": 1}',
+            ),
+        ]
+
+    def test_replay_without_trailing_newline(self, path):
+        with open(path, "w") as f:
+            f.write(
+                '{"request":["GET","https://fake.url",{},{}],"time":1,"response":[]}'
+            )
+
+        with ReplayClient(path) as replay:
+            assert replay._do_request("GET", "https://fake.url") == "[]"
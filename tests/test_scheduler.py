@@ -0,0 +1,199 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from prosper_bot.scheduler import (
+    AdaptivePollScheduler,
+    CycleOutcome,
+    FixedPollScheduler,
+    PollScheduler,
+    PollSchedulers,
+)
+
+
+def _listings(mocker, start_dates, first_listing_number=1):
+    return [
+        mocker.MagicMock(listing_number=i, listing_start_date=start_date)
+        for i, start_date in enumerate(start_dates, start=first_listing_number)
+    ]
+
+
+class TestPollScheduler:
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            PollScheduler()
+
+
+class TestFixedPollScheduler:
+    @pytest.mark.parametrize(
+        ["outcome", "expected_delay"],
+        [
+            (CycleOutcome.INVESTED, timedelta(seconds=5)),
+            (CycleOutcome.NO_LISTINGS, timedelta(minutes=1)),
+            (CycleOutcome.IDLE, timedelta(minutes=1)),
+        ],
+    )
+    def test_next_poll(self, mocker, outcome, expected_delay):
+        scheduler = FixedPollScheduler(timedelta(minutes=1))
+        scheduler.observe_listings(_listings(mocker, ["2023-08-28 22:00:47 +0000"]))
+
+        assert scheduler.next_poll(outcome) == expected_delay
+
+
+class TestAdaptivePollScheduler:
+    @pytest.fixture
+    def clock(self, clock):
+        clock.now = datetime(2023, 8, 29, 21, 0, tzinfo=timezone.utc)
+        return clock
+
+    @pytest.fixture
+    def scheduler(self, clock):
+        return AdaptivePollScheduler(
+            timedelta(minutes=1), min_samples=4, jitter=0.0, clock=clock
+        )
+
+    @pytest.fixture
+    def learned_scheduler(self, mocker, scheduler):
+        scheduler.observe_listings(
+            _listings(
+                mocker,
+                [
+                    "2023-08-28 22:00:47 +0000",
+                    "2023-08-28 22:01:12 +0000",
+                    "2023-08-28 15:02:00 -0700",
+                    "2023-08-28 09:30:00 +0000",
+                ],
+            )
+        )
+        return scheduler
+
+    def test_next_poll_backs_off_before_learning(self, scheduler):
+        delays = [scheduler.next_poll(CycleOutcome.NO_LISTINGS) for _ in range(6)]
+
+        assert delays == [
+            timedelta(minutes=1),
+            timedelta(minutes=2),
+            timedelta(minutes=4),
+            timedelta(minutes=8),
+            timedelta(minutes=15),
+            timedelta(minutes=15),
+        ]
+
+    def test_next_poll_resets_backoff_when_invested(self, scheduler):
+        scheduler.next_poll(CycleOutcome.IDLE)
+        scheduler.next_poll(CycleOutcome.IDLE)
+
+        assert scheduler.next_poll(CycleOutcome.INVESTED) == timedelta(seconds=5)
+        assert scheduler.next_poll(CycleOutcome.IDLE) == timedelta(minutes=1)
+
+    def test_next_poll_with_jitter(self, mocker):
+        rng = mocker.MagicMock()
+        rng.uniform.return_value = 0.1
+        scheduler = AdaptivePollScheduler(timedelta(minutes=1), jitter=0.2, rng=rng)
+
+        assert scheduler.next_poll(CycleOutcome.IDLE) == timedelta(seconds=66)
+        rng.uniform.assert_called_once_with(-0.2, 0.2)
+
+    @pytest.mark.parametrize(
+        "now",
+        [
+            datetime(2023, 8, 29, 21, 59, 30, tzinfo=timezone.utc),
+            datetime(2023, 8, 29, 22, 4, 59, tzinfo=timezone.utc),
+            datetime(2023, 8, 29, 15, 3, tzinfo=timezone(timedelta(hours=-7))),
+        ],
+    )
+    def test_next_poll_during_burst(self, learned_scheduler, clock, now):
+        clock.now = now
+
+        assert learned_scheduler.next_poll(CycleOutcome.NO_LISTINGS) == timedelta(
+            seconds=5
+        )
+
+    def test_next_poll_wakes_up_for_burst(self, learned_scheduler, clock):
+        clock.now = datetime(2023, 8, 29, 21, 45, tzinfo=timezone.utc)
+        delays = [
+            learned_scheduler.next_poll(CycleOutcome.NO_LISTINGS) for _ in range(5)
+        ]
+
+        assert delays == [
+            timedelta(minutes=1),
+            timedelta(minutes=2),
+            timedelta(minutes=4),
+            timedelta(minutes=8),
+            timedelta(minutes=14),
+        ]
+
+    def test_next_poll_wraps_around_midnight(self, learned_scheduler, clock):
+        clock.now = datetime(2023, 8, 29, 22, 10, tzinfo=timezone.utc)
+        for _ in range(5):
+            learned_scheduler.next_poll(CycleOutcome.IDLE)
+
+        assert learned_scheduler.next_poll(CycleOutcome.IDLE) == timedelta(minutes=15)
+        assert learned_scheduler._time_until_burst(clock.now) == timedelta(
+            hours=23, minutes=50
+        )
+
+    def test_observe_listings_skips_seen_and_unparseable(self, mocker, scheduler):
+        listings = _listings(
+            mocker, ["2023-08-28 22:00:47 +0000", "1234-12-34", "2023-08-28"]
+        )
+
+        scheduler.observe_listings(listings)
+        scheduler.observe_listings(listings)
+
+        assert list(scheduler._samples) == [264]
+        assert scheduler._bin_counts == {264: 1}
+
+    def test_observe_listings_evicts_oldest(self, mocker):
+        scheduler = AdaptivePollScheduler(timedelta(minutes=1), max_samples=2)
+
+        scheduler.observe_listings(
+            _listings(
+                mocker,
+                [
+                    "2023-08-28 22:00:47 +0000",
+                    "2023-08-28 09:30:00 +0000",
+                    "2023-08-28 09:31:00 +0000",
+                ],
+            )
+        )
+        scheduler.observe_listings(
+            _listings(mocker, ["2023-08-28 22:00:47 +0000"], first_listing_number=1)
+        )
+
+        assert list(scheduler._samples) == [114, 264]
+        assert +scheduler._bin_counts == {114: 1, 264: 1}
+        assert list(scheduler._seen_listings) == [3, 1]
+
+    def test_next_poll_logs_decisions(self, caplog, learned_scheduler, clock):
+        caplog.set_level(logging.DEBUG)
+        clock.now = datetime(2023, 8, 29, 22, 0, tzinfo=timezone.utc)
+
+        learned_scheduler.next_poll(CycleOutcome.NO_LISTINGS)
+        learned_scheduler.next_poll(CycleOutcome.NO_LISTINGS)
+        learned_scheduler.next_poll(CycleOutcome.INVESTED)
+
+        assert [(r.levelname, r.message) for r in caplog.records] == [
+            ("INFO", "Polling again in 5 seconds: listing burst expected"),
+            ("DEBUG", "Polling again in 5 seconds: listing burst expected"),
+            ("INFO", "Polling again in 5 seconds: investing"),
+        ]
+
+
+class TestPollSchedulers:
+    @pytest.mark.parametrize(
+        ["scheduler_enum", "expected_class"],
+        [
+            (PollSchedulers.FIXED, FixedPollScheduler),
+            (PollSchedulers.ADAPTIVE, AdaptivePollScheduler),
+        ],
+    )
+    def test_to_scheduler(self, scheduler_enum, expected_class):
+        scheduler = scheduler_enum.to_scheduler(timedelta(minutes=1))
+
+        assert type(scheduler) is expected_class
+        assert scheduler._poll_time == timedelta(minutes=1)
+
+    def test_str(self):
+        assert str(PollSchedulers.ADAPTIVE) == "ADAPTIVE"
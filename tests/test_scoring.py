@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from prosper_api.models import Listing
+from prosper_api.models.enums import ProsperRating
+
+from prosper_bot.scoring import (
+    ListingColumns,
+    ListingScorer,
+    field,
+    rank,
+    rating_weights,
+)
+
+
+def _listing(listing_number, rating, lender_yield, listing_term=None, **fields):
+    return Listing.model_construct(
+        listing_number=listing_number,
+        prosper_rating=ProsperRating[rating],
+        lender_yield=Decimal(lender_yield),
+        listing_term=listing_term,
+        **fields,
+    )
+
+
+class TestScoring:
+    @pytest.fixture
+    def listings(self):
+        return [
+            _listing(1, "C", "0.12", 36, amount_remaining=Decimal("100.00")),
+            _listing(2, "AA", "0.06", 60, amount_remaining=Decimal("2000.00")),
+            _listing(3, "HR", "0.20", 36),
+            _listing(4, "A", "0.12", 36, amount_remaining=Decimal("50.00")),
+        ]
+
+    def test_listing_columns(self, listings):
+        columns = ListingColumns.from_listings(listings)
+
+        np.testing.assert_array_equal(columns.lender_yield, [0.12, 0.06, 0.20, 0.12])
+        np.testing.assert_array_equal(columns.prosper_rating, [4, 7, 1, 6])
+        np.testing.assert_array_equal(columns.listing_term, [36, 60, 36, 36])
+        np.testing.assert_array_equal(
+            columns.amount_remaining, [100.0, 2000.0, np.nan, 50.0]
+        )
+        assert np.isnan(columns.prosper_score).all()
+
+    def test_listing_columns_when_empty(self):
+        columns = ListingColumns.from_listings([])
+
+        assert len(columns) == 0
+        assert all(len(getattr(columns, f)) == 0 for f in ListingColumns.FIELDS)
+
+    def test_listing_columns_are_extracted_once(self, listings):
+        columns = ListingColumns.from_listings(listings)
+
+        assert columns.lender_yield is columns.lender_yield
+        assert "listing_term" not in vars(columns)
+        with pytest.raises(AttributeError):
+            columns.listing_title
+
+    def test_rank(self, listings):
+        ranked = rank(listings, field("lender_yield"))
+
+        # Ties keep the order of the page
+        assert [listing.listing_number for listing in ranked] == [3, 1, 4, 2]
+
+    def test_rank_when_empty(self):
+        assert rank([], field("lender_yield")) == []
+
+    def test_rank_drops_unscored_listings(self, listings):
+        ranked = rank(listings, -field("amount_remaining"))
+
+        assert [listing.listing_number for listing in ranked] == [4, 1, 2]
+
+    def test_composed_scorers(self, listings):
+        scorer = (
+            field("lender_yield") * 2
+            + rating_weights({"AA": 0.5, "A": 0.1})
+            - 0.001 * field("listing_term")
+            + 1
+        ).where(lambda c: c.prosper_rating != 1)
+
+        scores = scorer(ListingColumns.from_listings(listings))
+
+        np.testing.assert_allclose(scores, [1.204, 1.56, np.nan, 1.304])
+        assert [listing.listing_number for listing in rank(listings, scorer)] == [
+            2,
+            4,
+            1,
+        ]
+
+    def test_scorers_combine_with_scorers(self, listings):
+        columns = ListingColumns.from_listings(listings)
+        term = field("listing_term")
+
+        np.testing.assert_allclose(
+            (field("lender_yield") * term - term)(columns),
+            [-31.68, -56.4, -28.8, -31.68],
+        )
+        np.testing.assert_allclose(
+            (1 + 2 * field("lender_yield"))(columns), [1.24, 1.12, 1.4, 1.24]
+        )
+
+    def test_custom_scorer(self, listings):
+        scorer = ListingScorer(lambda c: c.lender_yield > 0.1)
+
+        assert scorer(ListingColumns.from_listings(listings)).dtype == np.float64
+
+    def test_field_when_unknown(self):
+        with pytest.raises(ValueError):
+            field("listing_title")
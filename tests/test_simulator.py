@@ -0,0 +1,312 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+import requests
+from prosper_api.models import ListNotesRequest, SearchListingsRequest
+from prosper_api.models.enums import (
+    BidResult,
+    ListNotesSortBy,
+    SearchListingsSortBy,
+    SortOrder,
+)
+from prosper_shared.omni_config import Config
+
+from prosper_bot.allocation_strategy import AllocationStrategies
+from prosper_bot.bot.bot import Bot
+from prosper_bot.client import BotClient
+from prosper_bot.simulator import SimulatedClient, SimulatorStats
+
+
+class TestSimulatedClient:
+    @pytest.fixture
+    def client(self, clock):
+        return SimulatedClient(
+            seed=7, note_count=30, funding_time=timedelta(days=7), clock=clock
+        )
+
+    def test_get_account_info(self, client):
+        account = client.get_account_info()
+
+        assert account.available_cash_balance == Decimal("1000.00")
+        assert account.total_account_value == (
+            account.available_cash_balance
+            + account.outstanding_principal_on_active_notes
+        )
+        assert sum(account.invested_notes.model_dump().values()) == (
+            account.outstanding_principal_on_active_notes
+        )
+        assert client._config.get("prosper-bot.analytics.note-store") is None
+
+    def test_search_listings(self, client):
+        response = client.search_listings(SearchListingsRequest(limit=500))
+
+        assert response.total_count == 20
+        assert response.result_count == 20
+        yields = [listing.lender_yield for listing in response.result]
+        assert yields == sorted(yields, reverse=True)
+        assert all(listing.biddable for listing in response.result)
+
+    def test_search_listings_filters(self, client):
+        all_listings = client.search_listings(SearchListingsRequest(limit=500)).result
+        cheapest = min(listing.amount_remaining for listing in all_listings)
+
+        assert {
+            listing.prosper_rating.value
+            for listing in client.search_listings(
+                SearchListingsRequest(limit=500, prosper_rating=["C", "D"])
+            ).result
+        } <= {"C", "D"}
+        assert [
+            listing.amount_remaining
+            for listing in client.search_listings(
+                SearchListingsRequest(amount_remaining_max=cheapest)
+            ).result
+        ] == [cheapest]
+        assert (
+            client.search_listings(
+                SearchListingsRequest(
+                    amount_remaining_min=max(
+                        listing.amount_remaining for listing in all_listings
+                    )
+                    + 1
+                )
+            ).result
+            == []
+        )
+        assert [
+            listing.listing_number
+            for listing in client.search_listings(
+                SearchListingsRequest(
+                    listing_number=[all_listings[3].listing_number],
+                    lender_yield_min=all_listings[3].lender_yield,
+                )
+            ).result
+        ] == [all_listings[3].listing_number]
+        assert (
+            client.search_listings(
+                SearchListingsRequest(
+                    lender_yield_max=min(
+                        listing.lender_yield for listing in all_listings
+                    )
+                    - Decimal("0.0001")
+                )
+            ).result
+            == []
+        )
+
+    def test_search_listings_sorts_and_pages(self, client):
+        request = SearchListingsRequest(
+            sort_by=SearchListingsSortBy.LISTING_NUMBER,
+            sort_dir=SortOrder.ASCENDING,
+            limit=15,
+        )
+
+        first_page = client.search_listings(request)
+        second_page = client.search_listings(request.model_copy(update={"offset": 15}))
+
+        assert first_page.total_count == 20
+        assert [listing.listing_number for listing in first_page.result] == list(
+            range(10_000_000, 10_000_015)
+        )
+        assert [listing.listing_number for listing in second_page.result] == list(
+            range(10_000_015, 10_000_020)
+        )
+
+    def test_listings_arrive_and_fund_over_time(self, client, clock):
+        before = {
+            listing.listing_number: listing
+            for listing in client.search_listings(
+                SearchListingsRequest(limit=500)
+            ).result
+        }
+
+        # Nothing changes without time passing, so unchanged listings keep their fingerprints
+        assert client.search_listings(SearchListingsRequest(limit=500)).result == list(
+            before.values()
+        )
+
+        clock.now += timedelta(minutes=30)
+        after = [
+            listing
+            for biddable in [True, False]
+            for listing in client.search_listings(
+                SearchListingsRequest(limit=500, biddable=biddable)
+            ).result
+        ]
+
+        assert max(listing.listing_number for listing in after) > max(before)
+        for listing in after:
+            if listing.listing_number in before:
+                assert (
+                    listing.amount_funded > before[listing.listing_number].amount_funded
+                )
+                assert (
+                    listing.last_updated_date
+                    != before[listing.listing_number].last_updated_date
+                )
+            assert listing.biddable == (listing.amount_remaining > 0)
+
+    def test_listings_expire(self, client, clock):
+        clock.now += timedelta(days=15)
+        client._listings_per_minute = 0
+
+        assert [
+            client.search_listings(SearchListingsRequest(biddable=biddable)).total_count
+            for biddable in [True, False]
+        ] == [0, 0]
+
+    def test_order(self, client):
+        listing = client.search_listings(SearchListingsRequest(limit=1)).result[0]
+
+        order = client.order(listing.listing_number, Decimal("25.00"))
+
+        assert order.bid_requests[0].bid_result == BidResult.BID_SUCCEEDED
+        assert order.order_amount_placed == Decimal("25.00")
+        account = client.get_account_info()
+        assert account.available_cash_balance == Decimal("975.00")
+        assert getattr(account.pending_bids, listing.prosper_rating.name) == Decimal(
+            "25.00"
+        )
+        invested = client.search_listings(
+            SearchListingsRequest(
+                listing_number=[listing.listing_number], invested=True
+            )
+        ).result[0]
+        assert invested.amount_remaining == listing.amount_remaining - 25
+        assert client.stats.amount_invested == Decimal("25.00")
+
+    def test_order_batch_results(self, client):
+        listings = client.search_listings(SearchListingsRequest(limit=2)).result
+        client.deposit(Decimal("-950.00"))
+
+        order = BotClient(client).order_batch(
+            [
+                (listings[0].listing_number, Decimal("24.99")),
+                (listings[0].listing_number, listings[0].amount_remaining + 1),
+                (1, Decimal("25.00")),
+                (listings[1].listing_number, Decimal("50.00")),
+                (listings[1].listing_number, Decimal("25.00")),
+            ]
+        )
+
+        assert [b.bid_result for b in order.bid_requests] == [
+            BidResult.AMOUNT_BID_TOO_LOW,
+            BidResult.AMOUNT_BID_TOO_HIGH,
+            BidResult.BID_FAILED,
+            BidResult.BID_SUCCEEDED,
+            BidResult.INSUFFICIENT_FUNDS,
+        ]
+        assert client.stats.bid_count == 5
+        assert client.stats.fill_rate == 0.2
+
+    def test_order_when_listing_funded(self, client):
+        listing = client.search_listings(SearchListingsRequest(limit=1)).result[0]
+        client.deposit(listing.amount_remaining)
+        client.order(listing.listing_number, listing.amount_remaining)
+
+        order = client.order(listing.listing_number, Decimal("25.00"))
+
+        assert order.bid_requests[0].bid_result == BidResult.LISTING_NOT_BIDDABLE
+
+    def test_list_notes(self, client):
+        request = ListNotesRequest(
+            sort_by=ListNotesSortBy.ORIGINATION_DATE,
+            sort_dir=SortOrder.DESCENDING,
+            limit=500,
+        )
+
+        response = client.list_notes(request)
+        default_page = client.list_notes()
+
+        assert response.total_count == 30
+        assert response.result_count == 30
+        origination_dates = [note.origination_date for note in response.result]
+        assert origination_dates == sorted(origination_dates, reverse=True)
+        assert default_page.result_count == 25
+        assert {note.note_status.name for note in response.result} <= {
+            "CURRENT",
+            "COMPLETED",
+            "CHARGED_OFF",
+        }
+
+    def test_latency(self, mocker, clock):
+        sleeper = mocker.MagicMock()
+        client = SimulatedClient(
+            latency=timedelta(milliseconds=100),
+            latency_jitter=0.5,
+            clock=clock,
+            sleeper=sleeper,
+        )
+
+        client.get_account_info()
+
+        sleeper.assert_called_once()
+        assert 0.05 <= sleeper.call_args.args[0] <= 0.15
+
+    def test_errors(self, clock):
+        client = SimulatedClient(error_rate=1.0, error_status=429, clock=clock)
+
+        with pytest.raises(requests.HTTPError) as e:
+            client.get_account_info()
+
+        assert e.value.response.status_code == 429
+        assert client.stats.errors == {f"GET {client._ACCOUNT_API_URL}": 1}
+        assert client.stats.requests == {f"GET {client._ACCOUNT_API_URL}": 1}
+
+    def test_unsupported_request(self, client):
+        with pytest.raises(NotImplementedError):
+            client.list_orders()
+
+    def test_stats_fill_rate_without_bids(self):
+        assert SimulatorStats().fill_rate == 0.0
+
+    def test_bot(self, mocker, clock, tmp_path):
+        client = SimulatedClient(seed=3, cash=Decimal("100.00"), clock=clock)
+        mocker.patch(
+            "prosper_bot.bot.bot.sleep", side_effect=[None] * 10 + [AssertionError()]
+        )
+        config = Config(
+            {
+                "prosper-bot": {
+                    "cli": {"single-run": True},
+                    "bot": {
+                        "max-orders-per-cycle": 4,
+                        "metrics-file": str(tmp_path / "metrics.jsonl"),
+                        "metrics-format": "JSON_LINES",
+                    },
+                }
+            }
+        )
+        config.get_as_enum = mocker.MagicMock(
+            return_value=AllocationStrategies.OVERALL_HIGHEST_RATE
+        )
+
+        bot = Bot(config, client)
+        bot.run()
+
+        assert client.stats.bids == {BidResult.BID_SUCCEEDED.value: 4}
+        assert client.get_account_info().available_cash_balance == 0
+        assert bot.metrics.cycles == 2
+        assert bot.metrics.api_calls == {
+            "get_account_info": 2,
+            "search_listings": 1,
+            "order": 1,
+        }
+        assert bot.metrics.span_names == [
+            "api.get_account_info",
+            "api.order",
+            "api.search_listings",
+            "cycle",
+            "decision",
+            "listing.discovery_delay",
+            "listing.order_latency",
+            "listings",
+            "orders",
+            "strategy",
+        ]
+        assert [sample.result for sample in bot.latency.samples] == [
+            BidResult.BID_SUCCEEDED.name
+        ] * 4
+        assert all(sample.order_latency is not None for sample in bot.latency.samples)
+        assert (tmp_path / "metrics.jsonl").read_text().count("\n") == 2